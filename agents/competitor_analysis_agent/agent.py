@@ -4,12 +4,13 @@ from .prompts import FIND_COMPETITORS_PROMPT
 from .models import AllCompetitorsInfoWithScore
 from evaluation_score.agent import final_evaluation_score_agent
 from google.adk.tools.agent_tool import AgentTool
-from gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_SMALL
+from senseai_common.adk_models import governed_model
 
 # ---- Called by competitor_analysis_orchestrator
 competitor_finder_agent = LlmAgent(
     name="competitor_finder_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=("Agent to find competitor companies given a company name."),
     instruction=(FIND_COMPETITORS_PROMPT),
     tools=[google_search],
@@ -22,7 +23,7 @@ COMPETITOR_COUNT = int(os.getenv("COMPETITOR_COUNT", 5))
 # ---- Called by company_analysis_agent
 company_details_agent = LlmAgent(
     name="company_details_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=("Agent to gather detailed information about given company."),
     instruction=f"""
 You are an expert senior researcher at a startup evaulation firm who uses scrapers to get data about startups.
@@ -54,7 +55,7 @@ evaluation_score_tool = AgentTool(
 # ---- Called by company_analysis_agent
 evaluation_score_agent = LlmAgent(
     name="evaluation_score_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         "Agent that calculates score for each of the competitors as well as original company."
     ),
@@ -87,7 +88,7 @@ single_company_analysis_agent = ParallelAgent(
 # ---- Called by competitor_analysis_orchestrator
 data_formatter_agent = LlmAgent(
     name="data_formatter_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         """
         This is an agent that formats the competitor data into a structured JSON format.
@@ -11,12 +11,15 @@ from .prompts import (
     POINTS_ATTRIBUTER_PROMPT_V1,
     REVENUE_GROWTH_SCORE_PROMPT,
 )
-from gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
+from senseai_common.adk_models import governed_model, record_model_routing
 
 # ---- Is a sub-agent of `founder_background_score`
 founder_background_agent = Agent(
     name="founder_background_agent",
-    model=GEMINI_LARGE,
+    model=governed_model(GEMINI_LARGE, degradable=True),
+    # Runs inside competitor analysis' AgentTool, whose events the caller never sees
+    after_model_callback=record_model_routing,
     description=("Agent to gather founder background details."),
     instruction=(FOUNDER_BACKGROUND_RESEARCH_PROMPT),
     tools=[google_search],
@@ -25,7 +28,7 @@ founder_background_agent = Agent(
 # ---- Is a sub-agent of `founder_background_score`
 format_agent = LlmAgent(
     name="format_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         """
         This is an agent that formats the answers from the agent 'founder_background_agent'.
@@ -44,7 +47,7 @@ format_agent = LlmAgent(
 # ---- Is a sub-agent of `points_calculator_agent`
 points_attributer_agent = LlmAgent(
     name="points_attributer_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         """
         This is an agent that attributes points based on the the rubric provided in the instruction.
@@ -65,7 +68,7 @@ GEMINI_MODEL = GEMINI_SMALL
 # ---- Is a sub-agent of `points_calculator_agent`
 code_agent = LlmAgent(
     name=AGENT_NAME,
-    model=GEMINI_MODEL,
+    model=governed_model(GEMINI_MODEL),
     code_executor=BuiltInCodeExecutor(),
     instruction=(FOUNDER_BACKGROUND_SCORE_CALCULATOR_PROMPT_V1),
     description="Executes Python code to perform calculations.",
@@ -88,7 +91,7 @@ points_calculator_agent = SequentialAgent(
 # ---- Is a sub-agent of `points_and_rationale_agent`
 founder_data_summarizer = LlmAgent(
     name="founder_data_summarizer",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         """
         This agent generates a combined summary using multiple founders' background data.
@@ -147,7 +150,9 @@ founder_background_score = SequentialAgent(
 # ---- Is a sub-agent of `data_fetcher_agent`
 startup_evaluation_agent = Agent(
     name="startup_evaluation_agent",
-    model=GEMINI_LARGE,
+    model=governed_model(GEMINI_LARGE, degradable=True),
+    # Runs inside competitor analysis' AgentTool, whose events the caller never sees
+    after_model_callback=record_model_routing,
     description=(
         """Agent to calculate startup evaluation scores and gives rationale for each score."""
     ),
@@ -185,7 +190,7 @@ data_fetcher_agent = ParallelAgent(
 # ---- Is a sub-agent of `final_evaluation_score_agent`
 data_combiner_agent = LlmAgent(
     name="data_combiner_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     description=(
         """
         This is an agent that combines the founder background score with the evaluation scores.
@@ -8,7 +8,9 @@ and final formatting into a structured FactCheckReport.
 
 Key components
 - GEMINI_LARGE, GEMINI_SMALL: Model identifiers used to configure LlmAgent instances.
-    Adjust these constants to point to different models if required.
+    Adjust these constants to point to different models if required. The GEMINI_LARGE
+    agents are degradable: they fall back to GEMINI_SMALL while GEMINI_LARGE breaches
+    its latency SLO (see ``senseai_common.model_router``).
 - claim_extractor (LlmAgent): Extracts one or more discrete factual claims from input text.
 - evidence_search_agent (LlmAgent): Uses the `google_search` tool to locate web evidence
     that supports or refutes extracted claims.
@@ -30,7 +32,8 @@ from .prompts import (
     EVIDENCE_SEARCH_PROMPT,
     FACT_COMPARISON_PROMPT,
 )
-from gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
+from senseai_common.adk_models import governed_model
 
 
 # ------------------------------------------------
@@ -38,14 +41,14 @@ from gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
 # ------------------------------------------------
 claim_extractor = LlmAgent(
     name="claim_extractor",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction=CLAIM_EXTRACTION_PROMPT,
     description="Extracts factual claims from text.",
 )
 
 evidence_search_agent = LlmAgent(
     name="evidence_search_agent",
-    model=GEMINI_LARGE,
+    model=governed_model(GEMINI_LARGE, degradable=True),
     tools=[google_search],
     instruction=EVIDENCE_SEARCH_PROMPT,
     description="Searches for evidence supporting or refuting claims.",
@@ -53,14 +56,14 @@ evidence_search_agent = LlmAgent(
 
 fact_comparison_agent = LlmAgent(
     name="fact_comparison_agent",
-    model=GEMINI_LARGE,
+    model=governed_model(GEMINI_LARGE, degradable=True),
     instruction=FACT_COMPARISON_PROMPT,
     description="Compares each claim with evidence and outputs verdicts.",
 )
 
 data_format_agent = LlmAgent(
     name="data_format_agent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="Format the input data into a structured JSON format.",
     description="Formats data into JSON.",
     output_schema=FactCheckReport,
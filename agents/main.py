@@ -1,5 +1,6 @@
 """Main API server for Company Data Extraction with Citations and Competitor Analysis with Scoring using Google ADK"""
 
+import asyncio
 import json
 import logging
 import os
@@ -9,7 +10,6 @@ from typing import Any, Dict, Optional
 
 import dotenv
 import firebase_admin
-import fitz
 import google.cloud.logging
 from competitor_analysis_agent.agent import (
     competitor_analysis_orchestrator,
@@ -20,8 +20,7 @@ from competitor_analysis_agent.models import (
 from evaluation_score.agent import final_evaluation_score_agent
 from evaluation_score.models import EvaluationScoreComplete
 from fact_check_agent.agent import root_agent as fact_check_root
-from fact_check_agent.models import FactCheckReport
-from fastapi import FastAPI, File, HTTPException, UploadFile, Body
+from fastapi import FastAPI, File, HTTPException, UploadFile, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 from firebase_admin import credentials, firestore
 from google.adk.runners import Runner
@@ -33,6 +32,7 @@ from models import (
     CompanyRequest,
     CompanyResponse,
     CompetitorResponse,
+    FactCheckResponse,
     HealthResponse,
     StatsResponse,
 )
@@ -42,6 +42,9 @@ from research_agent.agent import root_agent
 from research_agent.models import (
     CompanyProfile,  # Imports the Cloud Logging client library
 )
+from senseai_common.adk_models import model_routing_from_events
+from senseai_common.document_store import get_document_store
+from senseai_common.governor import INTERACTIVE, call_priority
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
@@ -81,6 +84,11 @@ app = FastAPI(
 )
 
 
+# Name of the fact-check result in the shared document store. Bump the version when
+# the pipeline changes so stored reports are recomputed; ?refresh=true forces one.
+FACT_CHECK_RESULT = "fact_check_v1"
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -172,7 +180,11 @@ def get_competitors_from_firebase(company_name: str) -> Optional[Dict[str, Any]]
         return None
 
 
-def save_company_to_firebase(company_name: str, company_data: CompanyProfile) -> bool:
+def save_company_to_firebase(
+    company_name: str,
+    company_data: CompanyProfile,
+    model_routing: Optional[Dict[str, Any]] = None,
+) -> bool:
     """Save company data to Firebase with proper serialization"""
     try:
         doc_id = company_name.lower().replace(" ", "_")
@@ -186,6 +198,7 @@ def save_company_to_firebase(company_name: str, company_data: CompanyProfile) ->
             "extraction_status": "completed",
             "created_at": firestore.SERVER_TIMESTAMP,
             "data": serialized_data,
+            "model_routing": model_routing or {},
         }
 
         companies_ref.document(doc_id).set(document_data)
@@ -198,7 +211,9 @@ def save_company_to_firebase(company_name: str, company_data: CompanyProfile) ->
 
 
 def save_company_competitors_to_firebase(
-    company_name: str, competitor_data: AllCompetitorsInfoWithScore
+    company_name: str,
+    competitor_data: AllCompetitorsInfoWithScore,
+    model_routing: Optional[Dict[str, Any]] = None,
 ) -> bool:
     """Save company competitors data to Firebase with proper serialization"""
     try:
@@ -213,6 +228,7 @@ def save_company_competitors_to_firebase(
             "extraction_status": "completed",
             "created_at": firestore.SERVER_TIMESTAMP,
             "data": serialized_data,
+            "model_routing": model_routing or {},
         }
 
         competitors_ref.document(doc_id).set(document_data)
@@ -271,8 +287,13 @@ def is_data_fresh(last_updated, max_age_days: int = 30) -> bool:
         return False
 
 
-async def extract_company_data_with_adk(company_name: str) -> CompanyProfile:
-    """Extract company data using the enhanced ADK agent with citations"""
+async def extract_company_data_with_adk(
+    company_name: str,
+) -> tuple[CompanyProfile, Dict[str, Any]]:
+    """Extract company data using the enhanced ADK agent with citations
+
+    Returns the profile and the model routing record (agent -> model/tier used).
+    """
 
     start_time = datetime.now(timezone.utc)
     log_extraction_attempt(company_name, "started")
@@ -294,14 +315,15 @@ async def extract_company_data_with_adk(company_name: str) -> CompanyProfile:
     )
     try:
         # Run the agent and collect all events into a list
-        events = [
-            event
-            for event in runner.run(
-                user_id="api_user",
-                session_id=session_id,
-                new_message=content,
-            )
-        ]
+        with call_priority(INTERACTIVE):
+            events = [
+                event
+                async for event in runner.run_async(
+                    user_id="api_user",
+                    session_id=session_id,
+                    new_message=content,
+                )
+            ]
 
         # The final result is the very last event
         final_event = events[-1] if events else None
@@ -324,7 +346,7 @@ async def extract_company_data_with_adk(company_name: str) -> CompanyProfile:
                 logger.info(
                     f"✅ Enhanced ADK extraction completed for: {company_name} ({duration:.1f}s)"
                 )
-                return company_profile
+                return company_profile, model_routing_from_events(events)
 
             except json.JSONDecodeError as e:
                 raise Exception(f"Invalid JSON response from agent: {e}")
@@ -365,14 +387,15 @@ async def evaluation_score_with_adk(company_name: str) -> EvaluationScoreComplet
     logger.info(f"🤖 Starting enhanced ADK evaluation_score for: {company_name}")
     try:
         # Run the agent and collect all events into a list
-        events = [
-            event
-            for event in runner.run(
-                user_id="api_user",
-                session_id=session_id,
-                new_message=content,
-            )
-        ]
+        with call_priority(INTERACTIVE):
+            events = [
+                event
+                async for event in runner.run_async(
+                    user_id="api_user",
+                    session_id=session_id,
+                    new_message=content,
+                )
+            ]
 
         # The final result is the very last event
         final_event = events[-1] if events else None
@@ -410,8 +433,8 @@ async def evaluation_score_with_adk(company_name: str) -> EvaluationScoreComplet
 
 async def competitor_analysis_with_adk(
     company_name: str,
-) -> AllCompetitorsInfoWithScore:
-    """Fetch competitor analysis using the enhanced ADK agent"""
+) -> tuple[AllCompetitorsInfoWithScore, Dict[str, Any]]:
+    """Fetch competitor analysis and model routing record using the enhanced ADK agent"""
 
     session_service = InMemorySessionService()
     runner = Runner(
@@ -430,14 +453,15 @@ async def competitor_analysis_with_adk(
     logger.info(f"🤖 Starting enhanced ADK competitor_analysis for: {company_name}")
     try:
         # Run the agent and collect all events into a list
-        events = [
-            event
-            for event in runner.run(
-                user_id="api_user",
-                session_id=session_id,
-                new_message=content,
-            )
-        ]
+        with call_priority(INTERACTIVE):
+            events = [
+                event
+                async for event in runner.run_async(
+                    user_id="api_user",
+                    session_id=session_id,
+                    new_message=content,
+                )
+            ]
 
         # The final result is the very last event
         final_event = events[-1] if events else None
@@ -460,7 +484,7 @@ async def competitor_analysis_with_adk(
                 logger.info(
                     f"✅ Enhanced ADK competitor analysis completed for: {company_name}"
                 )
-                return all_competitor_info
+                return all_competitor_info, model_routing_from_events(events)
 
             except json.JSONDecodeError as e:
                 raise Exception(f"Invalid JSON response from agent: {e}")
@@ -528,12 +552,15 @@ async def extract_company(request: CompanyRequest):
                     last_updated=cached_data["last_updated"].isoformat(),
                     cache_age_days=cache_age,
                     extraction_status=cached_data.get("extraction_status", "completed"),
+                    model_routing=cached_data.get("model_routing"),
                 )
             except Exception as e2:
                 logger.info(f"❌ Failed to return raw data: {e2}, re-extracting")
                 # Last resort: re-extract
-                company_profile = await extract_company_data_with_adk(company_name)
-                save_company_to_firebase(company_name, company_profile)
+                company_profile, model_routing = await extract_company_data_with_adk(
+                    company_name
+                )
+                save_company_to_firebase(company_name, company_profile, model_routing)
 
                 return CompanyResponse(
                     company_name=company_name,
@@ -542,6 +569,7 @@ async def extract_company(request: CompanyRequest):
                     last_updated=datetime.now(timezone.utc).isoformat(),
                     cache_age_days=0,
                     extraction_status="completed",
+                    model_routing=model_routing,
                 )
 
         return CompanyResponse(
@@ -551,14 +579,15 @@ async def extract_company(request: CompanyRequest):
             last_updated=cached_data["last_updated"].isoformat(),
             cache_age_days=cache_age,
             extraction_status=cached_data.get("extraction_status", "completed"),
+            model_routing=cached_data.get("model_routing"),
         )
 
     # Extract fresh data using enhanced ADK agent
     logger.info(f"🔍 Extracting fresh data with citations for: {company_name}")
-    company_profile = await extract_company_data_with_adk(company_name)
+    company_profile, model_routing = await extract_company_data_with_adk(company_name)
 
     # Save to Firebase
-    save_success = save_company_to_firebase(company_name, company_profile)
+    save_success = save_company_to_firebase(company_name, company_profile, model_routing)
 
     if not save_success:
         logger.info("⚠️ Warning: Failed to save to Firebase, but extraction succeeded")
@@ -570,93 +599,99 @@ async def extract_company(request: CompanyRequest):
         last_updated=datetime.now(timezone.utc).isoformat(),
         cache_age_days=0,
         extraction_status="completed",
+        model_routing=model_routing,
     )
 
 
-@app.post("/fact-check", response_model=FactCheckReport)
-async def fact_check_pdf(file: UploadFile = File(...)):
-    """Accept a PDF upload, extract text, run the fact-check agent pipeline, and return a structured report."""
+@app.post("/fact-check", response_model=FactCheckResponse)
+async def fact_check_pdf(file: UploadFile = File(...), refresh: bool = Query(False)):
+    """Accept a PDF upload, extract text, run the fact-check agent pipeline, and return a structured report.
+
+    A report stored for the same bytes is returned unless ``refresh`` is set.
+    """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    # Save uploaded file temporarily
-    tmp_path = f"temp_{uuid.uuid4().hex}.pdf"
-    logger.info(f"Saving uploaded file to temporary path: {tmp_path}")
-    with open(tmp_path, "wb") as f:
-        f.write(await file.read())
-    logger.info(f"File saved: {tmp_path}")
     try:
-        try:
-            logger.info(f"Extracting text from PDF: {tmp_path}")
-            # Extract text from PDF using PyMuPDF (fitz)
-            doc = fitz.open(tmp_path)
-            full_text = []
-            for page in doc:
-                text = page.get_text("text")
-                # include page markers for traceability
-                full_text.append(f"[PAGE {page.number + 1}]\n" + text)
-            doc.close()
-
-            combined_text = "\n\n".join(full_text)
-            logger.info(f"Extracted text length: {len(combined_text)} characters")
-            logger.info(
-                "Text extraction completed. Running fact-check agent pipeline..."
-            )
+        # Record the upload in the shared document store; page text extracted by
+        # any service for the same bytes is reused. Parsing and storage I/O run off
+        # the event loop.
+        store = get_document_store()
+        doc_id = await asyncio.to_thread(store.put, await file.read(), file.filename)
+        stored_report = (
+            None if refresh else await asyncio.to_thread(store.get_result, doc_id, FACT_CHECK_RESULT)
+        )
+        if stored_report is not None:
+            logger.info(f"Returning stored fact-check report for document {doc_id[:12]}")
+            return FactCheckResponse(**stored_report)
+
+        logger.info(f"Extracting text from document {doc_id[:12]}")
+        # include page markers for traceability
+        page_texts = await asyncio.to_thread(store.page_texts, doc_id)
+        full_text = [
+            f"[PAGE {page_number}]\n" + text
+            for page_number, text in enumerate(page_texts, start=1)
+        ]
 
-            # Run the ADK agent pipeline (reuse Runner pattern used elsewhere)
-            session_service = InMemorySessionService()
-            runner = Runner(
-                agent=fact_check_root,
-                app_name="fact_check",
-                session_service=session_service,
-            )
-            session_id = f"factcheck_{uuid.uuid4().hex[:8]}"
+        combined_text = "\n\n".join(full_text)
+        logger.info(f"Extracted text length: {len(combined_text)} characters")
+        logger.info("Text extraction completed. Running fact-check agent pipeline...")
 
-            await session_service.create_session(
-                app_name="fact_check", user_id="api_user", session_id=session_id
-            )
+        # Run the ADK agent pipeline (reuse Runner pattern used elsewhere)
+        session_service = InMemorySessionService()
+        runner = Runner(
+            agent=fact_check_root,
+            app_name="fact_check",
+            session_service=session_service,
+        )
+        session_id = f"factcheck_{uuid.uuid4().hex[:8]}"
+
+        await session_service.create_session(
+            app_name="fact_check", user_id="api_user", session_id=session_id
+        )
 
-            content = types.Content(role="user", parts=[types.Part(text=combined_text)])
+        content = types.Content(role="user", parts=[types.Part(text=combined_text)])
 
-            # Collect events
+        # Collect events
+        with call_priority(INTERACTIVE):
             events = [
                 event
-                for event in runner.run(
+                async for event in runner.run_async(
                     user_id="api_user", session_id=session_id, new_message=content
                 )
             ]
-            final_event = events[-1] if events else None
-
-            if (
-                final_event
-                and final_event.is_final_response()
-                and final_event.content
-                and final_event.content.parts
-            ):
-                # Expect agent to return JSON string representing the fact-check report
-                json_string = final_event.content.parts[0].text
-                report_obj = json.loads(json_string)
-                return FactCheckReport(**report_obj)
-            else:
-                # Backend fallback: return empty claims array if agent output is not valid JSON
-                logger.info(
-                    "❌ Agent did not produce a valid final response. Returning empty claims array."
-                )
-                return FactCheckReport(claims=[])
+        final_event = events[-1] if events else None
+        model_routing = model_routing_from_events(events)
 
-        except Exception as e:
-            # Print full traceback to server console for debugging
-            import traceback
+        if (
+            final_event
+            and final_event.is_final_response()
+            and final_event.content
+            and final_event.content.parts
+        ):
+            # Expect agent to return JSON string representing the fact-check report
+            json_string = final_event.content.parts[0].text
+            report = FactCheckResponse(**json.loads(json_string), model_routing=model_routing)
+            await asyncio.to_thread(
+                store.put_result, doc_id, FACT_CHECK_RESULT, report.model_dump()
+            )
+            return report
+        else:
+            # Backend fallback: return empty claims array if agent output is not valid JSON
+            logger.info(
+                "❌ Agent did not produce a valid final response. Returning empty claims array."
+            )
+            return FactCheckResponse(claims=[], model_routing=model_routing)
 
-            traceback.print_exc()
-            # Return a controlled error to the client (preserves CORS headers)
-            raise HTTPException(
-                status_code=500, detail=f"Server error: {type(e).__name__}: {e}"
-            ) from e
+    except Exception as e:
+        # Print full traceback to server console for debugging
+        import traceback
 
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        traceback.print_exc()
+        # Return a controlled error to the client (preserves CORS headers)
+        raise HTTPException(
+            status_code=500, detail=f"Server error: {type(e).__name__}: {e}"
+        ) from e
 
 
 @app.post("/competitor-analysis", response_model=CompetitorResponse)
@@ -690,8 +725,12 @@ async def competitor_analysis(request: CompanyRequest):
         except ValueError as e:
             logger.info(f"⚠️ Cached data corrupted, re-extracting: {e}")
             # If cached data is corrupted, extract fresh data
-            competitor_data = await competitor_analysis_with_adk(company_name)
-            save_company_competitors_to_firebase(company_name, competitor_data)
+            competitor_data, model_routing = await competitor_analysis_with_adk(
+                company_name
+            )
+            save_company_competitors_to_firebase(
+                company_name, competitor_data, model_routing
+            )
 
             return CompetitorResponse(
                 company_name=company_name,
@@ -700,6 +739,7 @@ async def competitor_analysis(request: CompanyRequest):
                 last_updated=datetime.now(timezone.utc).isoformat(),
                 cache_age_days=0,
                 extraction_status="completed",
+                model_routing=model_routing,
             )
 
         return CompetitorResponse(
@@ -709,15 +749,18 @@ async def competitor_analysis(request: CompanyRequest):
             last_updated=cached_data["last_updated"].isoformat(),
             cache_age_days=cache_age,
             extraction_status=cached_data.get("extraction_status", "completed"),
+            model_routing=cached_data.get("model_routing"),
         )
 
     # Extract fresh data using enhanced ADK agent
     logger.info(f"🔍 Finding competitor data for: {company_name}")
-    competitor_analysis = await competitor_analysis_with_adk(company_name)
+    competitor_analysis, model_routing = await competitor_analysis_with_adk(
+        company_name
+    )
 
     # Save to Firebase
     save_success = save_company_competitors_to_firebase(
-        company_name, competitor_analysis
+        company_name, competitor_analysis, model_routing
     )
 
     if not save_success:
@@ -730,6 +773,7 @@ async def competitor_analysis(request: CompanyRequest):
         last_updated=datetime.now(timezone.utc).isoformat(),
         cache_age_days=0,
         extraction_status="completed",
+        model_routing=model_routing,
     )
 
 
@@ -911,25 +955,36 @@ async def save_verified_company(company: dict = Body(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def _pitch_deck_company_document(company_data: dict) -> tuple[str, dict]:
+    """Document id and Firestore document for a company extracted from a pitch deck."""
+    company_name = company_data.get("company_name", "Unknown Company")
+    doc_id = company_name.lower().replace(" ", "_")
+
+    # Prepare the document for Firebase
+    document_data = {
+        "company_name": company_name,
+        "data": company_data.get("data", {}),
+        "source": company_data.get("source", "Pitch Deck Analysis"),
+        "last_updated": datetime.now(timezone.utc),
+        "cache_age_days": 0,
+        "extraction_status": company_data.get("extraction_status", "completed"),
+        "created_at": firestore.SERVER_TIMESTAMP,
+    }
+    return doc_id, document_data
+
+
 @app.post("/save-company-from-pitch-deck")
 async def save_company_from_pitch_deck(company_data: dict = Body(...)):
     """
     Save company data extracted from pitch deck to Firebase companies collection.
     """
     try:
-        company_name = company_data.get("company_name", "Unknown Company")
-        doc_id = company_name.lower().replace(" ", "_")
-
-        # Prepare the document for Firebase
-        document_data = {
-            "company_name": company_name,
-            "data": company_data.get("data", {}),
-            "source": company_data.get("source", "Pitch Deck Analysis"),
-            "last_updated": datetime.now(timezone.utc),
-            "cache_age_days": 0,
-            "extraction_status": company_data.get("extraction_status", "completed"),
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
+        doc_id, document_data = _pitch_deck_company_document(company_data)
+        company_name = document_data["company_name"]
 
         # Save to companies collection
         companies_ref.document(doc_id).set(document_data)
@@ -947,6 +1002,47 @@ async def save_company_from_pitch_deck(company_data: dict = Body(...)):
         raise HTTPException(status_code=500, detail=f"Failed to save company: {str(e)}")
 
 
+@app.post("/save-companies-from-pitch-decks")
+async def save_companies_from_pitch_decks(payload: dict = Body(...)):
+    """
+    Save several companies extracted from pitch decks in batched Firestore commits.
+
+    Expects ``{"companies": [<same body as /save-company-from-pitch-deck>, ...]}`` and
+    returns the document id of each company, in request order. Writes are plain sets,
+    so retrying a batch is safe.
+    """
+    companies = payload.get("companies") or []
+    if not isinstance(companies, list):
+        raise HTTPException(status_code=400, detail="'companies' must be a list")
+
+    try:
+        # Two decks of the same company map to one document; the last one wins
+        documents = {}
+        document_ids = []
+        for company_data in companies:
+            doc_id, document_data = _pitch_deck_company_document(company_data)
+            documents[doc_id] = document_data
+            document_ids.append(doc_id)
+
+        items = list(documents.items())
+        for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for doc_id, document_data in items[start : start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(companies_ref.document(doc_id), document_data)
+            batch.commit()
+
+        logger.info(f"✅ Saved {len(documents)} companies from pitch decks to Firebase")
+
+        return {
+            "status": "success",
+            "message": f"Saved {len(documents)} companies to Firebase",
+            "document_ids": document_ids,
+        }
+    except Exception as e:
+        logger.error(f"❌ Error saving companies from pitch decks: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save companies: {str(e)}")
+
+
 # --- Run Server ---
 if __name__ == "__main__":
     import uvicorn
@@ -4,6 +4,7 @@ from research_agent.models import CompanyProfile
 from competitor_analysis_agent.models import (
     AllCompetitorsInfoWithScore,
 )
+from fact_check_agent.models import FactCheckReport
 
 
 class CompanyRequest(BaseModel):
@@ -17,6 +18,8 @@ class CompanyResponse(BaseModel):
     last_updated: str
     cache_age_days: int
     extraction_status: str
+    # agent name -> {"model", "model_tier", "degraded"} for the run that produced `data`
+    model_routing: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 class CompetitorResponse(BaseModel):
@@ -26,6 +29,12 @@ class CompetitorResponse(BaseModel):
     last_updated: str
     cache_age_days: int
     extraction_status: str
+    # agent name -> {"model", "model_tier", "degraded"} for the run that produced `data`
+    model_routing: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+class FactCheckResponse(FactCheckReport):
+    model_routing: Dict[str, Dict[str, Any]] = {}
 
 
 class CompanyListItem(BaseModel):
@@ -1,31 +1,22 @@
 # main.py
 import os
 import re
+import asyncio
 import io
 import json
 import time
 import functools
-import fitz  # PyMuPDF
-from PIL import Image
-from datetime import datetime
-import google.generativeai as genai
+import zipfile
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Dict
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from tempfile import NamedTemporaryFile
 import base64
-import tempfile
-from modules.transcript_analysis import analyze_transcript_with_ai
-from modules.pitch_deck_analysis import process_pitch_deck
-from modules.transcribe_generator import transcribe_audio_with_gemini
-from modules.video_transcribe import transcribe_video, SUPPORTED_VIDEO_EXTENSIONS
-from modules.company_data_extractor import extract_company_data_from_pitch_deck
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-import requests
+import httpx
 
 
 # ===============================
@@ -33,17 +24,52 @@ import requests
 # ===============================
 load_dotenv()
 
+# The analysis modules pull in the Gemini SDK, PyMuPDF/PIL and the media stack
+# (librosa, soundfile, yt_dlp). They are imported on first use, inside the worker
+# thread that runs them, so a cold start only pays for what the first request needs.
+# scripts/check_import_time.py enforces this at build time.
+#
+# The analysis functions block, so endpoints run them with run_blocking() on a
+# thread pool per path (see modules/executors.py) instead of on the event loop.
+from modules.executors import deferred, run_blocking
+from modules.agents_client import CircuitOpenError, close_agents_client, post_to_agents
+from modules.uploads import (
+    MAX_AUDIO_UPLOAD_BYTES,
+    MAX_PDF_UPLOAD_BYTES,
+    MAX_VIDEO_UPLOAD_BYTES,
+    MAX_ZIP_UPLOAD_BYTES,
+    max_request_bytes,
+    spool_upload,
+)
+from modules import batch_ingest
+from modules.company_index import schedule_company_sync, sync_agent_companies
+
+analyze_transcript_with_ai = deferred("modules.transcript_analysis:analyze_transcript_with_ai")
+transcribe_audio_with_gemini = deferred("modules.transcribe_generator:transcribe_audio_with_gemini")
+transcribe_video = deferred("modules.video_transcribe:transcribe_video")
+analyze_audio_single_pass = deferred("modules.audio_analysis:analyze_audio_single_pass")
+analyze_video_single_pass = deferred("modules.video_transcribe:analyze_video_single_pass")
+process_pitch_deck = deferred("modules.pitch_deck_analysis:process_pitch_deck")
+process_pitch_deck_events = deferred("modules.pitch_deck_analysis:process_pitch_deck_events")
+extract_company_data_from_pitch_deck = deferred(
+    "modules.company_data_extractor:extract_company_data_from_pitch_deck"
+)
+find_similar = deferred("modules.similarity:find_similar")
 
-def configure_gemini():
-    """Configures the Gemini API with the key from environment variables."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
-    genai.configure(api_key=api_key)
 
+# Audio and video analysis: transcribe, then analyze the transcript ("two_step"), or
+# both from one schema-constrained call on the audio ("single_pass")
+ANALYSIS_MODES = ("two_step", "single_pass")
+DEFAULT_ANALYSIS_MODE = os.getenv("AUDIO_ANALYSIS_MODE", "two_step")
 
-# Initialize Gemini at startup
-configure_gemini()
+
+def _analysis_mode(mode: str = None) -> str:
+    mode = mode or DEFAULT_ANALYSIS_MODE
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"mode must be one of: {', '.join(ANALYSIS_MODES)}"
+        )
+    return mode
 
 
 # ===============================
@@ -72,6 +98,24 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_agents_client()
+
+
+@app.middleware("http")
+async def reject_oversized_requests(request: Request, call_next):
+    # Refuse bodies that can't fit the route's upload limit before they are read
+    content_length = request.headers.get("content-length")
+    if (
+        content_length
+        and content_length.isdigit()
+        and int(content_length) > max_request_bytes(request.url.path)
+    ):
+        return JSONResponse(status_code=413, content={"detail": "Request body too large."})
+    return await call_next(request)
+
+
 @app.exception_handler(Exception)
 async def generic_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"detail": "Internal server error"})
@@ -87,7 +131,8 @@ def root():
 async def analyze_text(request: TranscriptRequest):
     if not request.transcript.strip():
         raise HTTPException(status_code=400, detail="Transcript cannot be empty.")
-    insights = analyze_transcript_with_ai(request.transcript)
+
+    insights = await run_blocking("text", analyze_transcript_with_ai, request.transcript)
     return JSONResponse(content=insights)
 
 
@@ -96,70 +141,185 @@ async def analyze_file(file: UploadFile = File(...)):
     if not file.filename.endswith(".txt"):
         raise HTTPException(status_code=400, detail="Only .txt files are supported.")
     content = (await file.read()).decode("utf-8")
-    insights = analyze_transcript_with_ai(content)
+
+    insights = await run_blocking("text", analyze_transcript_with_ai, content)
     return JSONResponse(content=insights)
 
 
 # --- Audio Transcript Endpoint ---
 @app.post("/analyze-audio/")
-async def analyze_audio(file: UploadFile = File(...)):
+async def analyze_audio(file: UploadFile = File(...), mode: str = Query(None)):
+    mode = _analysis_mode(mode)
     if not file.filename.lower().endswith((".wav", ".mp3", ".m4a", ".ogg")):
         raise HTTPException(
             status_code=400,
             detail="Only audio files (.wav, .mp3, .m4a, .ogg) are supported.",
         )
 
-    # Save to temp file
-    with NamedTemporaryFile(
-        delete=False, suffix=os.path.splitext(file.filename)[-1]
-    ) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+    # Stream to a unique temp file
+    tmp_path = await spool_upload(
+        file, MAX_AUDIO_UPLOAD_BYTES, suffix=os.path.splitext(file.filename)[-1]
+    )
 
     try:
-        transcript = transcribe_audio_with_gemini(tmp_path)
+        if mode == "single_pass":
+            transcript, insights, preprocessing_stats = await run_blocking(
+                "audio", analyze_audio_single_pass, tmp_path
+            )
+        else:
+            transcript, preprocessing_stats = await run_blocking(
+                "audio", transcribe_audio_with_gemini, tmp_path
+            )
         if not transcript or not transcript.strip():
             raise HTTPException(
                 status_code=500, detail="Transcription failed or returned empty text."
             )
 
-        insights = analyze_transcript_with_ai(transcript)
-        return JSONResponse(content={"transcript": transcript, "analysis": insights})
+        if mode != "single_pass":
+            insights = await run_blocking("audio", analyze_transcript_with_ai, transcript)
+        return JSONResponse(
+            content={
+                "transcript": transcript,
+                "analysis": insights,
+                "preprocessing": preprocessing_stats,
+            }
+        )
     finally:
         os.remove(tmp_path)
 
 
 @app.post("/analyze-pitch-deck/")
-async def analyze_pitch_deck(file: UploadFile = File(...)):
+async def analyze_pitch_deck(file: UploadFile = File(...), stream: bool = False):
+    """
+    Analyze a pitch deck. With ?stream=true the response is NDJSON: a "toc" event
+    after the first model call, a "topic" event as each topic finishes, then a
+    "complete" event with the full result (or an "error" event).
+    """
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only .pdf files are supported.")
 
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(await file.read())
+    temp_path = await spool_upload(file, MAX_PDF_UPLOAD_BYTES, suffix=".pdf")
+
+    if stream:
+        # Created in the worker so the module import stays off the event loop
+        events = await run_blocking(
+            "pitch_deck", process_pitch_deck_events, temp_path, file.filename
+        )
+        return StreamingResponse(
+            ndjson_stream(events, "pitch_deck", cleanup_path=temp_path),
+            media_type="application/x-ndjson",
+        )
 
     try:
-        result = process_pitch_deck(temp_path)
+        result = await run_blocking("pitch_deck", process_pitch_deck, temp_path, file.filename)
         return JSONResponse(content=result)
     finally:
         os.remove(temp_path)
 
 
+async def ndjson_stream(events, path: str, cleanup_path: str = None):
+    """Drive a blocking event generator on ``path``'s executor and emit NDJSON lines.
+
+    If the client disconnects, the step in flight is allowed to finish (a running
+    generator can't be closed) and the generator is then closed on the executor too,
+    so its cleanup never blocks the event loop.
+    """
+    step = None
+    try:
+        try:
+            while True:
+                step = asyncio.ensure_future(run_blocking(path, next, events, None))
+                event = await asyncio.shield(step)
+                if event is None:
+                    break
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+        finally:
+            if step is not None and not step.done():
+                await asyncio.gather(step, return_exceptions=True)
+            await run_blocking(path, events.close)
+    finally:
+        if cleanup_path and os.path.exists(cleanup_path):
+            os.remove(cleanup_path)
+
+
+@app.get("/similar")
+async def similar(
+    document_id: str = None,
+    text: str = None,
+    kind: str = Query(None, pattern="^(deck|deck_section|company)$"),
+    k: int = Query(10, ge=1, le=100),
+):
+    """
+    Find the analyzed decks, deck sections or companies most similar to an analyzed document
+    (document_id) or to a free-text description (text). No LLM call is made.
+    """
+    if bool(document_id) == bool(text):
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of document_id or text."
+        )
+
+    schedule_company_sync()
+    try:
+        results = await run_blocking(
+            "similar", find_similar, document_id=document_id, text=text, kind=kind, k=k
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return {"results": results}
+
+
+@app.post("/similar/sync-companies")
+async def similar_sync_companies():
+    """
+    Index the agents service's new or changed company profiles now (for a scheduler);
+    /similar also does this in the background at most every COMPANY_INDEX_SYNC_SECONDS.
+    """
+    try:
+        return await sync_agent_companies()
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (httpx.HTTPError, RuntimeError) as e:
+        raise HTTPException(status_code=502, detail=f"Company sync failed: {e}")
+
+
 SUPPORTED_VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi")
 
 
+async def _analyze_video_source(path_or_url: str, is_youtube: bool, mode: str) -> dict:
+    if mode == "single_pass":
+        transcript, analysis, extraction_stats = await run_blocking(
+            "video", analyze_video_single_pass, path_or_url, is_youtube=is_youtube
+        )
+        return {
+            "transcript": transcript,
+            "analysis": analysis,
+            "audio_extraction": extraction_stats,
+        }
+
+    transcript, extraction_stats = await run_blocking(
+        "video", transcribe_video, path_or_url, is_youtube=is_youtube
+    )
+    if not transcript or not transcript.strip():
+        raise HTTPException(status_code=500, detail="Transcription returned empty text.")
+    analysis = await run_blocking("video", analyze_transcript_with_ai, transcript)
+    return {
+        "transcript": transcript,
+        "analysis": analysis,
+        "audio_extraction": extraction_stats,
+    }
+
+
 @app.post("/analyze-video/")
-async def analyze_video(file: UploadFile = None, youtube_url: str = Form(None)):
+async def analyze_video(
+    file: UploadFile = None, youtube_url: str = Form(None), mode: str = Query(None)
+):
+    mode = _analysis_mode(mode)
     tmp_path = None
     try:
         if youtube_url:
-            transcript = transcribe_video(youtube_url, is_youtube=True)
-            if not transcript or not transcript.strip():
-                raise HTTPException(
-                    status_code=500, detail="Transcription returned empty text."
-                )
-            analysis = analyze_transcript_with_ai(transcript)
-            return {"transcript": transcript, "analysis": analysis}
+            return await _analyze_video_source(youtube_url, True, mode)
 
         elif file:
             ext = os.path.splitext(file.filename)[-1].lower()
@@ -168,17 +328,8 @@ async def analyze_video(file: UploadFile = None, youtube_url: str = Form(None)):
                     status_code=400, detail=f"Unsupported video format: {ext}"
                 )
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(await file.read())
-                tmp_path = tmp.name
-
-            transcript = transcribe_video(tmp_path, is_youtube=False)
-            if not transcript or not transcript.strip():
-                raise HTTPException(
-                    status_code=500, detail="Transcription returned empty text."
-                )
-            analysis = analyze_transcript_with_ai(transcript)
-            return {"transcript": transcript, "analysis": analysis}
+            tmp_path = await spool_upload(file, MAX_VIDEO_UPLOAD_BYTES, suffix=ext)
+            return await _analyze_video_source(tmp_path, False, mode)
 
         else:
             raise HTTPException(
@@ -186,6 +337,8 @@ async def analyze_video(file: UploadFile = None, youtube_url: str = Form(None)):
                 detail="Please upload a video or provide a YouTube link.",
             )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -202,37 +355,24 @@ async def extract_company_from_pitch_deck_endpoint(file: UploadFile = File(...))
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only .pdf files are supported.")
 
-    temp_path = f"temp_{file.filename}"
+    temp_path = None
     try:
-        # Save uploaded file temporarily
-        with open(temp_path, "wb") as f:
-            f.write(await file.read())
+        # Stream the upload to a unique temp file
+        temp_path = await spool_upload(file, MAX_PDF_UPLOAD_BYTES, suffix=".pdf")
 
         # Extract company data from pitch deck (returns just the data structure)
-        extracted_data = extract_company_data_from_pitch_deck(temp_path)
-
-        # Get company name from the extracted data
-        company_name = extracted_data.get("company_info", {}).get("company_name", "Unknown Company")
-
-        # Get the agents service URL
-        agents_service_url = os.getenv("AGENTS_SERVICE_URL", "http://localhost:8080")
+        extracted_data = await run_blocking(
+            "company", extract_company_data_from_pitch_deck, temp_path, file.filename
+        )
 
         # Prepare the complete document for saving to Firebase
-        company_document = {
-            "company_name": company_name,
-            "data": extracted_data,
-            "source": "Pitch Deck Analysis",
-            "last_updated": datetime.utcnow().isoformat(),
-            "cache_age_days": 0,
-            "extraction_status": "completed"
-        }
+        company_document = batch_ingest.company_document(extracted_data)
+        company_name = company_document["company_name"]
 
-        # Save to Firebase via agents service
+        # Save to Firebase via agents service (pooled client with retries and a circuit breaker)
         try:
-            save_response = requests.post(
-                f"{agents_service_url}/save-company-from-pitch-deck",
-                json=company_document,
-                timeout=30
+            save_response = await post_to_agents(
+                "/save-company-from-pitch-deck", json=company_document
             )
 
             if save_response.status_code == 200:
@@ -247,21 +387,75 @@ async def extract_company_from_pitch_deck_endpoint(file: UploadFile = File(...))
                     status_code=500,
                     detail=f"Failed to save to Firebase: {save_response.text}"
                 )
-        except requests.exceptions.RequestException as e:
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPError as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to connect to agents service: {str(e)}"
             )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
     finally:
-        if os.path.exists(temp_path):
+        if temp_path and os.path.exists(temp_path):
             os.remove(temp_path)
 
 
+@app.post("/batch-extract-companies/", status_code=202)
+async def batch_extract_companies_endpoint(
+    file: UploadFile = File(None),
+    storage_paths: List[str] = Form(None),
+):
+    """
+    Extract companies from a batch of pitch decks and save them to Firebase.
+
+    Send either a .zip of PDFs as ``file`` or one or more ``storage_paths``
+    (gs://bucket/object.pdf). Decks are processed in the background; poll
+    GET /batch-extract-companies/{job_id} for per-deck progress and failures.
+    """
+    if (file is None) == (not storage_paths):
+        raise HTTPException(status_code=400, detail="Send either a .zip file or storage_paths.")
+    if file is not None and not file.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Only .zip archives are supported.")
+
+    job = batch_ingest.new_job()
+    zip_path = None
+    try:
+        if file is not None:
+            zip_path = await spool_upload(file, MAX_ZIP_UPLOAD_BYTES, suffix=".zip")
+            job.decks = await run_blocking(
+                "batch_unpack", batch_ingest.unpack_deck_archive, zip_path, job.work_dir
+            )
+        else:
+            job.decks = batch_ingest.storage_path_decks(storage_paths)
+    except HTTPException:
+        batch_ingest.discard_job(job)
+        raise
+    except (ValueError, zipfile.BadZipFile) as e:
+        batch_ingest.discard_job(job)
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if zip_path and os.path.exists(zip_path):
+            os.remove(zip_path)
+
+    batch_ingest.start_job(job)
+    return job.snapshot()
+
+
+@app.get("/batch-extract-companies/{job_id}")
+async def batch_extract_companies_status(job_id: str):
+    """Progress of a batch extraction: counts per state and each deck's status or error."""
+    job = batch_ingest.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job.")
+    return job.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# Settings
+# ===============================
+AGENTS_SERVICE_URL = os.getenv("AGENTS_SERVICE_URL", "http://localhost:8080")
+AGENTS_TIMEOUT_SECONDS = float(os.getenv("AGENTS_TIMEOUT_SECONDS", "30"))
+AGENTS_MAX_RETRIES = int(os.getenv("AGENTS_MAX_RETRIES", "3"))
+AGENTS_MAX_CONNECTIONS = int(os.getenv("AGENTS_MAX_CONNECTIONS", "20"))
+# Consecutive failures that open the circuit, and how long it stays open
+AGENTS_BREAKER_FAILURES = int(os.getenv("AGENTS_BREAKER_FAILURES", "5"))
+AGENTS_BREAKER_RESET_SECONDS = float(os.getenv("AGENTS_BREAKER_RESET_SECONDS", "30"))
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """The agents service failed repeatedly; calls are refused until the reset timeout."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures, then lets one trial call
+    through every ``reset_seconds`` (half-open) until a call succeeds."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def before_call(self):
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            raise CircuitOpenError("Agents service is unavailable (circuit open)")
+        # Half-open: allow this call; the next failure re-opens the circuit
+        self.opened_at = time.monotonic()
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Agents service circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Agents service circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+
+# ===============================
+# Shared client
+# ===============================
+_client: Optional[httpx.AsyncClient] = None
+_breaker = CircuitBreaker(AGENTS_BREAKER_FAILURES, AGENTS_BREAKER_RESET_SECONDS)
+
+
+def get_agents_client() -> httpx.AsyncClient:
+    """Process-wide keep-alive client for the agents service (used from the event loop)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=AGENTS_SERVICE_URL,
+            timeout=AGENTS_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=AGENTS_MAX_CONNECTIONS,
+                max_keepalive_connections=AGENTS_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_agents_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def post_to_agents(path: str, **kwargs) -> httpx.Response:
+    """POST to the agents service, retrying transient failures with exponential backoff.
+
+    Only use for idempotent endpoints. Raises ``CircuitOpenError`` without calling
+    the service while the circuit is open, and ``httpx.HTTPError`` if every attempt
+    fails at the transport level.
+    """
+    return await _request_agents("POST", path, **kwargs)
+
+
+async def get_from_agents(path: str, **kwargs) -> httpx.Response:
+    """GET from the agents service, with the retries and circuit of ``post_to_agents``."""
+    return await _request_agents("GET", path, **kwargs)
+
+
+async def _request_agents(method: str, path: str, **kwargs) -> httpx.Response:
+    _breaker.before_call()
+    client = get_agents_client()
+    for attempt in range(AGENTS_MAX_RETRIES + 1):
+        last_attempt = attempt == AGENTS_MAX_RETRIES
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            if last_attempt:
+                _breaker.record_failure()
+                raise
+            logger.warning(f"Agents service {path} failed ({e!r}), retrying")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                if response.status_code >= 500:
+                    _breaker.record_failure()
+                else:
+                    _breaker.record_success()
+                return response
+            logger.warning(f"Agents service {path} returned {response.status_code}, retrying")
+        await asyncio.sleep(0.5 * 2**attempt * (1 + random.random()))
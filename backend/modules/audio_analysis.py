@@ -0,0 +1,147 @@
+import os
+import logging
+import time
+from contextlib import contextmanager
+from typing import List
+import google.generativeai as genai
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from senseai_common.gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_calls import generate_content
+from senseai_common.gemini_schema import response_schema
+from modules.audio_segmenter import (
+    AUDIO_PREPROCESS,
+    MAX_SEGMENT_SECONDS,
+    SAMPLE_RATE,
+    audio_frames,
+    audio_mime_type,
+    mono_16k,
+    preprocess_audio,
+)
+from modules.transcribe_generator import transcribe_audio_with_gemini, transcribe_file
+from modules.transcript_analysis import analyze_transcript_with_ai
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Longer (preprocessed) recordings fall back to the two-step path: the transcript
+# and analysis of one response must fit the model's output token limit. By default
+# this is the transcription segment cap, the length one transcription call handles.
+SINGLE_PASS_MAX_SECONDS = float(os.getenv("SINGLE_PASS_MAX_SECONDS") or MAX_SEGMENT_SECONDS)
+
+
+# ===============================
+# Response schema
+# ===============================
+# Same fields as analyze_transcript_with_ai asks for, so both modes return the same shape
+class Funding(BaseModel):
+    raised: str = Field(description="Amount raised so far", default="")
+    seeking: str = Field(description="Amount the startup is raising", default="")
+
+
+class Market(BaseModel):
+    size: str = Field(description="Market size", default="")
+    traction: str = Field(description="Traction: users, revenue, growth", default="")
+
+
+class StartupAnalysis(BaseModel):
+    startup_name: str = Field(description="The name of the startup", default="")
+    summary: str = Field(description="Key insights of the talk", default="")
+    founders: str = Field(description="Information about the founders", default="")
+    problem_statement: str = Field(description="The problem the startup is solving", default="")
+    solution: str = Field(description="The solution they offer", default="")
+    funding: Funding = Field(description="Funding raised and sought", default_factory=Funding)
+    market: Market = Field(description="Market size and traction", default_factory=Market)
+    risks: List[str] = Field(description="Potential risks or challenges mentioned or implied", default=[])
+    key_insights: List[str] = Field(description="Unique advantages or important takeaways", default=[])
+
+
+class AudioPitchAnalysis(BaseModel):
+    """Transcript and analysis of a pitch recording, from one model call."""
+
+    transcript: str = Field(description="Verbatim transcript of everything spoken")
+    startups: List[StartupAnalysis] = Field(description="One entry per startup that pitches", default=[])
+
+
+PROMPT = """
+You are an expert transcriptionist and AI analyst. Listen to this recording of a startup pitch.
+- transcript: transcribe exactly what is spoken, with no extra commentary.
+- startups: for each startup that pitches, extract its name, a summary, the founders,
+  the problem statement, the solution, funding (raised and seeking), market (size and
+  traction), risks mentioned or implied, and key insights.
+Base the analysis only on what is said in the recording.
+"""
+
+
+@contextmanager
+def _single_pass_audio(audio_path: str):
+    """Path, MIME type, duration in seconds and stats of the audio sent in one call.
+
+    With AUDIO_PREPROCESS=false the recording is sent as it is, like two-step
+    transcription does, and only decoded to FLAC if Gemini doesn't accept its format.
+    """
+    if AUDIO_PREPROCESS:
+        with preprocess_audio(audio_path) as (path, stats):
+            yield path, "audio/flac", stats["processed_seconds"], stats
+        return
+
+    stats = {"preprocessed": False}
+    mime_type = audio_mime_type(audio_path)
+    if mime_type:
+        import librosa
+
+        yield audio_path, mime_type, librosa.get_duration(path=audio_path), stats
+        return
+    with mono_16k(audio_path) as path:
+        yield path, "audio/flac", audio_frames(path) / SAMPLE_RATE, stats
+
+
+def _two_step(path: str, stats: dict, reason: str):
+    logger.info(f"{reason}, using two steps")
+    if AUDIO_PREPROCESS:
+        transcript = transcribe_file(path)  # already preprocessed
+    else:
+        transcript, _ = transcribe_audio_with_gemini(path)
+    return transcript, analyze_transcript_with_ai(transcript), {**stats, "mode": "two_step"}
+
+
+def analyze_audio_single_pass(audio_path: str):
+    """Transcribe and analyze an audio file with one schema-constrained Gemini call.
+
+    Returns the transcript, the analysis (a list of startups, as from
+    ``analyze_transcript_with_ai``) and the preprocessing stats with the mode used.
+    Audio is preprocessed unless AUDIO_PREPROCESS=false, as for transcription.
+    Recordings longer than SINGLE_PASS_MAX_SECONDS (after preprocessing), and
+    responses that don't parse (e.g. cut off at the output token limit), go through
+    transcription and transcript analysis instead.
+    """
+    with _single_pass_audio(audio_path) as (path, mime_type, seconds, stats):
+        if seconds > SINGLE_PASS_MAX_SECONDS:
+            return _two_step(
+                path, stats, f"{seconds:.0f}s of audio exceeds the single-pass limit"
+            )
+
+        model = genai.GenerativeModel(
+            GEMINI_SMALL,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": response_schema(AudioPitchAnalysis),
+            },
+        )
+        with open(path, "rb") as f:
+            audio_part = {"mime_type": mime_type, "data": f.read()}
+
+        started = time.perf_counter()
+        response = generate_content(model, [PROMPT, audio_part])
+        logger.info(f"Single-pass audio analysis took {time.perf_counter() - started:.1f}s")
+
+        try:
+            # ValidationError is a ValueError; so is .text on a response without text
+            result = AudioPitchAnalysis.model_validate_json(response.text)
+        except ValueError as e:
+            return _two_step(path, stats, f"Single-pass response did not parse ({str(e)[:200]})")
+
+    analysis = [startup.model_dump() for startup in result.startups]
+    return result.transcript.strip(), analysis, {**stats, "mode": "single_pass"}
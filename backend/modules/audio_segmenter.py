@@ -0,0 +1,413 @@
+import io
+import os
+import re
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+# ===============================
+# Settings
+# ===============================
+SAMPLE_RATE = 16000  # speech models gain nothing from higher rates
+# Target segment length; cuts are placed at the silence closest to it
+SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "300"))
+# Hard upper bound on a segment when no silence is found
+MAX_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_MAX_SEGMENT_SECONDS", "360"))
+# Audio repeated at the start of each segment so no word is lost at a cut
+OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "2"))
+# Anything this far below the peak counts as silence
+SILENCE_TOP_DB = float(os.getenv("TRANSCRIBE_SILENCE_TOP_DB", "35"))
+# Longest duplicated word run removed where two segment transcripts meet
+OVERLAP_MAX_WORDS = 40
+
+# Preprocessing before transcription (Gemini audio cost and latency scale with duration)
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "true").lower() == "true"
+# RMS energy is measured over frames of this length
+TRIM_FRAME_SECONDS = 0.02
+# Frames this far below the loudest frame count as silence
+TRIM_TOP_DB = float(os.getenv("AUDIO_TRIM_TOP_DB", "40"))
+# Silences at least this long are cut down to AUDIO_TRIM_KEEP_SILENCE_SECONDS, so
+# pauses between speakers and sentences survive as short gaps
+TRIM_MIN_SILENCE_SECONDS = float(os.getenv("AUDIO_TRIM_MIN_SILENCE_SECONDS", "1.0"))
+TRIM_KEEP_SILENCE_SECONDS = float(os.getenv("AUDIO_TRIM_KEEP_SILENCE_SECONDS", "0.3"))
+# Optional speed-up after trimming; 1.0 disables it, values are capped at 1.25
+TEMPO_RATE = min(float(os.getenv("AUDIO_TEMPO_RATE", "1.0")), 1.25)
+
+# Audio files are read in blocks of this length, so memory stays flat however long
+# the recording is
+BLOCK_SECONDS = 30
+# Upper bound on one ffmpeg run
+FFMPEG_TIMEOUT_SECONDS = int(os.getenv("FFMPEG_TIMEOUT_SECONDS", "900"))
+
+# MIME types Gemini accepts for audio, by file extension
+AUDIO_MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mp3",
+    ".aiff": "audio/aiff",
+    ".aac": "audio/aac",
+    ".ogg": "audio/ogg",
+    ".flac": "audio/flac",
+}
+
+
+def audio_mime_type(path: str) -> Optional[str]:
+    """Gemini MIME type of an audio file, or None if it must be re-encoded first (e.g. .m4a)."""
+    return AUDIO_MIME_TYPES.get(os.path.splitext(path)[-1].lower())
+
+
+@dataclass
+class AudioSegment:
+    index: int
+    start: int  # sample offsets in ``path``, including the leading overlap
+    end: int
+    path: str  # 16 kHz mono file the segment is cut from
+    mime_type: str = "audio/flac"
+
+    def as_part(self):
+        """Inline part with the segment encoded as FLAC, read from ``path`` only now.
+
+        Segments are encoded when they are sent, so at most one segment per
+        concurrent request is held in memory.
+        """
+        blocks = list(read_blocks(self.path, self.end - self.start, self.start, self.end))
+        samples = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+        return {"mime_type": self.mime_type, "data": encode_flac(samples)}
+
+
+# ===============================
+# Decoding
+# ===============================
+def run_ffmpeg(source: str, target: str, *options: str):
+    """Decode ``source`` with ffmpeg to a 16 kHz mono FLAC file at ``target``.
+
+    ffmpeg decodes and encodes in small frames, so memory stays flat however long
+    the input is. Raises FileNotFoundError when ffmpeg is not installed.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", source,
+        "-vn", *options, "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-c:a", "flac",
+        "-y", target,
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS)
+
+
+def _temp_flac() -> str:
+    fd, path = tempfile.mkstemp(suffix=".flac")
+    os.close(fd)
+    return path
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _is_mono_16k(path: str) -> bool:
+    import soundfile as sf
+
+    try:
+        info = sf.info(path)
+    except Exception:  # a format libsndfile can't read, e.g. mp3 on older builds or m4a
+        return False
+    return info.samplerate == SAMPLE_RATE and info.channels == 1
+
+
+@contextmanager
+def mono_16k(audio_path: str) -> Iterator[str]:
+    """Path of ``audio_path`` as 16 kHz mono audio, decoded to a temporary FLAC if needed.
+
+    Files that already are 16 kHz mono (e.g. audio extracted from videos) are used
+    as they are. Others go through ffmpeg; without ffmpeg, librosa decodes the whole
+    file in memory instead.
+    """
+    if _is_mono_16k(audio_path):
+        yield audio_path
+        return
+
+    path = _temp_flac()
+    try:
+        try:
+            run_ffmpeg(audio_path, path)
+        except FileNotFoundError:
+            import librosa
+            import soundfile as sf
+
+            samples, sample_rate = librosa.load(audio_path, sr=SAMPLE_RATE, mono=True)
+            sf.write(path, samples, sample_rate, format="FLAC")
+        yield path
+    finally:
+        _remove(path)
+
+
+def read_blocks(
+    path: str, block_length: int, start: int = 0, stop: Optional[int] = None
+) -> Iterator[np.ndarray]:
+    """Mono float32 samples ``[start, stop)`` of ``path``, ``block_length`` at a time."""
+    import soundfile as sf
+
+    with sf.SoundFile(path) as f:
+        stop = f.frames if stop is None else min(stop, f.frames)
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            block = f.read(min(block_length, remaining), dtype="float32")
+            if not len(block):
+                break
+            remaining -= len(block)
+            yield block
+
+
+def audio_frames(path: str) -> int:
+    """Length of an audio file in samples, from its header."""
+    import soundfile as sf
+
+    return sf.info(path).frames
+
+
+# ===============================
+# Preprocessing
+# ===============================
+def frame_rms_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """RMS level in dB of each full, non-overlapping frame of ``samples``."""
+    frames = samples[: len(samples) // frame_length * frame_length].reshape(-1, frame_length)
+    # einsum sums the squares without materializing a squared copy of the audio
+    mean_square = np.einsum("ij,ij->i", frames, frames) / frame_length
+    return 10 * np.log10(np.maximum(mean_square, 1e-20))
+
+
+def file_rms_db(path: str, frame_length: int) -> np.ndarray:
+    """``frame_rms_db`` of a whole file, computed block by block."""
+    block_length = frame_length * max(1, int(BLOCK_SECONDS * SAMPLE_RATE) // frame_length)
+    levels = [frame_rms_db(block, frame_length) for block in read_blocks(path, block_length)]
+    return np.concatenate(levels) if levels else np.zeros(0)
+
+
+def _runs(flags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Runs of True in ``flags`` as ``[start, end)`` index arrays."""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def silence_cuts(
+    levels: np.ndarray,
+    top_db: float = TRIM_TOP_DB,
+    min_silence_seconds: float = TRIM_MIN_SILENCE_SECONDS,
+    keep_silence_seconds: float = TRIM_KEEP_SILENCE_SECONDS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Frame ranges ``[start, end)`` to cut so long silences shrink to ``keep_silence_seconds``.
+
+    A frame is silent when its RMS level is ``top_db`` or more below the loudest
+    frame. Half of the kept silence stays at each end of a cut, so speech onsets and
+    decays are untouched.
+    """
+    if levels.size == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    starts, ends = _runs(levels < levels.max() - top_db)
+    long_runs = (ends - starts) * TRIM_FRAME_SECONDS >= min_silence_seconds
+    keep_half = int(keep_silence_seconds / TRIM_FRAME_SECONDS) // 2
+    cut_starts, cut_ends = starts[long_runs] + keep_half, ends[long_runs] - keep_half
+    return cut_starts[cut_ends > cut_starts], cut_ends[cut_ends > cut_starts]
+
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    top_db: float = TRIM_TOP_DB,
+    min_silence_seconds: float = TRIM_MIN_SILENCE_SECONDS,
+    keep_silence_seconds: float = TRIM_KEEP_SILENCE_SECONDS,
+) -> np.ndarray:
+    """Shorten every silence of at least ``min_silence_seconds`` (see ``silence_cuts``)."""
+    frame_length = int(TRIM_FRAME_SECONDS * sample_rate)
+    levels = frame_rms_db(samples, frame_length)
+    cut_starts, cut_ends = silence_cuts(levels, top_db, min_silence_seconds, keep_silence_seconds)
+    if cut_starts.size == 0:
+        return samples
+
+    # Mark the cut frames, then expand to samples (the partial last frame is kept)
+    delta = np.zeros(levels.size + 1, dtype=np.int32)
+    np.add.at(delta, cut_starts, 1)
+    np.add.at(delta, cut_ends, -1)
+    keep = np.cumsum(delta[:-1]) == 0
+    keep = np.concatenate(
+        (np.repeat(keep, frame_length), np.ones(len(samples) - keep.size * frame_length, bool))
+    )
+    return samples[keep]
+
+
+def trim_silence_file(source: str, target: str) -> int:
+    """``trim_silence`` from one 16 kHz mono file into a FLAC file, streamed.
+
+    The first pass reads the file block by block for frame levels (50 floats per
+    second of audio); the second copies the kept ranges to ``target``. Returns the
+    number of samples written.
+    """
+    import soundfile as sf
+
+    frame_length = int(TRIM_FRAME_SECONDS * SAMPLE_RATE)
+    cut_starts, cut_ends = silence_cuts(file_rms_db(source, frame_length))
+    kept_starts = np.concatenate(([0], cut_ends * frame_length))
+    kept_ends = np.concatenate((cut_starts * frame_length, [audio_frames(source)]))
+
+    block_length = int(BLOCK_SECONDS * SAMPLE_RATE)
+    written = 0
+    with sf.SoundFile(target, "w", SAMPLE_RATE, 1, format="FLAC") as out:
+        for start, end in zip(kept_starts, kept_ends):
+            for block in read_blocks(source, block_length, int(start), int(end)):
+                out.write(block)
+                written += len(block)
+    return written
+
+
+def change_tempo(source: str, target: str, rate: float = TEMPO_RATE):
+    """Speed up ``source`` by ``rate`` into a FLAC file, keeping the pitch.
+
+    Uses ffmpeg's streaming ``atempo`` filter; without ffmpeg, librosa stretches
+    the whole (already trimmed) audio in memory.
+    """
+    try:
+        run_ffmpeg(source, target, "-filter:a", f"atempo={rate}")
+    except FileNotFoundError:
+        import librosa
+        import soundfile as sf
+
+        samples, _ = sf.read(source, dtype="float32")
+        samples = librosa.effects.time_stretch(samples, rate=rate)
+        sf.write(target, samples, SAMPLE_RATE, format="FLAC")
+
+
+@contextmanager
+def preprocess_audio(audio_path: str) -> Iterator[Tuple[str, dict]]:
+    """Convert audio to 16 kHz mono FLAC, cut long silences and optionally speed it up.
+
+    Yields the path of the processed file, which is removed on exit, and stats on
+    how much audio was removed. Nothing holds the whole recording in memory:
+    decoding and tempo go through ffmpeg, and silence trimming reads blocks.
+    """
+    trimmed_path, tempo_path = _temp_flac(), None
+    try:
+        with mono_16k(audio_path) as source:
+            original = audio_frames(source)
+            trimmed = trim_silence_file(source, trimmed_path)
+
+        processed_path = trimmed_path
+        if TEMPO_RATE > 1.0:
+            tempo_path = processed_path = _temp_flac()
+            change_tempo(trimmed_path, tempo_path)
+
+        original_seconds = original / SAMPLE_RATE
+        processed_seconds = audio_frames(processed_path) / SAMPLE_RATE
+        stats = {
+            "original_seconds": round(original_seconds, 1),
+            "processed_seconds": round(processed_seconds, 1),
+            "silence_trimmed_seconds": round(original_seconds - trimmed / SAMPLE_RATE, 1),
+            "tempo_rate": TEMPO_RATE,
+            "seconds_saved": round(original_seconds - processed_seconds, 1),
+        }
+        yield processed_path, stats
+    finally:
+        _remove(trimmed_path)
+        if tempo_path:
+            _remove(tempo_path)
+
+
+def encode_flac(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    import soundfile as sf
+
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="FLAC")
+    return buffer.getvalue()
+
+
+# ===============================
+# Segmentation
+# ===============================
+def plan_cuts(
+    voiced: np.ndarray,
+    total_samples: int,
+    sample_rate: int = SAMPLE_RATE,
+    target_seconds: float = SEGMENT_SECONDS,
+    max_seconds: float = MAX_SEGMENT_SECONDS,
+) -> List[int]:
+    """Sample offsets at which to cut, given the voiced ``[start, end)`` intervals.
+
+    Each cut is the middle of the silence gap closest to ``target_seconds`` after the
+    previous cut, as long as the segment stays within ``max_seconds``; without such a
+    gap the audio is cut hard at ``max_seconds``.
+    """
+    target = int(target_seconds * sample_rate)
+    limit = int(max_seconds * sample_rate)
+    # Candidate cut points: middles of the gaps between voiced intervals
+    gaps = [(voiced[i][1] + voiced[i + 1][0]) // 2 for i in range(len(voiced) - 1)]
+    candidates = np.asarray(gaps, dtype=np.int64)
+
+    cuts, start = [], 0
+    while total_samples - start > limit:
+        window = candidates[(candidates > start + target // 2) & (candidates <= start + limit)]
+        if window.size:
+            cut = int(window[np.argmin(np.abs(window - (start + target)))])
+        else:
+            cut = start + limit
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+def voiced_intervals(levels: np.ndarray, frame_length: int, top_db: float = SILENCE_TOP_DB) -> np.ndarray:
+    """Voiced ``[start, end)`` sample intervals: frames within ``top_db`` of the peak."""
+    if levels.size == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    starts, ends = _runs(levels >= levels.max() - top_db)
+    return np.stack((starts, ends), axis=1) * frame_length
+
+
+def segment_file(path: str) -> List[AudioSegment]:
+    """Split a 16 kHz mono file at silences into bounded-length segments.
+
+    Only frame levels are computed here; each segment's audio is read and encoded
+    when it is sent (see ``AudioSegment.as_part``), so ``path`` must outlive them.
+    """
+    frame_length = int(TRIM_FRAME_SECONDS * SAMPLE_RATE)
+    total = audio_frames(path)
+    voiced = voiced_intervals(file_rms_db(path, frame_length), frame_length)
+    cuts = plan_cuts(voiced, total)
+
+    overlap = int(OVERLAP_SECONDS * SAMPLE_RATE)
+    bounds = zip([0] + cuts, cuts + [total])
+    return [
+        AudioSegment(index=index, start=max(0, start - overlap) if index else 0, end=end, path=path)
+        for index, (start, end) in enumerate(bounds)
+    ]
+
+
+# ===============================
+# Stitching
+# ===============================
+def _normalize_word(word: str) -> str:
+    return re.sub(r"\W", "", word.lower())
+
+
+def stitch_transcripts(transcripts: List[str]) -> str:
+    """Join segment transcripts in order, dropping words repeated across the overlap."""
+    parts: List[str] = []
+    previous_words: List[str] = []
+    for transcript in transcripts:
+        # Words at even positions, the whitespace between them at odd positions
+        tokens = re.split(r"(\s+)", transcript.strip())
+        words = tokens[::2]
+        tail = [_normalize_word(w) for w in previous_words[-OVERLAP_MAX_WORDS:]]
+        head = [_normalize_word(w) for w in words[:OVERLAP_MAX_WORDS]]
+        # Longest run of at least two words ending the previous text and starting this one
+        for n in range(min(len(tail), len(head)), 1, -1):
+            if tail[-n:] == head[:n]:
+                tokens = tokens[2 * n :]
+                break
+        text = "".join(tokens).strip()
+        if text:
+            parts.append(text)
+            previous_words = text.split()
+    return "\n".join(parts)
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from modules.agents_client import post_to_agents
+from modules.executors import deferred, run_blocking
+from modules.uploads import MAX_PDF_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES
+
+logger = logging.getLogger(__name__)
+
+extract_company_data_from_pitch_deck = deferred(
+    "modules.company_data_extractor:extract_company_data_from_pitch_deck"
+)
+
+# ===============================
+# Settings
+# ===============================
+# Decks are extracted on the "batch" executor (see modules/executors.py), whose size
+# bounds how many decks of all running jobs are in flight at once. Extracted
+# companies are saved through the agents service in groups of BATCH_SAVE_SIZE, each
+# written as batched Firestore commits.
+BATCH_MAX_DECKS = int(os.getenv("BATCH_MAX_DECKS", "200"))
+BATCH_SAVE_SIZE = int(os.getenv("BATCH_SAVE_SIZE", "25"))
+# Finished jobs are kept this long for polling
+BATCH_JOB_TTL_SECONDS = int(os.getenv("BATCH_JOB_TTL_SECONDS", "86400"))
+
+# Deck states
+QUEUED = "queued"
+EXTRACTING = "extracting"
+SAVING = "saving"
+SAVED = "saved"
+FAILED = "failed"
+
+
+@dataclass
+class DeckProgress:
+    name: str
+    source: str  # local path of an extracted archive member, or a gs:// URI
+    status: str = QUEUED
+    company_name: Optional[str] = None
+    document_id: Optional[str] = None
+    error: Optional[str] = None
+    seconds: Optional[float] = None
+
+
+@dataclass
+class BatchJob:
+    job_id: str
+    decks: List[DeckProgress]
+    work_dir: str
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    finished_at: Optional[str] = None
+    finished_monotonic: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        return "running" if any(deck.status != QUEUED for deck in self.decks) else "queued"
+
+    def snapshot(self) -> dict:
+        counts = {state: 0 for state in (QUEUED, EXTRACTING, SAVING, SAVED, FAILED)}
+        for deck in self.decks:
+            counts[deck.status] += 1
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "total": len(self.decks),
+            "counts": counts,
+            "decks": [
+                {key: value for key, value in asdict(deck).items() if key != "source"}
+                for deck in self.decks
+            ],
+        }
+
+
+# ===============================
+# Inputs
+# ===============================
+def unpack_deck_archive(zip_path: str, work_dir: str) -> List[DeckProgress]:
+    """Extract the PDFs of a zip archive into ``work_dir``, one deck per PDF.
+
+    Members are written under generated names (never the archive's paths), and each
+    member's declared and actual size is held to the single-upload PDF limit.
+    """
+    decks = []
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(".pdf")
+            and not os.path.basename(info.filename).startswith(".")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        if len(members) > BATCH_MAX_DECKS:
+            raise ValueError(f"Archive has {len(members)} decks; the limit is {BATCH_MAX_DECKS}.")
+        for index, info in enumerate(members):
+            name = os.path.basename(info.filename)
+            if info.file_size > MAX_PDF_UPLOAD_BYTES:
+                decks.append(DeckProgress(name, "", status=FAILED, error="Deck exceeds the PDF size limit."))
+                continue
+            path = os.path.join(work_dir, f"{index:04d}.pdf")
+            written = 0
+            with archive.open(info) as src, open(path, "wb") as dst:
+                # Stops at the limit even if the header understates the size
+                while chunk := src.read(UPLOAD_CHUNK_BYTES):
+                    written += len(chunk)
+                    if written > MAX_PDF_UPLOAD_BYTES:
+                        break
+                    dst.write(chunk)
+            if written > MAX_PDF_UPLOAD_BYTES:
+                os.remove(path)
+                decks.append(DeckProgress(name, "", status=FAILED, error="Deck exceeds the PDF size limit."))
+                continue
+            decks.append(DeckProgress(name, path))
+    if not decks:
+        raise ValueError("Archive contains no .pdf files.")
+    return decks
+
+
+def storage_path_decks(storage_paths: List[str]) -> List[DeckProgress]:
+    """One deck per ``gs://bucket/object.pdf`` path."""
+    paths = [path.strip() for path in storage_paths if path and path.strip()]
+    if not paths:
+        raise ValueError("No storage paths given.")
+    if len(paths) > BATCH_MAX_DECKS:
+        raise ValueError(f"{len(paths)} storage paths given; the limit is {BATCH_MAX_DECKS}.")
+    invalid = [path for path in paths if not path.startswith("gs://") or "/" not in path[5:]]
+    if invalid:
+        raise ValueError(f"Storage paths must look like gs://bucket/object: {invalid[:3]}")
+    return [DeckProgress(path.rsplit("/", 1)[-1], path) for path in paths]
+
+
+def _download_storage_path(uri: str, path: str):
+    from google.cloud import storage
+
+    bucket_name, _, object_name = uri[5:].partition("/")
+    blob = storage.Client().bucket(bucket_name).blob(object_name)
+    blob.reload()
+    if blob.size is not None and blob.size > MAX_PDF_UPLOAD_BYTES:
+        raise ValueError("Deck exceeds the PDF size limit.")
+    blob.download_to_filename(path)
+
+
+def _extract_deck(deck: DeckProgress, work_dir: str, index: int) -> dict:
+    """Fetch (if remote) and extract one deck; runs on the batch executor."""
+    path = deck.source
+    if path.startswith("gs://"):
+        path = os.path.join(work_dir, f"{index:04d}.pdf")
+        _download_storage_path(deck.source, path)
+    try:
+        return extract_company_data_from_pitch_deck(path, deck.name)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def company_document(extracted_data: dict) -> dict:
+    """Body of the agents service's save-company endpoints for an extracted profile."""
+    return {
+        "company_name": extracted_data.get("company_info", {}).get("company_name", "Unknown Company"),
+        "data": extracted_data,
+        "source": "Pitch Deck Analysis",
+        "last_updated": datetime.utcnow().isoformat(),
+        "cache_age_days": 0,
+        "extraction_status": "completed",
+    }
+
+
+# ===============================
+# Jobs
+# ===============================
+# Jobs live in this process: poll the instance that accepted the batch.
+_jobs: Dict[str, BatchJob] = {}
+_tasks = set()
+
+
+def _prune_jobs():
+    now = time.monotonic()
+    for job_id, job in list(_jobs.items()):
+        if job.finished_monotonic is not None and now - job.finished_monotonic > BATCH_JOB_TTL_SECONDS:
+            del _jobs[job_id]
+
+
+def new_job() -> BatchJob:
+    _prune_jobs()
+    job = BatchJob(uuid.uuid4().hex, [], tempfile.mkdtemp(prefix="batch_"))
+    _jobs[job.job_id] = job
+    return job
+
+
+def get_job(job_id: str) -> Optional[BatchJob]:
+    return _jobs.get(job_id)
+
+
+def discard_job(job: BatchJob):
+    _jobs.pop(job.job_id, None)
+    shutil.rmtree(job.work_dir, ignore_errors=True)
+
+
+async def _save(entries: List[tuple]):
+    """Save ``(deck, document)`` pairs with one agents-service call."""
+    for deck, _ in entries:
+        deck.status = SAVING
+    try:
+        response = await post_to_agents(
+            "/save-companies-from-pitch-decks",
+            json={"companies": [document for _, document in entries]},
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Agents service returned {response.status_code}: {response.text[:200]}")
+        document_ids = response.json().get("document_ids", [])
+    except Exception as e:
+        logger.error(f"Batch save of {len(entries)} companies failed: {e}")
+        for deck, _ in entries:
+            deck.status, deck.error = FAILED, f"Save failed: {e}"
+        return
+    for index, (deck, _) in enumerate(entries):
+        if index < len(document_ids) and document_ids[index]:
+            deck.status, deck.document_id = SAVED, document_ids[index]
+        else:
+            deck.status, deck.error = FAILED, "Save failed: no document id returned."
+    if len(document_ids) < len(entries):
+        logger.error(
+            f"Batch save returned {len(document_ids)} document ids for {len(entries)} companies"
+        )
+
+
+async def run_job(job: BatchJob):
+    """Extract every queued deck of ``job`` and save the companies in groups."""
+    pending: List[tuple] = []
+    saves = []
+
+    async def process(index: int, deck: DeckProgress):
+        deck.status = EXTRACTING
+        started = time.perf_counter()
+        try:
+            extracted_data = await run_blocking("batch", _extract_deck, deck, job.work_dir, index)
+        except Exception as e:
+            logger.warning(f"Batch {job.job_id[:8]}: deck {deck.name} failed: {e}")
+            deck.status, deck.error = FAILED, str(e)
+            return
+        finally:
+            deck.seconds = round(time.perf_counter() - started, 2)
+        document = company_document(extracted_data)
+        deck.company_name = document["company_name"]
+        pending.append((deck, document))
+        if len(pending) >= BATCH_SAVE_SIZE:
+            entries = pending[:]
+            pending.clear()
+            saves.append(asyncio.ensure_future(_save(entries)))
+
+    try:
+        await asyncio.gather(
+            *(process(index, deck) for index, deck in enumerate(job.decks) if deck.status == QUEUED)
+        )
+        if pending:
+            saves.append(asyncio.ensure_future(_save(pending[:])))
+        await asyncio.gather(*saves)
+    finally:
+        shutil.rmtree(job.work_dir, ignore_errors=True)
+        job.finished_at = datetime.utcnow().isoformat()
+        job.finished_monotonic = time.monotonic()
+        counts = job.snapshot()["counts"]
+        logger.info(f"Batch {job.job_id[:8]} finished: {counts[SAVED]} saved, {counts[FAILED]} failed")
+
+
+def start_job(job: BatchJob):
+    """Run ``job`` in the background of the running event loop."""
+    task = asyncio.get_running_loop().create_task(run_job(job))
+    # Keep a reference so the task isn't garbage collected mid-run
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from modules.agents_client import get_from_agents
+from modules.executors import deferred, run_blocking
+
+logger = logging.getLogger(__name__)
+
+index_agent_companies = deferred("modules.similarity:index_agent_companies")
+
+# ===============================
+# Settings
+# ===============================
+# The agents service's company profiles (research extractions in Firestore) are
+# pulled into the similarity index on demand: when /similar is used (at most this
+# often) and on POST /similar/sync-companies, e.g. from Cloud Scheduler. Nothing runs
+# at startup, so scale-ups stay cheap. Only profiles whose text changed are embedded.
+COMPANY_INDEX_SYNC_SECONDS = float(os.getenv("COMPANY_INDEX_SYNC_SECONDS", "300"))
+# Firestore collections can be slow to stream; allow more than the default timeout
+COMPANY_INDEX_TIMEOUT_SECONDS = float(os.getenv("COMPANY_INDEX_TIMEOUT_SECONDS", "120"))
+
+_synced_at: Optional[float] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def sync_agent_companies() -> dict:
+    """Index the agents service's new or changed company profiles."""
+    global _synced_at
+    _synced_at = time.monotonic()
+    response = await get_from_agents("/raw_companies", timeout=COMPANY_INDEX_TIMEOUT_SECONDS)
+    if response.status_code != 200:
+        raise RuntimeError(f"Agents service returned {response.status_code}: {response.text[:200]}")
+    companies = response.json().get("data", [])
+    indexed = await run_blocking("similar", index_agent_companies, companies)
+    logger.info(f"Indexed {indexed} of {len(companies)} agents service companies")
+    return {"companies": len(companies), "indexed": indexed}
+
+
+async def _sync_logged():
+    try:
+        await sync_agent_companies()
+    except Exception as e:
+        logger.warning(f"Company index sync failed: {e}")
+
+
+def schedule_company_sync():
+    """Start a background sync unless one is running or the last one is recent."""
+    global _task
+    if _task is not None and not _task.done():
+        return
+    if _synced_at is not None and time.monotonic() - _synced_at < COMPANY_INDEX_SYNC_SECONDS:
+        return
+    _task = asyncio.get_running_loop().create_task(_sync_logged())
@@ -0,0 +1,90 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Mirrors CompanyProfile (agents/research_agent/models.py) so the agents service can
+# load pitch deck extractions as CompanyProfile. Defaults stand in for anything the
+# deck doesn't state; cited values default to the pitch deck as their source.
+
+PITCH_DECK_SOURCE_URL = "Pitch Deck"
+PITCH_DECK_SOURCE_NAME = "Company Pitch Deck"
+
+
+class CitedValue(BaseModel):
+    """Value with the source it was taken from."""
+
+    value: str = Field(description="The actual data value", default="")
+    source_url: Optional[str] = Field(description="URL to the source", default=PITCH_DECK_SOURCE_URL)
+    source_name: Optional[str] = Field(description="Name of the source", default=PITCH_DECK_SOURCE_NAME)
+
+
+class CompanyBasicInfo(BaseModel):
+    company_name: str = Field(description="Official company name", default="Unknown Company")
+    logo_url: Optional[str] = Field(description="URL to company logo", default="")
+    headquarters_location: str = Field(description="City, state, and country of headquarters", default="")
+    year_founded: Optional[int] = Field(description="Year the company was founded", default=None)
+    company_type: str = Field(description="Private, Public, or Subsidiary", default="")
+    industry_sector: str = Field(description="Primary industry classification", default="")
+    business_model: str = Field(description="B2B, B2C, SaaS, Marketplace, etc.", default="")
+    company_stage: CitedValue = Field(description="Company stage with source", default_factory=CitedValue)
+    employee_count: Optional[CitedValue] = Field(description="Employee count with source", default_factory=CitedValue)
+    website_url: str = Field(description="Official website URL", default="")
+    company_description: str = Field(description="Short description or tagline", default="")
+
+
+class FinancialData(BaseModel):
+    total_equity_funding: Optional[CitedValue] = Field(description="Total funding with source", default_factory=CitedValue)
+    latest_funding_round: Optional[CitedValue] = Field(description="Latest round with source", default_factory=CitedValue)
+    valuation: Optional[CitedValue] = Field(description="Valuation with source", default_factory=CitedValue)
+    revenue_growth_rate: Optional[CitedValue] = Field(description="Growth rate with source", default_factory=CitedValue)
+    financial_strength: str = Field(description="Assessment of financial health", default="")
+    key_investors: List[str] = Field(description="List of major investors", default=[])
+
+
+class KeyPerson(BaseModel):
+    name: str = Field(description="Person's full name")
+    role: str = Field(description="Job title or role", default="")
+    background: str = Field(description="Brief professional background", default="")
+    source_url: Optional[str] = Field(description="Source URL (LinkedIn, company page)", default=PITCH_DECK_SOURCE_URL)
+
+
+class PeopleData(BaseModel):
+    key_people: List[KeyPerson] = Field(description="Key leadership with sources", default=[])
+    employee_growth_rate: Optional[str] = Field(description="Rate of team growth", default="")
+    hiring_trends: str = Field(description="Current hiring patterns and insights", default="")
+
+
+class MarketData(BaseModel):
+    market_size: Optional[CitedValue] = Field(description="TAM with source", default_factory=CitedValue)
+    competitive_landscape: CitedValue = Field(description="Competitor analysis with source", default_factory=CitedValue)
+    market_position: str = Field(description="Company's market position", default="")
+    competitive_advantages: List[CitedValue] = Field(description="Key differentiators with sources", default=[])
+    product_market_fit: str = Field(description="Assessment of product-market fit", default="")
+
+
+class NewsItem(BaseModel):
+    headline: str = Field(description="News headline or summary")
+    source_url: str = Field(description="URL to the news article", default=PITCH_DECK_SOURCE_URL)
+    source_name: str = Field(description="Publication name", default=PITCH_DECK_SOURCE_NAME)
+    date: Optional[str] = Field(description="Publication date", default=None)
+
+
+class ReputationData(BaseModel):
+    customer_satisfaction: Optional[CitedValue] = Field(description="Customer satisfaction with source", default_factory=CitedValue)
+    news_mentions_count: Optional[int] = Field(description="Number of recent mentions", default=None)
+    notable_news: List[NewsItem] = Field(description="Key news items with links", default=[])
+    partnerships: List[CitedValue] = Field(description="Partnerships with announcement sources", default=[])
+    brand_sentiment: str = Field(description="Overall brand sentiment analysis", default="")
+
+
+class PitchDeckCompanyProfile(BaseModel):
+    """Company profile extracted from a pitch deck."""
+
+    company_info: CompanyBasicInfo = Field(description="Basic company information", default_factory=CompanyBasicInfo)
+    financial_data: FinancialData = Field(description="Financial and funding information", default_factory=FinancialData)
+    people_data: PeopleData = Field(description="Leadership and team information", default_factory=PeopleData)
+    market_data: MarketData = Field(description="Market position and competitive data", default_factory=MarketData)
+    reputation_data: ReputationData = Field(description="Reputation and customer information", default_factory=ReputationData)
+    extraction_summary: str = Field(
+        description="Brief summary of what data was successfully extracted and what was missing",
+        default="",
+    )
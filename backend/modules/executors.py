@@ -0,0 +1,89 @@
+import asyncio
+import functools
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from senseai_common.governor import BATCH, INTERACTIVE, call_priority
+
+# ===============================
+# Per-path executors
+# ===============================
+# The analysis functions are blocking (Gemini SDK calls, PyMuPDF, librosa, ffmpeg,
+# yt-dlp). Endpoints run them on a dedicated thread pool per path, so the event
+# loop stays free and a burst of slow video analyses cannot starve /analyze-text/.
+# Work beyond a path's limit waits in that path's queue.
+# Override a limit with BACKEND_<PATH>_CONCURRENCY, e.g. BACKEND_VIDEO_CONCURRENCY=4.
+DEFAULT_PATH_LIMITS = {
+    "text": 16,
+    "audio": 4,
+    "video": 2,
+    "pitch_deck": 4,
+    "company": 4,
+    "similar": 16,
+    "batch": 2,
+    # Archive unpacking for batch jobs: kept off "batch" so a new upload doesn't
+    # wait behind the decks of running jobs
+    "batch_unpack": 2,
+}
+
+# Gemini call priority per path: dashboard requests go ahead of queued batch work
+PATH_PRIORITIES = {"batch": BATCH}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def path_limit(path: str) -> int:
+    return int(
+        os.getenv(f"BACKEND_{path.upper()}_CONCURRENCY", DEFAULT_PATH_LIMITS.get(path, 4))
+    )
+
+
+def get_executor(path: str) -> ThreadPoolExecutor:
+    executor = _executors.get(path)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(path)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(1, path_limit(path)), thread_name_prefix=f"{path}-"
+                )
+                _executors[path] = executor
+    return executor
+
+
+def _call_with_priority(priority: int, fn: Callable, *args, **kwargs):
+    with call_priority(priority):
+        return fn(*args, **kwargs)
+
+
+async def run_blocking(path: str, fn: Callable, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on ``path``'s executor and await the result.
+
+    Gemini calls made by ``fn`` are governed at the path's priority (INTERACTIVE
+    unless listed in PATH_PRIORITIES); the executor thread doesn't inherit the
+    caller's context.
+    """
+    loop = asyncio.get_running_loop()
+    priority = PATH_PRIORITIES.get(path, INTERACTIVE)
+    return await loop.run_in_executor(
+        get_executor(path), functools.partial(_call_with_priority, priority, fn, *args, **kwargs)
+    )
+
+
+def deferred(target: str) -> Callable:
+    """Function ``"module:name"`` imported on first call, i.e. inside the worker thread.
+
+    Keeps heavy modules out of startup (see scripts/check_import_time.py) without
+    blocking the event loop on their first import.
+    """
+    module_name, _, name = target.partition(":")
+
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), name)(*args, **kwargs)
+
+    call.__name__ = name
+    return call
@@ -1,64 +1,63 @@
 import os
-import io
 import json
-import fitz  # PyMuPDF
-from PIL import Image
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai
 from dotenv import load_dotenv
-from gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_calls import generate_content
+from senseai_common.governor import with_current_priority
+from senseai_common.document_store import get_document_store
+from senseai_common.gemini_files import get_file_registry
+from modules.similarity import DECK, index_deck_analysis, is_indexed
 
 
 load_dotenv()
 
+# Name of this pipeline's result in the document store
+RESULT_NAME = "pitch_deck_analysis"
 
-def configure_gemini():
-    """Configures the Gemini API with the key from environment variables."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
-    genai.configure(api_key=api_key)
-
-
-# Initialize Gemini at startup
-configure_gemini()
+# Maximum number of topics extracted in parallel for one deck
+TOPIC_CONCURRENCY = int(os.getenv("PITCH_DECK_TOPIC_CONCURRENCY", "4"))
 
 
 # ===============================
 # Pitch Deck PDF Processing
 # ===============================
-def pdf_to_images(pdf_path: str):
-    """Convert PDF to a list of PIL images (one per page)."""
-    doc = fitz.open(pdf_path)
-    images = []
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        pix = page.get_pixmap(dpi=150)
-        img_data = pix.tobytes("png")
-        image = Image.open(io.BytesIO(img_data))
-        images.append(image)
-    doc.close()
-    return images
-
-
-def generate_table_of_contents(page_images: list):
+def pdf_to_pages(doc_id: str):
+    """Per-page content parts of a stored document.
+
+    Text-dominant pages are sent as their extracted text and only charts, diagrams
+    and photos as images (see ``senseai_common.page_classifier``). Images are uploaded
+    once and referenced by handle, so the TOC and topic calls don't resend them.
+    """
+    return get_file_registry().reference_pages(get_document_store().page_parts(doc_id))
+
+
+def flatten_pages(pages: list) -> list:
+    return [part for page in pages for part in page]
+
+
+def generate_table_of_contents(pages: list):
     """Stage 1: Use Gemini to generate TOC."""
     model = genai.GenerativeModel(GEMINI_SMALL)
     prompt = """
     You are a document analysis expert. Your task is to create a table of contents for this pitch deck.
     Analyze all the pages provided and identify the main sections.
+    Each page starts with a [Page N] marker and is given either as its extracted text or as an image.
     Return a JSON object where keys are the main topics (e.g., "Problem", "Solution", "Team", "Market_Size", "Financials", "Competition", "Traction", "Ask") and values are a list of page numbers where that topic is discussed.
     Page numbers should be 1-based.
     Example response: {"Problem": [2], "Solution": [3, 4], "Team": [5]}
     """
-    content = [prompt] + page_images
-    response = model.generate_content(content)
+    content = [prompt] + flatten_pages(pages)
+    response = generate_content(model, content)
     cleaned_response = (
         response.text.strip().replace("```json", "").replace("```", "").strip()
     )
     return json.loads(cleaned_response)
 
 
-def extract_topic_data(topic: str, page_images: list):
+def extract_topic_data(topic: str, pages: list):
     """Stage 2: Extract topic-specific data."""
     model = genai.GenerativeModel(GEMINI_SMALL)
     prompt = f"""
@@ -67,19 +66,13 @@ def extract_topic_data(topic: str, page_images: list):
     Present the information in a clear, well-structured format. If it's a list (like team members or competitors), use bullet points.
     Be very specific when generating the response, dont include texts like 'Here is the breakdown' or 'being an AI agent'. Always refer
     to the {topic} and provide the accureate responses. 
+    Each page starts with a [Page N] marker and is given either as its extracted text or as an image.
     """
-    content = [prompt] + page_images
-    response = model.generate_content(content)
+    content = [prompt] + flatten_pages(pages)
+    response = generate_content(model, content)
     return response.text
 
 
-def generate_embeddings(text: str, task_type: str = "RETRIEVAL_DOCUMENT"):
-    """Generate embeddings for text."""
-    model = "models/text-embedding-004"
-    embedding = genai.embed_content(model=model, content=text, task_type=task_type)
-    return embedding["embedding"]
-
-
 def json_to_markdown(data: dict) -> str:
     """Convert dict to markdown string."""
     markdown_string = ""
@@ -88,37 +81,112 @@ def json_to_markdown(data: dict) -> str:
     return markdown_string
 
 
-def process_pitch_deck(pdf_path: str):
-    """Pipeline for PDF pitch deck analysis."""
-    os.makedirs("results", exist_ok=True)
+def process_pitch_deck_events(pdf_path: str, filename: str = None):
+    """Pipeline for PDF pitch deck analysis, yielding progress events as they happen.
 
-    all_page_images = pdf_to_images(pdf_path)
-    toc = generate_table_of_contents(all_page_images)
+    Events (dicts with an "event" key), in order:
+    - "toc": the table of contents, after the first model call
+    - "topic": one per topic, as soon as its extraction finishes (completion order)
+    - "complete": the full result, as returned by ``process_pitch_deck``
 
-    final_structured_data = {}
+    The deck is recorded in the document store; a deck that was already analyzed
+    replays its stored result, with ``"cached": True`` on every event and the topic
+    timings of the original run. Each analysis section is embedded and added to the
+    similarity index.
+    """
+    store = get_document_store()
+    doc_id = store.put_file(pdf_path, filename)
+    label = filename or os.path.basename(pdf_path)
+    stored_result = store.get_result(doc_id, RESULT_NAME)
+    if stored_result is not None:
+        if not is_indexed(DECK, doc_id):
+            # Section vectors are cached by text, so this makes no embedding calls
+            index_deck_analysis(doc_id, stored_result["analysis"], label)
+        # Replayed events carry the timings of the run that produced them
+        timings = stored_result.get("topic_timings_seconds", {})
+        yield {"event": "toc", "document_id": doc_id, "toc": stored_result["toc"], "cached": True}
+        for topic, analysis in stored_result["analysis"].items():
+            yield {
+                "event": "topic",
+                "topic": topic,
+                "analysis": analysis,
+                "seconds": timings.get(topic),
+                "cached": True,
+            }
+        yield {"event": "complete", "result": stored_result, "cached": True}
+        return
+
+    results_dir = os.path.join("results", doc_id)
+    os.makedirs(results_dir, exist_ok=True)
+
+    all_pages = pdf_to_pages(doc_id)
+    toc = generate_table_of_contents(all_pages)
+    yield {"event": "toc", "document_id": doc_id, "toc": toc}
+
+    topic_pages = {}
     for topic, page_nums in toc.items():
-        topic_images = [
-            all_page_images[p - 1] for p in page_nums if 0 < p <= len(all_page_images)
-        ]
-        if not topic_images:
-            continue
-        extracted_data = extract_topic_data(topic, topic_images)
-        final_structured_data[topic] = extracted_data
-
-    # Save structured JSON
-    with open("results/Consolidated_result.json", "w") as f:
+        pages = [all_pages[p - 1] for p in page_nums if 0 < p <= len(all_pages)]
+        if pages:
+            topic_pages[topic] = pages
+
+    def timed_extract(topic: str, pages: list):
+        started = time.perf_counter()
+        extracted_data = extract_topic_data(topic, pages)
+        return extracted_data, round(time.perf_counter() - started, 2)
+
+    # Extract topics concurrently and report each as soon as it finishes
+    extracted = {}
+    topic_timings = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, TOPIC_CONCURRENCY))
+    try:
+        futures = {
+            executor.submit(with_current_priority(timed_extract), topic, pages): topic
+            for topic, pages in topic_pages.items()
+        }
+        for future in as_completed(futures):
+            topic = futures[future]
+            extracted[topic], topic_timings[topic] = future.result()
+            yield {
+                "event": "topic",
+                "topic": topic,
+                "analysis": extracted[topic],
+                "seconds": topic_timings[topic],
+            }
+    except BaseException:
+        # Closed early (GeneratorExit) or a topic failed: drop the queued topics and
+        # return without waiting for the running ones
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    # Results are kept in TOC order
+    final_structured_data = {topic: extracted[topic] for topic in topic_pages}
+
+    # Save structured JSON and Markdown, per deck so concurrent analyses don't collide
+    with open(os.path.join(results_dir, "Consolidated_result.json"), "w") as f:
         json.dump(final_structured_data, f, indent=2)
 
-    # Save Markdown
     markdown_content = json_to_markdown(final_structured_data)
-    with open("results/analysis_results.md", "w") as f:
+    with open(os.path.join(results_dir, "analysis_results.md"), "w") as f:
         f.write(markdown_content)
 
     # Embeddings
-    embeddings = generate_embeddings(json.dumps(final_structured_data, indent=2))
+    sections = index_deck_analysis(doc_id, final_structured_data, label)
 
-    return {
+    result = {
+        "document_id": doc_id,
         "toc": toc,
         "analysis": final_structured_data,
-        "embedding_dimension": len(embeddings),
+        "embedding_dimension": len(sections[0][2]) if sections else 0,
+        "embedded_sections": len(sections),
+        "topic_timings_seconds": topic_timings,
     }
+    store.put_result(doc_id, RESULT_NAME, result)
+    yield {"event": "complete", "result": result}
+
+
+def process_pitch_deck(pdf_path: str, filename: str = None):
+    """Pipeline for PDF pitch deck analysis; returns the complete result."""
+    for event in process_pitch_deck_events(pdf_path, filename):
+        if event["event"] == "complete":
+            return event["result"]
@@ -0,0 +1,166 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from senseai_common.embeddings import chunk_text, embed_texts
+from senseai_common.vector_index import get_vector_index
+
+DECK = "deck"
+DECK_SECTION = "deck_section"
+COMPANY = "company"
+# "source" of the agents service's companies saved from pitch deck extractions
+PITCH_DECK_SOURCE = "Pitch Deck Analysis"
+
+
+# ===============================
+# Indexing
+# ===============================
+def embed_sections(analysis: dict):
+    """Embed each section of a deck analysis (chunked if long) in batched requests.
+
+    Returns a list of (topic, chunk_index, vector). Vectors are cached by text, so
+    re-analyzing a slightly changed deck only embeds the sections that changed.
+    """
+    chunks = [
+        (topic, i, f"{topic.replace('_', ' ')}\n\n{chunk}")
+        for topic, text in analysis.items()
+        for i, chunk in enumerate(chunk_text(str(text)))
+    ]
+    vectors = embed_texts([text for _, _, text in chunks])
+    return [(topic, i, vector) for (topic, i, _), vector in zip(chunks, vectors)]
+
+
+def index_deck_analysis(doc_id: str, analysis: dict, label: str):
+    """Index every analysis section of a deck, plus one deck-level vector (their mean).
+
+    Replaces whatever the deck had in the index, so sections dropped by a
+    re-analysis stop matching.
+    """
+    indexed_at = datetime.utcnow().isoformat()
+    sections = embed_sections(analysis)
+    entries = [
+        (
+            f"{DECK_SECTION}:{doc_id}:{topic}:{i}",
+            vector,
+            DECK_SECTION,
+            {"document_id": doc_id, "label": label, "section": topic, "indexed_at": indexed_at},
+        )
+        for topic, i, vector in sections
+    ]
+    if sections:
+        vectors = np.asarray([vector for _, _, vector in sections], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        entries.append(
+            (
+                f"{DECK}:{doc_id}",
+                vectors.mean(axis=0),
+                DECK,
+                {"document_id": doc_id, "label": label, "indexed_at": indexed_at},
+            )
+        )
+    get_vector_index().replace_document(doc_id, (DECK, DECK_SECTION), entries)
+    return sections
+
+
+def _company_text(company_data: dict) -> str:
+    return json.dumps(company_data, indent=2)
+
+
+def _company_entry(doc_id: str, company_data: dict, embedding, **metadata):
+    company_name = company_data.get("company_info", {}).get("company_name") or doc_id
+    return (
+        f"{COMPANY}:{doc_id}",
+        embedding,
+        COMPANY,
+        {
+            "document_id": doc_id,
+            "label": company_name,
+            "indexed_at": datetime.utcnow().isoformat(),
+            **metadata,
+        },
+    )
+
+
+def index_company_profile(doc_id: str, company_data: dict):
+    """Embed a CompanyProfile-shaped extraction and index it, replacing its previous vector."""
+    [embedding] = embed_texts([_company_text(company_data)])
+    get_vector_index().replace_document(
+        doc_id, (COMPANY,), [_company_entry(doc_id, company_data, embedding)]
+    )
+
+
+def index_agent_companies(companies: List[dict]) -> int:
+    """Index the agents service's company documents (``/raw_companies``) whose profile
+    text changed since it was last indexed; returns how many were indexed.
+
+    Changed profiles are embedded with one batched ``embed_texts`` call and written
+    to the index together. Companies saved from pitch deck extractions are skipped:
+    this service already indexed them under their deck's document id.
+    """
+    index = get_vector_index()
+    changed = []
+    for company in companies:
+        doc_id = company.get("id")
+        if not doc_id or not company.get("data") or company.get("source") == PITCH_DECK_SOURCE:
+            continue
+        text = _company_text(company["data"])
+        text_sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        entry = index.entry(f"{COMPANY}:{doc_id}")
+        if entry is not None and entry.get("text_sha256") == text_sha256:
+            continue
+        changed.append((doc_id, company["data"], text, text_sha256))
+    if not changed:
+        return 0
+
+    embeddings = embed_texts([text for _, _, text, _ in changed])
+    index.replace_documents(
+        [
+            (
+                doc_id,
+                (COMPANY,),
+                [
+                    _company_entry(
+                        doc_id, data, embedding, source="agents", text_sha256=text_sha256
+                    )
+                ],
+            )
+            for (doc_id, data, _, text_sha256), embedding in zip(changed, embeddings)
+        ]
+    )
+    return len(changed)
+
+
+def is_indexed(kind: str, doc_id: str) -> bool:
+    return get_vector_index().get(f"{kind}:{doc_id}") is not None
+
+
+# ===============================
+# Search
+# ===============================
+def find_similar(
+    document_id: Optional[str] = None,
+    text: Optional[str] = None,
+    kind: Optional[str] = None,
+    k: int = 10,
+):
+    """Top-k decks/sections/companies most similar to an indexed document or a text query.
+
+    A document query reuses its stored vector; a text query costs one embedding call.
+    Raises KeyError if ``document_id`` is not indexed.
+    """
+    index = get_vector_index()
+    exclude = None
+    if document_id:
+        vector = None
+        for candidate in (DECK, COMPANY):
+            vector = index.get(f"{candidate}:{document_id}")
+            if vector is not None:
+                break
+        if vector is None:
+            raise KeyError(f"Document {document_id} has not been analyzed")
+        exclude = {"document_id": document_id}
+    else:
+        [vector] = embed_texts([text], task_type="RETRIEVAL_QUERY")
+
+    return index.search(vector, k=k, kind=kind, exclude=exclude)
@@ -1,42 +1,108 @@
 import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
-import base64
 from dotenv import load_dotenv
 
-from gemini_model_config import GEMINI_SMALL
-
+from senseai_common.gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_calls import generate_content
+from senseai_common.governor import with_current_priority
+from modules.audio_segmenter import (
+    AUDIO_PREPROCESS,
+    MAX_SEGMENT_SECONDS,
+    SAMPLE_RATE,
+    audio_frames,
+    audio_mime_type,
+    mono_16k,
+    preprocess_audio,
+    segment_file,
+    stitch_transcripts,
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def configure_gemini():
-    """Configures the Gemini API with the key from environment variables."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
-    genai.configure(api_key=api_key)
-
+# Maximum number of audio segments transcribed in parallel for one recording
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
 
-# Initialize Gemini at startup
-configure_gemini()
+PROMPT = "You are an expert transcriptionist. Transcribe the following audio file to text. Only return the transcript, no extra commentary."
+SEGMENT_PROMPT = (
+    PROMPT
+    + " This audio is part {part} of {parts} of a longer recording and may start or end mid-sentence;"
+    " transcribe exactly what is spoken in it."
+)
 
 
-def transcribe_audio_with_gemini(audio_path: str) -> str:
-    """Transcribe audio file to text using Gemini multimodal."""
+def _transcribe_part(prompt: str, audio_part: dict) -> str:
     model = genai.GenerativeModel(GEMINI_SMALL)
-    prompt = "You are an expert transcriptionist. Transcribe the following audio file to text. Only return the transcript, no extra commentary."
+    response = generate_content(model, [prompt, audio_part])
+    return response.text.strip()
 
-    # Read audio as Base64
-    with open(audio_path, "rb") as f:
-        audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
 
-    # Wrap properly for Gemini
-    audio_part = {
-        "mime_type": "audio/mp3" if audio_path.endswith(".mp3") else "audio/wav",
-        "data": audio_b64,
-    }
+def _transcribe_segment(prompt: str, segment) -> str:
+    return _transcribe_part(prompt, segment.as_part())
 
-    # Pass as structured input
-    response = model.generate_content([prompt, audio_part])
-    return response.text.strip()
+
+def transcribe_audio_with_gemini(audio_path: str):
+    """Transcribe audio file to text using Gemini multimodal.
+
+    The audio is first downmixed to 16 kHz mono with long silences cut (see
+    ``preprocess_audio``). Short recordings go in one request; longer ones are
+    split at silences into bounded segments that are transcribed concurrently and
+    stitched back together in order.
+
+    Returns the transcript and the preprocessing stats, including ``seconds_saved``.
+    """
+    if not AUDIO_PREPROCESS:
+        return _transcribe_unprocessed(audio_path), {"preprocessed": False}
+
+    with preprocess_audio(audio_path) as (processed_path, stats):
+        logger.info(
+            f"Preprocessed {stats['original_seconds']:.0f}s of audio to "
+            f"{stats['processed_seconds']:.0f}s ({stats['seconds_saved']:.0f}s saved)"
+        )
+        return transcribe_file(processed_path), stats
+
+
+def transcribe_file(path: str) -> str:
+    """Transcribe a 16 kHz mono FLAC file, in segments if it is long."""
+    if audio_frames(path) / SAMPLE_RATE <= MAX_SEGMENT_SECONDS:
+        with open(path, "rb") as f:
+            audio_part = {"mime_type": "audio/flac", "data": f.read()}
+        return _transcribe_part(PROMPT, audio_part)
+
+    return _transcribe_segments(segment_file(path))
+
+
+def _transcribe_unprocessed(audio_path: str) -> str:
+    """Transcription without preprocessing (AUDIO_PREPROCESS=false)."""
+    import librosa
+
+    mime_type = audio_mime_type(audio_path)
+    duration = librosa.get_duration(path=audio_path)
+
+    if mime_type and duration <= MAX_SEGMENT_SECONDS:
+        with open(audio_path, "rb") as f:
+            audio_part = {"mime_type": mime_type, "data": f.read()}
+        return _transcribe_part(PROMPT, audio_part)
+
+    with mono_16k(audio_path) as path:
+        return _transcribe_segments(segment_file(path))
+
+
+def _transcribe_segments(segments) -> str:
+    logger.info(f"Transcribing audio in {len(segments)} segments")
+    prompts = [
+        SEGMENT_PROMPT.format(part=segment.index + 1, parts=len(segments))
+        for segment in segments
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, TRANSCRIBE_CONCURRENCY)) as executor:
+        transcripts = list(
+            executor.map(
+                with_current_priority(_transcribe_segment),
+                prompts,
+                segments,
+            )
+        )
+    return stitch_transcripts(transcripts)
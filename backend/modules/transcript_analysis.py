@@ -1,27 +1,52 @@
 import re, os, json
-from PIL import Image
 import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from dotenv import load_dotenv
-from gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_calls import generate_content
+from senseai_common.governor import with_current_priority
 
 load_dotenv()
 
+# Transcripts longer than this are analyzed in chunks (map) and merged locally (reduce)
+TRANSCRIPT_CHUNK_CHARS = int(os.getenv("TRANSCRIPT_CHUNK_CHARS", "30000"))
+# Maximum number of transcript chunks analyzed in parallel
+TRANSCRIPT_ANALYSIS_CONCURRENCY = int(os.getenv("TRANSCRIPT_ANALYSIS_CONCURRENCY", "4"))
 
-def configure_gemini():
-    """Configures the Gemini API with the key from environment variables."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
-    genai.configure(api_key=api_key)
+# A line that opens a speaker turn, e.g. "Speaker 2:", "HOST:", "Jane Doe:"
+SPEAKER_TURN = re.compile(r"^\s*(?:\[[\d:.]+\]\s*)?[A-Z][\w .'-]{0,40}:\s")
+# Phrases a host uses to hand over to the next startup
+STARTUP_HANDOVER = re.compile(
+    r"\b(next (?:up|startup|company|pitch|presenter|team)|please welcome|our (?:next|last|first) "
+    r"(?:startup|company|pitch|presenter|team)|give it up for)\b",
+    re.IGNORECASE,
+)
 
+# Values that mean "no name" in a chunk result, e.g. a pitch that started in the previous chunk
+UNNAMED = {"", "unknown", "not found", "not mentioned", "n/a", "none"}
 
-# Initialize Gemini at startup
-configure_gemini()
+
+def _parse_json_response(text_response: str):
+    # Extract JSON if wrapped in ```json ```
+    json_match = re.search(r"```json\s*([\s\S]*?)\s*```", text_response)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        json_str = text_response
+
+    return json.loads(json_str)
 
 
 def analyze_transcript_with_ai(transcript_content: str) -> List[Dict]:
-    """Analyzes transcript text with Gemini."""
+    """Analyzes transcript text with Gemini.
+
+    Transcripts longer than TRANSCRIPT_CHUNK_CHARS (long demo-day recordings) go
+    through ``analyze_transcript_map_reduce`` and get one entry per startup.
+    """
+    if len(transcript_content) > TRANSCRIPT_CHUNK_CHARS:
+        return analyze_transcript_map_reduce(transcript_content)
+
     model = genai.GenerativeModel(GEMINI_SMALL)
 
     prompt = f"""
@@ -46,17 +71,155 @@ def analyze_transcript_with_ai(transcript_content: str) -> List[Dict]:
     ---
     """
 
-    response = model.generate_content(prompt)
-    text_response = response.text
+    response = generate_content(model, prompt)
+    return _parse_json_response(response.text)
 
-    # Extract JSON if wrapped in ```json ```
-    json_match = re.search(r"```json\s*([\s\S]*?)\s*```", text_response)
-    if json_match:
-        json_str = json_match.group(1)
-    else:
-        json_str = text_response
 
-    return json.loads(json_str)
+# ===============================
+# Map-reduce mode
+# ===============================
+def split_transcript(transcript_content: str, max_chars: int = None) -> List[str]:
+    """Split a transcript into chunks of at most ``max_chars`` at speaker/startup boundaries.
+
+    Chunks only break between lines. Once a chunk is half full, a host handing over
+    to the next startup starts a new chunk; otherwise chunks break at the last
+    speaker turn that fits.
+    """
+    max_chars = max_chars or TRANSCRIPT_CHUNK_CHARS
+    lines = [line for line in transcript_content.splitlines() if line.strip()]
+
+    # Group lines into turns: a turn starts at a speaker label (or each line if none)
+    has_speakers = any(SPEAKER_TURN.match(line) for line in lines)
+    turns: List[str] = []
+    for line in lines:
+        if turns and has_speakers and not SPEAKER_TURN.match(line):
+            turns[-1] += "\n" + line
+        else:
+            turns.append(line)
+
+    chunks: List[str] = []
+    current = ""
+    for turn in turns:
+        # Turns longer than a chunk are split on sentence ends (or hard-split)
+        pieces = [turn]
+        if len(turn) > max_chars:
+            pieces = re.findall(rf".{{1,{max_chars}}}(?:[.!?]\s+|$)|.{{1,{max_chars}}}", turn, re.S)
+        for piece in pieces:
+            handover = STARTUP_HANDOVER.search(piece) and len(current) >= max_chars // 2
+            if current and (handover or len(current) + 1 + len(piece) > max_chars):
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _analyze_chunk(chunk: str, part: int, parts: int) -> List[Dict]:
+    model = genai.GenerativeModel(GEMINI_SMALL)
+    prompt = f"""
+    You are an expert AI analyst. Below is part {part} of {parts} of the transcript of a startup pitch event.
+    It may start or end in the middle of a pitch.
+    Identify each startup that pitches in this part and for each one, extract the following information:
+    - startup_name: The name of the startup. Use "" if the pitch started in an earlier part and the name is not mentioned here.
+    - summary: A concise summary of the business.
+    - founders: Information about the founders.
+    - problem_statement: The problem the startup is solving.
+    - solution: The solution they offer.
+    - funding: A dictionary with 'raised' and 'seeking' amounts.
+    - market: A dictionary with 'size' and 'traction' details.
+    - risks: Potential risks or challenges mentioned or implied.
+    - key_insights: Unique advantages or important takeaways from the pitch.
+
+    Only use information from this part. Respond with ONLY a valid JSON array of objects, where each object represents a startup.
+    Do not include any explanatory text before or after the JSON.
+
+    Transcript part {part}:
+    ---
+    {chunk}
+    ---
+    """
+    response = generate_content(model, prompt)
+    result = _parse_json_response(response.text)
+    return result if isinstance(result, list) else [result]
+
+
+def _startup_key(entry: Dict) -> str:
+    name = str(entry.get("startup_name") or entry.get("company") or "").strip().lower()
+    if name in UNNAMED:
+        return ""
+    return re.sub(r"[^a-z0-9]", "", name)
+
+
+def _merge_values(existing, new):
+    """Combine two extractions of the same field from different chunks."""
+    if existing in (None, "", [], {}):
+        return new
+    if new in (None, "", [], {}):
+        return existing
+    if isinstance(existing, dict) and isinstance(new, dict):
+        merged = dict(existing)
+        for key, value in new.items():
+            merged[key] = _merge_values(merged.get(key), value)
+        return merged
+    if isinstance(existing, list) or isinstance(new, list):
+        items = (existing if isinstance(existing, list) else [existing]) + (
+            new if isinstance(new, list) else [new]
+        )
+        merged = []
+        for item in items:
+            if item not in merged:
+                merged.append(item)
+        return merged
+    if isinstance(existing, str) and isinstance(new, str):
+        if new.strip().lower() in existing.lower():
+            return existing
+        if existing.strip().lower() in new.lower():
+            return new
+        return f"{existing} {new}"
+    return existing
+
+
+def merge_startup_results(chunk_results: List[List[Dict]]) -> List[Dict]:
+    """Merge per-chunk startup lists into one entry per startup, in order of appearance.
+
+    An unnamed entry continues the last startup of the previous chunk (a pitch cut
+    by a chunk boundary).
+    """
+    merged: Dict[str, Dict] = {}
+    last_key = None
+    for entries in chunk_results:
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            key = _startup_key(entry) or last_key or f"unnamed-{len(merged)}"
+            if key in merged:
+                merged[key] = _merge_values(merged[key], entry)
+                if _startup_key(entry):
+                    merged[key]["startup_name"] = (
+                        merged[key].get("startup_name")
+                        or entry.get("startup_name")
+                        or entry.get("company")
+                    )
+            else:
+                merged[key] = dict(entry)
+            last_key = key
+    return list(merged.values())
+
+
+def analyze_transcript_map_reduce(transcript_content: str) -> List[Dict]:
+    """Analyze a long transcript chunk by chunk in parallel and merge per-startup results."""
+    chunks = split_transcript(transcript_content)
+    with ThreadPoolExecutor(max_workers=max(1, TRANSCRIPT_ANALYSIS_CONCURRENCY)) as executor:
+        chunk_results = list(
+            executor.map(
+                with_current_priority(_analyze_chunk),
+                chunks,
+                range(1, len(chunks) + 1),
+                [len(chunks)] * len(chunks),
+            )
+        )
+    return merge_startup_results(chunk_results)
 
 
 # prompt = f'''
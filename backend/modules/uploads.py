@@ -0,0 +1,65 @@
+import os
+import tempfile
+from fastapi import HTTPException, UploadFile
+
+# ===============================
+# Upload spooling
+# ===============================
+# Uploads are copied in fixed-size chunks to a unique temp file, so memory per
+# request stays constant whatever the upload size, and concurrent uploads with the
+# same filename never share a path.
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+MB = 1024 * 1024
+MAX_PDF_UPLOAD_BYTES = int(os.getenv("MAX_PDF_UPLOAD_MB", "50")) * MB
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_MB", "200")) * MB
+MAX_VIDEO_UPLOAD_BYTES = int(os.getenv("MAX_VIDEO_UPLOAD_MB", "1024")) * MB
+MAX_ZIP_UPLOAD_BYTES = int(os.getenv("MAX_ZIP_UPLOAD_MB", "1024")) * MB
+# Request bodies above their route's upload limit (plus 1 MB of multipart overhead)
+# are rejected from the Content-Length header, before parsing. Other routes take
+# text or JSON and get the smallest limit.
+ROUTE_UPLOAD_LIMITS = {
+    "/analyze-pitch-deck/": MAX_PDF_UPLOAD_BYTES,
+    "/extract-company-from-pitch-deck/": MAX_PDF_UPLOAD_BYTES,
+    "/analyze-audio/": MAX_AUDIO_UPLOAD_BYTES,
+    "/analyze-video/": MAX_VIDEO_UPLOAD_BYTES,
+    "/batch-extract-companies/": MAX_ZIP_UPLOAD_BYTES,
+}
+DEFAULT_REQUEST_BYTES = MAX_PDF_UPLOAD_BYTES
+
+
+def max_request_bytes(path: str) -> int:
+    """Largest request body accepted on the route ``path``."""
+    if not path.endswith("/"):
+        path += "/"
+    return ROUTE_UPLOAD_LIMITS.get(path, DEFAULT_REQUEST_BYTES) + MB
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"Upload exceeds the {max_bytes // MB} MB limit."
+    )
+
+
+async def spool_upload(file: UploadFile, max_bytes: int, suffix: str = "") -> str:
+    """Copy ``file`` to a new temp file in chunks and return its path.
+
+    Raises HTTP 413 as soon as the upload is known to exceed ``max_bytes``. The
+    caller removes the returned file.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+    try:
+        written = 0
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise _too_large(max_bytes)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
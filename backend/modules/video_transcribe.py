@@ -1,16 +1,45 @@
 import os
+import re
+import logging
+import shutil
+import subprocess
 import tempfile
-import librosa
-import soundfile as sf
+import time
+from contextlib import contextmanager
+from typing import Optional
 import yt_dlp
-from modules.transcribe_generator import transcribe_audio_with_gemini  
+from senseai_common.document_store import get_document_store
+from modules.audio_segmenter import SAMPLE_RATE, run_ffmpeg
+from modules.transcribe_generator import transcribe_audio_with_gemini
+from modules.audio_analysis import analyze_audio_single_pass
+from modules.transcript_analysis import analyze_transcript_with_ai
+
+logger = logging.getLogger(__name__)
 
 SUPPORTED_VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi")
 
-def download_youtube_video(youtube_url: str, out_dir: str) -> str:
-    """Download YouTube video and return file path."""
+# Extracted audio and transcripts of YouTube videos are cached in the shared blob
+# store under youtube/<video id>/, so repeat analyses skip download and transcription
+YOUTUBE_CACHE_PREFIX = "youtube"
+
+YOUTUBE_ID_PATTERN = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})"
+)
+
+
+def youtube_video_id(youtube_url: str) -> str:
+    """Video id of a YouTube URL, resolved without a network call for the usual URL forms."""
+    match = YOUTUBE_ID_PATTERN.search(youtube_url)
+    if match:
+        return match.group(1)
+    with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        return ydl.extract_info(youtube_url, download=False)["id"]
+
+
+def download_youtube_audio(youtube_url: str, out_dir: str) -> str:
+    """Download only the audio stream of a YouTube video and return its file path."""
     ydl_opts = {
-        "format": "bestvideo+bestaudio/best",
+        "format": "bestaudio/best",
         "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
         "quiet": True,
     }
@@ -18,63 +47,161 @@ def download_youtube_video(youtube_url: str, out_dir: str) -> str:
         info = ydl.extract_info(youtube_url, download=True)
         return os.path.join(out_dir, f"{info['id']}.{info['ext']}")
 
-def extract_audio_from_video(video_path: str) -> str:
-    """Extract audio from video and return temporary WAV path."""
-    temp_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    temp_audio_file.close()  # Close so we can write to it
-    
+def _extract_with_ffmpeg(video_path: str, audio_path: str):
+    """Stream the audio track through ffmpeg, resampled to 16 kHz mono FLAC."""
+    run_ffmpeg(video_path, audio_path)
+
+
+def _extract_with_librosa(video_path: str, audio_path: str):
+    """Fallback when ffmpeg is not installed (decodes the whole track in memory)."""
+    import librosa
+    import soundfile as sf
+
+    audio_data, sample_rate = librosa.load(video_path, sr=SAMPLE_RATE, mono=True)
+    sf.write(audio_path, audio_data, sample_rate, format="FLAC")
+
+
+def extract_audio_from_video(video_path: str):
+    """Extract audio from video to a temporary 16 kHz mono FLAC file.
+
+    Returns the audio path and extraction stats (seconds taken, output size).
+    """
+    temp_audio_file = tempfile.NamedTemporaryFile(delete=False, suffix=".flac")
+    temp_audio_file.close()  # Close so ffmpeg can write to it
+
+    started = time.perf_counter()
+    method = "ffmpeg"
     try:
-        # Use librosa to load audio from video (requires ffmpeg)
-        # librosa can handle video files and extract audio automatically
-        audio_data, sample_rate = librosa.load(video_path, sr=None)
-        
-        # Save as WAV file
-        sf.write(temp_audio_file.name, audio_data, sample_rate)
-        return temp_audio_file.name
-        
-    except Exception as e:
-        # Fallback: use ffmpeg directly if librosa fails
         try:
-            import subprocess
-            cmd = [
-                'ffmpeg', '-i', video_path, 
-                '-vn', '-acodec', 'pcm_s16le', 
-                '-ar', '16000', '-ac', '1',
-                '-y', temp_audio_file.name
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-            return temp_audio_file.name
-        except subprocess.CalledProcessError as ffmpeg_error:
-            raise RuntimeError(f"Failed to extract audio: {str(e)}, FFmpeg error: {str(ffmpeg_error)}")
-
-def transcribe_video(path_or_url: str, is_youtube: bool = False) -> str:
-    """Download/extract audio from video and transcribe."""
-    temp_files = []
+            _extract_with_ffmpeg(video_path, temp_audio_file.name)
+        except FileNotFoundError:
+            method = "librosa"
+            _extract_with_librosa(video_path, temp_audio_file.name)
+    except subprocess.CalledProcessError as e:
+        os.remove(temp_audio_file.name)
+        raise RuntimeError(
+            f"Failed to extract audio: {e.stderr.decode('utf-8', 'replace').strip()}"
+        )
+    except Exception:
+        os.remove(temp_audio_file.name)
+        raise
+
+    stats = {
+        "method": method,
+        "seconds": round(time.perf_counter() - started, 2),
+        "output_bytes": os.path.getsize(temp_audio_file.name),
+    }
+    logger.info(
+        f"Extracted audio with {method} in {stats['seconds']}s ({stats['output_bytes']} bytes)"
+    )
+    return temp_audio_file.name, stats
+
 
+def _youtube_audio(youtube_url: str, video_id: str, tmpdir: str):
+    """16 kHz mono FLAC of a YouTube video, from the cache or an audio-only download."""
+    cache = get_document_store().backend
+    cache_name = f"{YOUTUBE_CACHE_PREFIX}/{video_id}/audio.flac"
+    audio_path = os.path.join(tmpdir, f"{video_id}.flac")
+
+    cached_audio = cache.get(cache_name)
+    if cached_audio is not None:
+        with open(audio_path, "wb") as f:
+            f.write(cached_audio)
+        return audio_path, {"method": "cache", "seconds": 0.0, "output_bytes": len(cached_audio)}
+
+    download_path = download_youtube_audio(youtube_url, tmpdir)
+    extracted_path, stats = extract_audio_from_video(download_path)
+    shutil.move(extracted_path, audio_path)
+    with open(audio_path, "rb") as f:
+        cache.put(cache_name, f.read(), "audio/flac")
+    return audio_path, stats
+
+
+@contextmanager
+def _video_audio(path_or_url: str, is_youtube: bool):
+    """Audio file of a video (or YouTube URL) and its extraction stats; removed on exit."""
+    tmpdir = tempfile.mkdtemp()
     try:
-        # Use a temp directory for YouTube download
         if is_youtube:
-            tmpdir = tempfile.mkdtemp()
-            video_path = download_youtube_video(path_or_url, tmpdir)
-            temp_files.append(video_path)
+            yield _youtube_audio(path_or_url, youtube_video_id(path_or_url), tmpdir)
         else:
-            video_path = path_or_url
-            if not video_path.lower().endswith(SUPPORTED_VIDEO_EXTENSIONS):
-                raise ValueError(f"Unsupported video format: {video_path}")
+            if not path_or_url.lower().endswith(SUPPORTED_VIDEO_EXTENSIONS):
+                raise ValueError(f"Unsupported video format: {path_or_url}")
+            audio_path, extraction_stats = extract_audio_from_video(path_or_url)
+            try:
+                yield audio_path, extraction_stats
+            finally:
+                if os.path.exists(audio_path):
+                    os.remove(audio_path)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
 
-        # Extract audio to temp file
-        audio_path = extract_audio_from_video(video_path)
-        temp_files.append(audio_path)
 
-        # Transcribe audio
-        transcript = transcribe_audio_with_gemini(audio_path)
-        if not transcript or not transcript.strip():
-            raise RuntimeError("Transcription returned empty text.")
+def _transcript_cache_name(path_or_url: str, is_youtube: bool) -> Optional[str]:
+    """Blob name of a YouTube video's cached transcript (None for uploaded videos)."""
+    if not is_youtube:
+        return None
+    return f"{YOUTUBE_CACHE_PREFIX}/{youtube_video_id(path_or_url)}/transcript.txt"
 
-        return transcript
 
-    finally:
-        # Cleanup temporary files
-        for f in temp_files:
-            if os.path.exists(f):
-                os.remove(f)
\ No newline at end of file
+def _cached_transcript(transcript_cache_name: Optional[str]) -> Optional[str]:
+    if not transcript_cache_name:
+        return None
+    cached_transcript = get_document_store().backend.get(transcript_cache_name)
+    if cached_transcript is None:
+        return None
+    logger.info(f"Using cached transcript {transcript_cache_name}")
+    return cached_transcript.decode("utf-8")
+
+
+def transcribe_video(path_or_url: str, is_youtube: bool = False):
+    """Download/extract audio from video and transcribe.
+
+    Returns the transcript and the audio extraction stats, with the transcription
+    preprocessing stats under ``"preprocessing"``. YouTube audio and
+    transcripts are cached by video id.
+    """
+    transcript_cache_name = _transcript_cache_name(path_or_url, is_youtube)
+    cached_transcript = _cached_transcript(transcript_cache_name)
+    if cached_transcript is not None:
+        return cached_transcript, {"method": "cache"}
+
+    with _video_audio(path_or_url, is_youtube) as (audio_path, extraction_stats):
+        transcript, preprocessing_stats = transcribe_audio_with_gemini(audio_path)
+    if not transcript or not transcript.strip():
+        raise RuntimeError("Transcription returned empty text.")
+    extraction_stats["preprocessing"] = preprocessing_stats
+
+    if transcript_cache_name:
+        get_document_store().backend.put(
+            transcript_cache_name, transcript.encode("utf-8"), "text/plain"
+        )
+    return transcript, extraction_stats
+
+
+def analyze_video_single_pass(path_or_url: str, is_youtube: bool = False):
+    """Extract the audio of a video and transcribe and analyze it in one model call.
+
+    Returns the transcript, the analysis and the audio extraction stats (see
+    ``analyze_audio_single_pass``). The transcript of a YouTube video is cached
+    like in ``transcribe_video``; a video with a cached transcript isn't downloaded
+    or sent to the model again, only its transcript is analyzed.
+    """
+    transcript_cache_name = _transcript_cache_name(path_or_url, is_youtube)
+    cached_transcript = _cached_transcript(transcript_cache_name)
+    if cached_transcript is not None:
+        analysis = analyze_transcript_with_ai(cached_transcript)
+        extraction_stats = {"method": "cache", "preprocessing": {"mode": "cached_transcript"}}
+        return cached_transcript, analysis, extraction_stats
+
+    with _video_audio(path_or_url, is_youtube) as (audio_path, extraction_stats):
+        transcript, analysis, preprocessing_stats = analyze_audio_single_pass(audio_path)
+    if not transcript:
+        raise RuntimeError("Transcription returned empty text.")
+    extraction_stats["preprocessing"] = preprocessing_stats
+
+    if transcript_cache_name:
+        get_document_store().backend.put(
+            transcript_cache_name, transcript.encode("utf-8"), "text/plain"
+        )
+    return transcript, analysis, extraction_stats
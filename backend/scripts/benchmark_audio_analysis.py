@@ -0,0 +1,100 @@
+"""
+Compare the two audio analysis modes on real recordings.
+
+For each file, runs the two-step path (``transcribe_audio_with_gemini`` then
+``analyze_transcript_with_ai``) and the single-pass path
+(``analyze_audio_single_pass``) and reports wall time, Gemini calls and tokens
+(from ``usage_totals()``). The response cache is disabled so every run reaches the
+API; this costs real quota.
+
+Run from the backend directory with GOOGLE_API_KEY set:
+    python scripts/benchmark_audio_analysis.py pitch.mp3 [more.wav ...] [--runs 3] [--json]
+Locally, put the repository root on PYTHONPATH first (PYTHONPATH=..).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Cached responses would report zero latency and tokens
+os.environ["GEMINI_CACHE_BACKEND"] = ""
+
+
+def two_step(audio_path: str):
+    from modules.transcribe_generator import transcribe_audio_with_gemini
+    from modules.transcript_analysis import analyze_transcript_with_ai
+
+    transcript, _ = transcribe_audio_with_gemini(audio_path)
+    return transcript, analyze_transcript_with_ai(transcript)
+
+
+def single_pass(audio_path: str):
+    from modules.audio_analysis import analyze_audio_single_pass
+
+    transcript, analysis, _ = analyze_audio_single_pass(audio_path)
+    return transcript, analysis
+
+
+MODES = {"two_step": two_step, "single_pass": single_pass}
+
+
+def measure(fn, audio_path: str) -> dict:
+    from senseai_common.gemini_calls import usage_totals
+
+    before = usage_totals()
+    started = time.perf_counter()
+    transcript, analysis = fn(audio_path)
+    seconds = time.perf_counter() - started
+    after = usage_totals()
+    return {
+        "seconds": round(seconds, 2),
+        **{key: after[key] - before[key] for key in after},
+        "transcript_chars": len(transcript),
+        "startups": len(analysis) if isinstance(analysis, list) else 1,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="+", help="audio files to analyze")
+    parser.add_argument("--runs", type=int, default=1, help="runs per file and mode")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for audio_path in args.files:
+        for run in range(args.runs):
+            # Alternate the order so neither mode always runs on a warm connection
+            modes = list(MODES) if run % 2 == 0 else list(reversed(MODES))
+            for mode in modes:
+                result = {"file": os.path.basename(audio_path), "mode": mode, "run": run}
+                result.update(measure(MODES[mode], audio_path))
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'file':30} {'mode':12} {'seconds':>8} {'calls':>6} {'prompt_tok':>11} {'output_tok':>11}")
+    for audio_path in args.files:
+        name = os.path.basename(audio_path)
+        for mode in MODES:
+            runs = [r for r in results if r["file"] == name and r["mode"] == mode]
+            print(
+                f"{name[:30]:30} {mode:12} "
+                f"{statistics.median(r['seconds'] for r in runs):8.2f} "
+                f"{statistics.median(r['calls'] for r in runs):6.0f} "
+                f"{statistics.median(r['prompt_tokens'] for r in runs):11.0f} "
+                f"{statistics.median(r['output_tokens'] for r in runs):11.0f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
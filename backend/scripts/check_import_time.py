@@ -0,0 +1,71 @@
+"""
+Fail the build if importing the backend app gets slow again.
+
+Imports ``main`` in a fresh interpreter, then checks two things:
+- the import finishes within IMPORT_BUDGET_SECONDS (default 3s)
+- none of the heavy media/PDF/Gemini modules were loaded by it
+
+Run from the backend directory (the image's WORKDIR):
+    python scripts/check_import_time.py
+Locally, put the repository root on PYTHONPATH first (PYTHONPATH=..).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the endpoints that need them
+DEFERRED_MODULES = [
+    "librosa",
+    "numba",
+    "scipy",
+    "sklearn",
+    "soundfile",
+    "yt_dlp",
+    "fitz",
+    "PIL",
+    "google.generativeai",
+    "google.genai",
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def main() -> int:
+    budget = float(os.getenv("IMPORT_BUDGET_SECONDS", "3"))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    loaded = set(report["modules"])
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+
+    print(f"import main: {report['seconds']:.2f}s (budget {budget:.2f}s)")
+    failed = False
+    if eager:
+        print(f"Heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if report["seconds"] > budget:
+        print("Startup import time exceeds the budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
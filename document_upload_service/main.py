@@ -2,6 +2,7 @@
 Firebase Upload API using FastAPI
 """
 
+import asyncio
 import io
 import logging
 import os
@@ -75,6 +76,44 @@ else:
         bucket = None
 
 
+# -------------------------------------------
+# ✅ Storage uploads
+# -------------------------------------------
+# Files go to Storage straight from the upload's spooled temp file through a resumable
+# upload, one chunk at a time, so memory per file stays at one chunk (must be a
+# multiple of 256 KiB). The blocking upload runs in a worker thread and the files of
+# one request upload concurrently.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_MB", "8")) * 1024 * 1024
+
+
+def _upload_blob(blob, file, size: Optional[int], content_type: Optional[str]):
+    if size is None or size > UPLOAD_CHUNK_SIZE:
+        blob.chunk_size = UPLOAD_CHUNK_SIZE
+    blob.upload_from_file(file, size=size, content_type=content_type, rewind=True)
+    try:
+        blob.make_public()
+    except Exception:
+        pass
+
+
+async def _upload_file(record_id: str, file_obj: Optional[UploadFile]):
+    """Upload ``file_obj`` under the record's folder and return its file info."""
+    if not file_obj:
+        return None
+    blob_path = f"records/{record_id}/{file_obj.filename}"
+    blob = bucket.blob(blob_path)
+    logger.info(f"Uploading file to {blob_path}")
+    await asyncio.to_thread(
+        _upload_blob, blob, file_obj.file, file_obj.size, file_obj.content_type
+    )
+    return {
+        "filename": file_obj.filename,
+        "storage_path": blob_path,
+        "content_type": file_obj.content_type,
+        "public_url": blob.public_url,
+    }
+
+
 # -------------------------------------------
 # ✅ FastAPI App Setup
 # -------------------------------------------
@@ -137,46 +176,12 @@ async def create_record(
     try:
         record_id = str(uuid.uuid4())
 
-        async def _upload_file(file_obj: UploadFile):
-            if not file_obj:
-                return None
-            blob_path = f"records/{record_id}/{file_obj.filename}"
-            blob = bucket.blob(blob_path)
-            contents = None
-            # Prefer the async read() provided by Starlette's UploadFile
-            try:
-                contents = await file_obj.read()
-            except Exception:
-                # fallback to synchronous file read (e.g., when running in some test environments)
-                try:
-                    if hasattr(file_obj, "file") and hasattr(file_obj.file, "read"):
-                        contents = file_obj.file.read()
-                except Exception:
-                    contents = None
-
-            if contents is None:
-                # Nothing to upload
-                return None
-
-            logger.info(f"Uploading file to {blob_path}")
-            blob.upload_from_string(contents, content_type=file_obj.content_type)
-            try:
-                blob.make_public()
-            except Exception:
-                pass
-            return {
-                "filename": file_obj.filename,
-                "storage_path": blob_path,
-                "content_type": file_obj.content_type,
-                "public_url": blob.public_url,
-            }
-
-        # Upload each provided file (await async helper so contents are read correctly)
-        english_info = await _upload_file(english_audio)
-        hindi_info = await _upload_file(hindi_audio)
-        report_md_info = await _upload_file(report_md)
-        report_pdf_info = (
-            await _upload_file(report_pdf) if report_pdf is not None else None
+        # Upload all provided files concurrently
+        english_info, hindi_info, report_md_info, report_pdf_info = await asyncio.gather(
+            _upload_file(record_id, english_audio),
+            _upload_file(record_id, hindi_audio),
+            _upload_file(record_id, report_md),
+            _upload_file(record_id, report_pdf),
         )
 
         # parse speakers JSON if provided
@@ -280,44 +285,18 @@ async def update_record(
             # ignore parse errors and skip updating speakers
             pass
 
-    async def _upload_and_build(file_obj: UploadFile):
-        if not file_obj:
-            return None
-        blob_path = f"records/{record_id}/{file_obj.filename}"
-        blob = bucket.blob(blob_path)
-        contents = None
-        try:
-            contents = await file_obj.read()
-        except Exception:
-            try:
-                if hasattr(file_obj, "file") and hasattr(file_obj.file, "read"):
-                    contents = file_obj.file.read()
-            except Exception:
-                contents = None
-
-        if contents is None:
-            return None
-
-        blob.upload_from_string(contents, content_type=file_obj.content_type)
-        try:
-            blob.make_public()
-        except Exception:
-            pass
-        return {
-            "filename": file_obj.filename,
-            "storage_path": blob_path,
-            "content_type": file_obj.content_type,
-            "public_url": blob.public_url,
-        }
-
-    if english_audio is not None:
-        updated_data["english"] = await _upload_and_build(english_audio)
-    if hindi_audio is not None:
-        updated_data["hindi"] = await _upload_and_build(hindi_audio)
-    if report_md is not None:
-        updated_data["report_md"] = await _upload_and_build(report_md)
-    if report_pdf is not None:
-        updated_data["report_pdf"] = await _upload_and_build(report_pdf)
+    # Upload the replaced files concurrently
+    files = {
+        "english": english_audio,
+        "hindi": hindi_audio,
+        "report_md": report_md,
+        "report_pdf": report_pdf,
+    }
+    files = {key: file_obj for key, file_obj in files.items() if file_obj is not None}
+    uploaded = await asyncio.gather(
+        *(_upload_file(record_id, file_obj) for file_obj in files.values())
+    )
+    updated_data.update(zip(files, uploaded))
 
     if updated_data:
         doc_ref.update(updated_data)
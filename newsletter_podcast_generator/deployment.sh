@@ -16,10 +16,12 @@ export SERVICE_NAME="main-podcast-generator-service-vs1" # ---- Change service n
 export ROOT_DIR="newsletter_podcast_generator" # ---- Change name
 export GOOGLE_API_KEY="" # ---- Change Google API key
 export ARTIFACT_REPO_NAME="startup-evaluator-repo"
+# ---- Shared document store, the same bucket for every service
+export DOCUMENT_STORE_BUCKET="sense-ai-documents" # ---- Change document store bucket name
 export STORAGE_BUCKET="sense-ai-podcasts" # ---- Change storage bucket name
 
 # ---- For --substitutions CLI option
-export SUBSTITUTIONS="_SERVICE_NAME=${SERVICE_NAME},_ROOT_DIR=${ROOT_DIR},_GOOGLE_GENAI_USE_VERTEXAI=false,_GOOGLE_API_KEY=${GOOGLE_API_KEY},_ARTIFACT_REPO_NAME=${ARTIFACT_REPO_NAME},_STORAGE_BUCKET=${STORAGE_BUCKET}"
+export SUBSTITUTIONS="_SERVICE_NAME=${SERVICE_NAME},_ROOT_DIR=${ROOT_DIR},_GOOGLE_GENAI_USE_VERTEXAI=false,_GOOGLE_API_KEY=${GOOGLE_API_KEY},_ARTIFACT_REPO_NAME=${ARTIFACT_REPO_NAME},_STORAGE_BUCKET=${STORAGE_BUCKET},_DOCUMENT_STORE_BUCKET=${DOCUMENT_STORE_BUCKET}"
 
 # ---- Create trigger command with above set env vars passed via CLI options
 gcloud builds triggers create github \
@@ -1,8 +0,0 @@
-# REASONING: Use for complex logic, planning, and coding tasks
-GEMINI_LARGE = "gemini-2.5-pro"
-
-# SPEED: Use for chat loops, summarization, and quick tool usage
-GEMINI_SMALL = "gemini-2.0-flash"
-
-# VOICE: Stable, low-latency text-to-speech
-TTS_MODEL = "gemini-2.5-flash-preview-tts"
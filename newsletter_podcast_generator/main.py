@@ -17,7 +17,6 @@ from typing import Tuple, Optional
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
-from google import genai
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
@@ -34,7 +33,8 @@ from startup_agent import (
 )
 from newsletter_agent import newsletter_agent, VALID_SECTORS
 
-from gemini_model_config import GEMINI_SMALL
+from senseai_common.gemini_model_config import GEMINI_SMALL, get_genai_client
+from senseai_common.gemini_calls import client_generate_content_async
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
@@ -298,7 +298,7 @@ async def upload_to_firebase(
 async def validate_startup_name(startup_name: str) -> Tuple[bool, str]:
     """Validate if this is a legitimate Indian startup using Gemini."""
     try:
-        client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        client = get_genai_client()
 
         prompt = f"""Determine if "{startup_name}" is a legitimate Indian startup or company.
 
@@ -311,7 +311,7 @@ Consider:
 Respond with ONLY JSON:
 {{"is_valid_startup": true/false, "reason": "brief explanation", "sector": "industry sector if valid"}}"""
 
-        response = client.models.generate_content(model=GEMINI_SMALL, contents=prompt)
+        response = await client_generate_content_async(client, model=GEMINI_SMALL, contents=prompt)
 
         response_text = response.text.strip()
 
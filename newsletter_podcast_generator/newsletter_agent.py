@@ -24,11 +24,12 @@ import wave
 
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.tools import google_search, ToolContext
-from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
-from gemini_model_config import GEMINI_SMALL, TTS_MODEL
+from senseai_common.gemini_model_config import GEMINI_SMALL, TTS_MODEL, get_genai_client
+from senseai_common.adk_models import governed_model
+from senseai_common.gemini_calls import client_generate_content_async
 
 
 # --- Configuration ---
@@ -179,14 +180,15 @@ async def generate_newsletter_audio(
         script_chunks = chunk_script(clean_script)
         print(f"Split newsletter script into {len(script_chunks)} chunks")
 
-        client = genai.Client()
+        client = get_genai_client()
 
         # Generate English audio
         english_audio_chunks = []
         for i, chunk in enumerate(script_chunks):
             print(f"Processing English chunk {i+1}/{len(script_chunks)}...")
 
-            english_response = client.models.generate_content(
+            english_response = await client_generate_content_async(
+                client,
                 model=TTS_MODEL,
                 contents=f"TTS the following sector newsletter conversation between Priya and Arjun:\n\n{chunk}",
                 config=types.GenerateContentConfig(
@@ -214,6 +216,7 @@ async def generate_newsletter_audio(
                         )
                     ),
                 ),
+                cache=False,
             )
 
             chunk_data = (
@@ -228,7 +231,8 @@ async def generate_newsletter_audio(
         print(f"English newsletter audio saved: {len(english_data)} bytes")
 
         # Translate to Hindi
-        translation_response = client.models.generate_content(
+        translation_response = await client_generate_content_async(
+            client,
             model=GEMINI_SMALL,
             contents=f"""Translate this English sector newsletter podcast to natural Hindi.
 Keep speaker labels (Priya: and Arjun:) and maintain conversational tone.
@@ -252,7 +256,8 @@ Return ONLY the translated conversation with labels.""",
         for i, chunk in enumerate(hindi_chunks):
             print(f"Processing Hindi chunk {i+1}/{len(hindi_chunks)}...")
 
-            hindi_response = client.models.generate_content(
+            hindi_response = await client_generate_content_async(
+                client,
                 model=TTS_MODEL,
                 contents=f"TTS the following sector newsletter conversation between Priya and Arjun:\n\n{chunk}",
                 config=types.GenerateContentConfig(
@@ -280,6 +285,7 @@ Return ONLY the translated conversation with labels.""",
                         )
                     ),
                 ),
+                cache=False,
             )
 
             chunk_data = hindi_response.candidates[0].content.parts[0].inline_data.data
@@ -313,7 +319,7 @@ Return ONLY the translated conversation with labels.""",
 # Agent 1: Sector Research Agent
 sector_research_agent = LlmAgent(
     name="SectorResearchAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction=f"""You are a Sector Research Analyst for Let's Venture Platform.
 
 Your task: Research comprehensive sector updates for investor newsletter.
@@ -373,7 +379,7 @@ CRITICAL RULES:
 # Agent 2: Newsletter Writing Agent
 newsletter_writing_agent = LlmAgent(
     name="NewsletterWritingAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Newsletter Editor for Let's Venture Platform.
 
 Your task: Transform sector research into a compelling investor newsletter.
@@ -495,7 +501,7 @@ CRITICAL: After creating newsletter, call save_newsletter_content with:
 # Agent 3: Podcast Script Agent
 podcast_script_agent = LlmAgent(
     name="PodcastScriptAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Podcast Script Writer for Let's Venture Platform.
 
 Your task: Convert newsletter into a 2-3 minute conversational podcast.
@@ -564,7 +570,7 @@ RULES:
 # Agent 4: Audio Generation Agent
 newsletter_audio_agent = LlmAgent(
     name="NewsletterAudioAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Audio Production Specialist for sector newsletters.
 
 Your task: Generate English and Hindi audio from podcast script.
@@ -16,16 +16,23 @@ from typing import Dict, List
 import pathlib
 import wave
 import base64
+import asyncio
 
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.tools import google_search, ToolContext
-from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
-from gemini_model_config import GEMINI_SMALL, TTS_MODEL
+from senseai_common.gemini_model_config import GEMINI_SMALL, TTS_MODEL, get_genai_client
+from senseai_common.adk_models import governed_model
+from senseai_common.document_store import get_document_store
+from senseai_common.gemini_calls import client_generate_content_async
 
 
+# Name of the parsed-PDF result in the shared document store. Bump the version when
+# the prompt changes so stored results are recomputed.
+PDF_PARSE_RESULT = "startup_pdf_parse_v1"
+
 WHITELIST_DOMAINS = [
     "economictimes.indiatimes.com",
     "yourstory.com",
@@ -96,13 +103,32 @@ def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
         wf.writeframes(pcm)
 
 
-async def parse_pdf_multimodal(pdf_path: str, tool_context: ToolContext) -> Dict:
-    """Parse startup PDF using Gemini's multimodal capabilities."""
+async def parse_pdf_multimodal(
+    pdf_path: str, tool_context: ToolContext, refresh: bool = False
+) -> Dict:
+    """Parse startup PDF using Gemini's multimodal capabilities.
+
+    A document parsed before (same content) returns the stored result; pass
+    refresh=True to parse it again.
+    """
     try:
-        with open(pdf_path, "rb") as pdf_file:
-            pdf_data = base64.standard_b64encode(pdf_file.read()).decode("utf-8")
+        # Storage I/O and PDF parsing run off the event loop
+        store = get_document_store()
+        doc_id = await asyncio.to_thread(store.put_file, pdf_path)
+        parsed_content = (
+            None if refresh else await asyncio.to_thread(store.get_result, doc_id, PDF_PARSE_RESULT)
+        )
+        if parsed_content is not None:
+            return {
+                "status": "success",
+                "content": parsed_content,
+                "message": f"Successfully parsed PDF: {pdf_path}",
+            }
+
+        source = await asyncio.to_thread(store.source, doc_id)
+        pdf_data = base64.standard_b64encode(source).decode("utf-8")
 
-        client = genai.Client()
+        client = get_genai_client()
 
         prompt = """Analyze this startup document for investment analysis:
 
@@ -126,7 +152,8 @@ Return ONLY valid JSON:
     "competitive_advantages": ["list"]
 }"""
 
-        response = client.models.generate_content(
+        response = await client_generate_content_async(
+            client,
             model=GEMINI_SMALL,
             contents=[
                 types.Content(
@@ -153,6 +180,7 @@ Return ONLY valid JSON:
         import json
 
         parsed_content = json.loads(response_text)
+        await asyncio.to_thread(store.put_result, doc_id, PDF_PARSE_RESULT, parsed_content)
 
         return {
             "status": "success",
@@ -231,14 +259,15 @@ async def generate_podcast_audio(
         script_chunks = chunk_script(clean_script)
         print(f"Split script into {len(script_chunks)} chunks for processing")
 
-        client = genai.Client()
+        client = get_genai_client()
 
         # Process English audio chunks
         english_audio_chunks = []
         for i, chunk in enumerate(script_chunks):
             print(f"Processing English chunk {i + 1}/{len(script_chunks)}...")
 
-            english_response = client.models.generate_content(
+            english_response = await client_generate_content_async(
+                client,
                 model=TTS_MODEL,
                 contents=f"TTS the following investment analysis conversation between Avantika and Hrishikesh:\n\n{chunk}",
                 config=types.GenerateContentConfig(
@@ -266,6 +295,7 @@ async def generate_podcast_audio(
                         )
                     ),
                 ),
+                cache=False,
             )
 
             chunk_data = (
@@ -280,7 +310,8 @@ async def generate_podcast_audio(
         print(f"English audio saved: {len(english_data)} bytes")
 
         # Translate to Hindi
-        translation_response = client.models.generate_content(
+        translation_response = await client_generate_content_async(
+            client,
             model=GEMINI_SMALL,
             contents=f"""Translate this English startup analysis podcast to natural Hindi.
 Keep speaker labels (Avantika: and Hrishikesh:) and maintain conversational tone.
@@ -306,7 +337,8 @@ Return ONLY the translated conversation with labels, no stage directions.""",
         for i, chunk in enumerate(hindi_chunks):
             print(f"Processing Hindi chunk {i + 1}/{len(hindi_chunks)}...")
 
-            hindi_response = client.models.generate_content(
+            hindi_response = await client_generate_content_async(
+                client,
                 model=TTS_MODEL,
                 contents=f"TTS the following investment analysis conversation between Avantika and Hrishikesh:\n\n{chunk}",
                 config=types.GenerateContentConfig(
@@ -334,6 +366,7 @@ Return ONLY the translated conversation with labels, no stage directions.""",
                         )
                     ),
                 ),
+                cache=False,
             )
 
             chunk_data = hindi_response.candidates[0].content.parts[0].inline_data.data
@@ -367,7 +400,7 @@ Return ONLY the translated conversation with labels, no stage directions.""",
 # Agent 1: Startup Research Agent
 startup_research_agent = LlmAgent(
     name="StartupResearchAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction=f"""You are an Investment Research Analyst specializing in Indian startups.
 
 Your task: Research comprehensive information about the specified Indian startup for investor analysis.
@@ -426,7 +459,7 @@ CRITICAL RULES:
 # Agent 2: Analysis Synthesis Agent
 analysis_synthesis_agent = LlmAgent(
     name="AnalysisSynthesisAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Investment Analysis Specialist.
 
 Your task: Synthesize research data into a structured investment analysis.
@@ -458,7 +491,7 @@ RULES:
 # Agent 3: Investment Report Agent
 investment_report_agent = LlmAgent(
     name="InvestmentReportAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Investment Report Writer for Let's Venture Platform.
 
 Your task: Create a comprehensive markdown investment analysis report.
@@ -539,7 +572,7 @@ CRITICAL: After creating the markdown content, you MUST call save_markdown_repor
 # Agent 3.5: Summary Report Agent
 summary_report_agent = LlmAgent(
     name="SummaryReportAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Podcast Summary Writer for investors.
 
 Your task: Create a concise executive summary of the investment analysis podcast.
@@ -597,7 +630,7 @@ CRITICAL: After creating the summary, call save_markdown_report with:
 # Agent 4: Script Writing Agent
 script_writing_agent = LlmAgent(
     name="ScriptWritingAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Investment Podcast Script Writer for Let's Venture Platform.
 
 Your task: Convert the investment analysis into an engaging, professional conversation for investors.
@@ -653,7 +686,7 @@ CRITICAL RULES:
 # Agent 5: Audio Generation Agent
 audio_generation_agent = LlmAgent(
     name="AudioGenerationAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Audio Production Specialist for investment podcasts.
 
 Your task: Generate high-quality podcast audio in English and Hindi.
@@ -694,7 +727,7 @@ startup_analysis_pipeline = SequentialAgent(
 
 pdf_parser_agent = LlmAgent(
     name="PDFParserAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Startup Document Analyst.
 
 Your task: Extract investment-relevant information from startup PDFs.
@@ -717,7 +750,7 @@ RULES:
 
 pdf_enrichment_agent = LlmAgent(
     name="PDFEnrichmentAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Market Research Specialist.
 
 Your task: Enrich PDF data with external market research and news.
@@ -741,7 +774,7 @@ RULES:
 
 pdf_report_synthesis_agent = LlmAgent(
     name="PDFReportSynthesisAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Investment Report Writer for PDF-based analysis.
 
 Your task: Create investment analysis report from PDF insights and research.
@@ -761,7 +794,7 @@ CRITICAL: After creating the markdown content, call save_markdown_report with:
 
 pdf_summary_report_agent = LlmAgent(
     name="PDFSummaryReportAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Podcast Summary Writer for PDF-based analysis.
 
 Your task: Create concise summary of the PDF analysis podcast.
@@ -778,7 +811,7 @@ CRITICAL: After creating the summary, call save_markdown_report with:
 
 pdf_script_writing_agent = LlmAgent(
     name="PDFScriptWritingAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Investment Podcast Script Writer for PDF-based analysis.
 
 Your task: Transform PDF analysis into investor-focused conversation.
@@ -802,7 +835,7 @@ NO stage directions in asterisks""",
 
 pdf_script_saver_agent = LlmAgent(
     name="PDFScriptSaverAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are a Script File Manager.
 
 Your task: Save the podcast script to a text file.
@@ -815,7 +848,7 @@ Save as 'podcast_script.txt' with speaker labels intact.""",
 
 pdf_audio_generation_agent = LlmAgent(
     name="PDFAudioGenerationAgent",
-    model=GEMINI_SMALL,
+    model=governed_model(GEMINI_SMALL),
     instruction="""You are an Audio Production Specialist for PDF-based investment podcasts.
 
 Your task: Generate English and Hindi audio from PDF analysis script.
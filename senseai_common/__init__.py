@@ -0,0 +1,5 @@
+"""Code shared by the SenseAI Python services (backend, agents, newsletter_podcast_generator).
+
+Each service image copies this package next to its own sources. For local runs,
+put the repository root on ``PYTHONPATH`` (e.g. ``PYTHONPATH=.. python main.py``).
+"""
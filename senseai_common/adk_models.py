@@ -0,0 +1,111 @@
+"""
+ADK model classes used by the agent pipelines.
+
+Agents are declared with ``model=governed_model(GEMINI_SMALL)`` instead of a bare model
+name so that every LLM call made by ADK (including ParallelAgent fan-outs) passes
+through the process-wide governor and the latency-SLO router. Agents whose output
+tolerates a faster, weaker model are declared with ``degradable=True``.
+
+Each response is tagged with the model that served it (``custom_metadata``), which
+``model_routing_from_events`` turns into a per-agent record for the caller. Agents
+that run inside an ``AgentTool`` don't emit events to the outer runner, so they
+declare ``after_model_callback=record_model_routing``: it writes the record to
+session state, and ``AgentTool`` forwards state changes to the calling session.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, AsyncGenerator, Dict, Iterable, Optional
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+
+from senseai_common.governor import get_governor
+from senseai_common.model_router import get_model_router
+
+ROUTING_KEYS = ("model", "model_tier", "degraded")
+# Session state key prefix of the per-agent routing records
+ROUTING_STATE_PREFIX = "model_routing:"
+
+
+class GovernedGemini(Gemini):
+    """Gemini model whose requests wait for a governor slot and back off on 429/503.
+
+    When ``degradable`` is set, requests are moved to the fallback tier while the
+    requested model breaches its latency SLO.
+    """
+
+    degradable: bool = False
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        governor = get_governor()
+        router = get_model_router()
+        requested = llm_request.model or self.model
+        model = router.route(requested, self.degradable)
+        llm_request.model = model
+        routing = {
+            "model": model,
+            "model_tier": router.tier_of(model),
+            "degraded": model != requested,
+        }
+
+        for attempt in itertools.count():
+            started_yielding = False
+            try:
+                async with governor.slot_async(model):
+                    started_at = time.monotonic()
+                    try:
+                        async for response in super().generate_content_async(
+                            llm_request, stream
+                        ):
+                            started_yielding = True
+                            response.custom_metadata = {
+                                **(response.custom_metadata or {}),
+                                **routing,
+                            }
+                            yield response
+                    except Exception:
+                        router.observe(model, time.monotonic() - started_at, ok=False)
+                        raise
+                    router.observe(model, time.monotonic() - started_at, ok=True)
+                return
+            except Exception as e:
+                # A partially streamed response cannot be replayed
+                if started_yielding or not governor.should_retry(e, attempt):
+                    raise
+            await asyncio.sleep(governor.backoff_delay(attempt))
+
+
+def governed_model(model: str, degradable: bool = False) -> GovernedGemini:
+    """Build the ADK model for ``model`` (a name from ``senseai_common.gemini_model_config``)."""
+    return GovernedGemini(model=model, degradable=degradable)
+
+
+def record_model_routing(callback_context, llm_response) -> Optional[Any]:
+    """``after_model_callback`` that records the serving model in session state."""
+    metadata = llm_response.custom_metadata or {}
+    if "model" in metadata:
+        callback_context.state[ROUTING_STATE_PREFIX + callback_context.agent_name] = {
+            key: metadata[key] for key in ROUTING_KEYS
+        }
+    return None
+
+
+def model_routing_from_events(events: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """Map each agent of a finished run to the model (and tier) that served it.
+
+    Covers agents whose responses are among ``events`` and, through state changes,
+    agents that ran inside an ``AgentTool`` with ``record_model_routing``.
+    """
+    routing = {}
+    for event in events:
+        metadata = getattr(event, "custom_metadata", None) or {}
+        if "model" in metadata:
+            routing[event.author] = {key: metadata[key] for key in ROUTING_KEYS}
+        actions = getattr(event, "actions", None)
+        for key, value in (getattr(actions, "state_delta", None) or {}).items():
+            if key.startswith(ROUTING_STATE_PREFIX):
+                routing[key[len(ROUTING_STATE_PREFIX):]] = value
+    return routing
@@ -0,0 +1,406 @@
+"""
+Content-addressed store for uploaded documents and everything derived from them.
+
+The same pitch deck is uploaded to several endpoints across services. Each document
+is stored once, keyed by the SHA-256 of its bytes, together with its derived
+artifacts so no consumer has to re-parse, re-render or re-analyze it:
+
+    documents/<sha256>/source.pdf
+    documents/<sha256>/metadata.json          page count, size, PDF metadata, filenames
+    documents/<sha256>/text.json              extracted text, one entry per page
+    documents/<sha256>/page_profiles.json     text/image classification signals per page
+    documents/<sha256>/pages/<variant>/...    rendered page images + manifest.json
+    documents/<sha256>/results/<name>.json    analysis results recorded by each service
+
+Artifacts are computed on first request and written back; writes are idempotent
+because identical bytes always map to the same key.
+
+Configuration (environment):
+- DOCUMENT_STORE_BACKEND: "disk" (default) or "gcs"
+- DOCUMENT_STORE_DIR: disk backend root (default: <tmp>/senseai_documents)
+- DOCUMENT_STORE_MAX_BYTES: disk backend size bound, LRU-evicted (default 1 GiB)
+- DOCUMENT_STORE_BUCKET, DOCUMENT_STORE_PREFIX: GCS bucket and object prefix
+
+The disk backend is for local development: it is private to one host, so services
+only share documents through it when they run side by side. Deployed services use
+"gcs" with one bucket (see each service's cloudbuild.yaml); on Cloud Run the disk
+backend would also live in instance memory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from senseai_common.page_classifier import IMAGE, PageProfile, classify_pdf
+from senseai_common.pdf_render import (
+    RENDER_DPI,
+    RENDER_FORMAT,
+    RENDER_MAX_DIMENSION,
+    RENDER_QUALITY,
+    RenderedPage,
+    render_pdf_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def document_id(data: bytes) -> str:
+    """Content address of a document."""
+    return hashlib.sha256(data).hexdigest()
+
+
+# ===============================
+# Backends
+# ===============================
+class DiskBlobBackend:
+    """Blobs as files under ``directory``; evicts the least recently used above ``max_bytes``.
+
+    A document (``documents/<sha256>/``) is evicted as a whole, so its artifacts never
+    outlive its source; other blobs (e.g. cached embeddings) are evicted one by one.
+    """
+
+    # Directories kept here that aren't blobs (the vector index's working files)
+    UNMANAGED = ("vector_index",)
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def get(self, name: str) -> Optional[bytes]:
+        path = self.directory / name
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Touch the file so eviction keeps recently read blobs
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def exists(self, name: str) -> bool:
+        return (self.directory / name).exists()
+
+    def list(self, prefix: str) -> List[str]:
+        """Names of the blobs under ``prefix``, sorted."""
+        return sorted(
+            path.relative_to(self.directory).as_posix()
+            for path in (self.directory / prefix).rglob("*")
+            if path.is_file() and path.suffix != ".tmp"
+        )
+
+    def put(self, name: str, data: bytes, content_type: str) -> None:
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._units())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _units(self) -> List[Tuple[float, int, Path]]:
+        """(last use, size, path) of every eviction unit: document directories and loose blobs."""
+        units = []
+        for top in self.directory.iterdir():
+            if top.name in self.UNMANAGED:
+                continue
+            if top.name == "documents":
+                paths = list(top.iterdir())
+            elif top.is_dir():
+                paths = [path for path in top.rglob("*") if path.is_file()]
+            else:
+                paths = [top]
+            for path in paths:
+                files = list(path.rglob("*")) if path.is_dir() else [path]
+                stats = []
+                for file in files:
+                    try:
+                        if file.is_file():
+                            stats.append(file.stat())
+                    except FileNotFoundError:
+                        continue
+                if stats:
+                    units.append(
+                        (max(st.st_mtime for st in stats), sum(st.st_size for st in stats), path)
+                    )
+        return units
+
+    def _evict(self) -> None:
+        """Drop the least recently used units until the store is at 90% of its bound."""
+        units = self._units()
+        total = sum(size for _, size, _ in units)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(units):
+            if total <= target:
+                break
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+        logger.info(f"Document store evicted down to {total} bytes")
+
+
+class GCSBlobBackend:
+    """Blobs as objects in a Cloud Storage bucket."""
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.bucket_name = bucket
+        self.prefix = prefix.strip("/")
+        self._bucket = None
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            from google.cloud import storage
+
+            self._bucket = storage.Client().bucket(self.bucket_name)
+        return self._bucket
+
+    def _blob(self, name: str):
+        return self.bucket.blob(f"{self.prefix}/{name}" if self.prefix else name)
+
+    def get(self, name: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return self._blob(name).download_as_bytes()
+        except NotFound:
+            return None
+
+    def exists(self, name: str) -> bool:
+        return self._blob(name).exists()
+
+    def list(self, prefix: str) -> List[str]:
+        """Names of the blobs under ``prefix``, sorted."""
+        full_prefix = f"{self.prefix}/{prefix}" if self.prefix else prefix
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        return sorted(blob.name[strip:] for blob in self.bucket.list_blobs(prefix=full_prefix))
+
+    def put(self, name: str, data: bytes, content_type: str) -> None:
+        self._blob(name).upload_from_string(data, content_type=content_type)
+
+
+# ===============================
+# Store
+# ===============================
+class DocumentStore:
+    """Stores documents by content hash and memoizes their derived artifacts."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _path(doc_id: str, name: str) -> str:
+        return f"documents/{doc_id}/{name}"
+
+    def _get_json(self, doc_id: str, name: str) -> Optional[Any]:
+        data = self.backend.get(self._path(doc_id, name))
+        return json.loads(data) if data is not None else None
+
+    def _put_json(self, doc_id: str, name: str, value: Any) -> None:
+        self.backend.put(
+            self._path(doc_id, name),
+            json.dumps(value, ensure_ascii=False).encode("utf-8"),
+            "application/json",
+        )
+
+    # --- Documents ---
+    def put(self, data: bytes, filename: Optional[str] = None) -> str:
+        """Store ``data`` (if new) and return its document id."""
+        doc_id = document_id(data)
+        source = self._path(doc_id, "source.pdf")
+        if not self.backend.exists(source):
+            self.backend.put(source, data, "application/pdf")
+            logger.info(f"Stored document {doc_id[:12]} ({len(data)} bytes)")
+
+        metadata = self._get_json(doc_id, "metadata.json")
+        changed = metadata is None
+        if metadata is None:
+            metadata = self._build_metadata(data)
+        if filename and filename not in metadata["filenames"]:
+            metadata["filenames"].append(filename)
+            changed = True
+        if changed:
+            self._put_json(doc_id, "metadata.json", metadata)
+        return doc_id
+
+    def put_file(self, path: str, filename: Optional[str] = None) -> str:
+        """Store the file at ``path`` and return its document id."""
+        with open(path, "rb") as f:
+            data = f.read()
+        return self.put(data, filename or os.path.basename(path))
+
+    def source(self, doc_id: str) -> bytes:
+        data = self.backend.get(self._path(doc_id, "source.pdf"))
+        if data is None:
+            raise KeyError(f"Unknown document: {doc_id}")
+        return data
+
+    @staticmethod
+    def _build_metadata(data: bytes) -> Dict[str, Any]:
+        import fitz  # PyMuPDF
+
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return {
+                "size_bytes": len(data),
+                "page_count": doc.page_count,
+                "pdf_metadata": {k: v for k, v in (doc.metadata or {}).items() if v},
+                "filenames": [],
+            }
+
+    def metadata(self, doc_id: str) -> Dict[str, Any]:
+        metadata = self._get_json(doc_id, "metadata.json")
+        if metadata is None:
+            metadata = self._build_metadata(self.source(doc_id))
+            self._put_json(doc_id, "metadata.json", metadata)
+        return metadata
+
+    # --- Derived artifacts ---
+    def page_texts(self, doc_id: str) -> List[str]:
+        """Extracted text of each page, in page order."""
+        texts = self._get_json(doc_id, "text.json")
+        if texts is None:
+            import fitz  # PyMuPDF
+
+            with fitz.open(stream=self.source(doc_id), filetype="pdf") as doc:
+                texts = [page.get_text("text") for page in doc]
+            self._put_json(doc_id, "text.json", texts)
+        return texts
+
+    def page_images(
+        self,
+        doc_id: str,
+        image_format: Optional[str] = None,
+        quality: Optional[int] = None,
+        max_dimension: Optional[int] = None,
+        dpi: Optional[int] = None,
+    ) -> List[RenderedPage]:
+        """Rendered pages (see ``pdf_render``), stored per rendering variant."""
+        image_format = (image_format or RENDER_FORMAT).lower()
+        quality = quality or RENDER_QUALITY
+        max_dimension = max_dimension or RENDER_MAX_DIMENSION
+        dpi = dpi or RENDER_DPI
+        variant = f"pages/{image_format}-q{quality}-{max_dimension}px-{dpi}dpi"
+
+        manifest = self._get_json(doc_id, f"{variant}/manifest.json")
+        if manifest is not None:
+            names = [self._path(doc_id, f"{variant}/{entry['name']}") for entry in manifest]
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                blobs = list(executor.map(self.backend.get, names))
+            # A missing page (e.g. a partially written variant) falls through to re-render
+            if all(blob is not None for blob in blobs):
+                return [
+                    RenderedPage(data=blob, **entry["page"])
+                    for blob, entry in zip(blobs, manifest)
+                ]
+
+        pages = render_pdf_pages(
+            self.source(doc_id), image_format, quality, max_dimension, dpi
+        )
+        manifest = []
+        for page in pages:
+            name = f"{page.page_number}.{image_format}"
+            self.backend.put(self._path(doc_id, f"{variant}/{name}"), page.data, page.mime_type)
+            manifest.append(
+                {
+                    "name": name,
+                    "page": {
+                        "page_number": page.page_number,
+                        "mime_type": page.mime_type,
+                        "width": page.width,
+                        "height": page.height,
+                    },
+                }
+            )
+        self._put_json(doc_id, f"{variant}/manifest.json", manifest)
+        return pages
+
+    def page_profiles(self, doc_id: str) -> List[PageProfile]:
+        """Classification signals of each page (see ``page_classifier``)."""
+        profiles = self._get_json(doc_id, "page_profiles.json")
+        if profiles is None:
+            profiles = [profile.to_dict() for profile in classify_pdf(self.source(doc_id))]
+            self._put_json(doc_id, "page_profiles.json", profiles)
+        return [PageProfile(**profile) for profile in profiles]
+
+    def page_parts(self, doc_id: str) -> List[List[Any]]:
+        """Model input for each page: its extracted text, or its image for visual pages.
+
+        Every page starts with a ``[Page N]`` marker so the model can cite page numbers
+        even though pages arrive in mixed form.
+        """
+        profiles = self.page_profiles(doc_id)
+        texts = self.page_texts(doc_id)
+        images = None
+        if any(profile.kind == IMAGE for profile in profiles):
+            images = self.page_images(doc_id)
+
+        parts = []
+        for profile, text in zip(profiles, texts):
+            marker = f"[Page {profile.page_number}]"
+            if profile.kind == IMAGE:
+                parts.append([marker, images[profile.page_number - 1].as_part()])
+            else:
+                parts.append([f"{marker}\n{text.strip()}"])
+        return parts
+
+    # --- Analysis results ---
+    def get_result(self, doc_id: str, name: str) -> Optional[Any]:
+        """Result recorded by a service under ``name`` (e.g. "pitch_deck_analysis")."""
+        return self._get_json(doc_id, f"results/{name}.json")
+
+    def put_result(self, doc_id: str, name: str, value: Any) -> None:
+        self._put_json(doc_id, f"results/{name}.json", value)
+
+
+_store: Optional[DocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Return the process-wide document store configured from the environment."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend_name = os.getenv("DOCUMENT_STORE_BACKEND", "disk").strip().lower()
+                if backend_name == "gcs":
+                    if not os.getenv("DOCUMENT_STORE_BUCKET"):
+                        raise ValueError("DOCUMENT_STORE_BACKEND=gcs requires DOCUMENT_STORE_BUCKET")
+                    backend = GCSBlobBackend(
+                        os.environ["DOCUMENT_STORE_BUCKET"],
+                        os.getenv("DOCUMENT_STORE_PREFIX", "document_store"),
+                    )
+                else:
+                    backend = DiskBlobBackend(
+                        os.getenv(
+                            "DOCUMENT_STORE_DIR",
+                            os.path.join(tempfile.gettempdir(), "senseai_documents"),
+                        ),
+                        int(os.getenv("DOCUMENT_STORE_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)),
+                    )
+                _store = DocumentStore(backend)
+    return _store
@@ -0,0 +1,96 @@
+"""
+Batched text embeddings with a content-addressed vector cache.
+
+``embed_texts`` embeds many texts with as few requests as possible: texts whose
+vector is already cached are skipped, and the rest are sent in batches of up to
+``EMBEDDING_BATCH_SIZE`` through the governor. Vectors are cached by the SHA-256 of
+(model, task type, text) in the document store's blob backend, under
+``embeddings/<model>/<task>/<hash>.json``, so re-embedding a slightly changed
+document only pays for the texts that changed.
+
+Long texts should be split with ``chunk_text`` first; the embedding model only reads
+the first ~2k tokens of its input.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from senseai_common.document_store import get_document_store
+from senseai_common.gemini_model_config import configure_generativeai
+from senseai_common.governor import get_governor
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+# The API accepts at most 100 texts per batch request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CHUNK_CHARS = int(os.getenv("EMBEDDING_MAX_CHUNK_CHARS", "6000"))
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Split ``text`` on paragraph boundaries into chunks of at most ``max_chars``."""
+    max_chars = max_chars or EMBEDDING_MAX_CHUNK_CHARS
+    chunks, current = [], ""
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Paragraphs longer than a chunk are hard-split
+        pieces = [paragraph[i : i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cache_path(model: str, task_type: str, text: str) -> str:
+    digest = hashlib.sha256(f"{model}\n{task_type}\n{text}".encode("utf-8")).hexdigest()
+    return f"embeddings/{model.removeprefix('models/')}/{task_type.lower()}/{digest}.json"
+
+
+def embed_texts(
+    texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT", model: Optional[str] = None
+) -> List[List[float]]:
+    """Embeddings of ``texts``, in order, from the cache or batched embedding requests."""
+    if not texts:
+        return []
+    model = model or EMBEDDING_MODEL
+    backend = get_document_store().backend
+    paths = [_cache_path(model, task_type, text) for text in texts]
+
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+        cached = list(executor.map(backend.get, paths))
+    vectors = [json.loads(blob) if blob is not None else None for blob in cached]
+
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        import google.generativeai as genai
+
+        configure_generativeai()
+        governor = get_governor()
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[start : start + EMBEDDING_BATCH_SIZE]
+            response = governor.call(
+                model,
+                genai.embed_content,
+                model=model,
+                content=[texts[i] for i in batch],
+                task_type=task_type,
+            )
+            for i, vector in zip(batch, response["embedding"]):
+                vectors[i] = vector
+                backend.put(paths[i], json.dumps(vector).encode("utf-8"), "application/json")
+
+    logger.info(
+        f"Embedded {len(texts)} texts with {model}: "
+        f"{len(texts) - len(missing)} cached, {len(missing)} requested"
+    )
+    return vectors
@@ -0,0 +1,161 @@
+"""
+Single entry points for Gemini ``generate_content`` calls.
+
+Services call these wrappers instead of the SDK methods directly so that every call
+goes through the process-wide governor (see ``governor``) and the shared response
+cache (see ``response_cache``). Both SDKs in use are covered:
+
+- ``generate_content`` wraps ``google.generativeai.GenerativeModel.generate_content``
+- ``client_generate_content`` wraps ``google.genai.Client.models.generate_content``
+- ``client_generate_content_async`` is its awaitable variant for coroutines (ADK
+  tools, async endpoints): it never blocks the event loop
+
+Calls that reach the API are counted, with their token usage, in ``usage_totals()``.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict
+
+from senseai_common.gemini_model_config import configure_generativeai
+from senseai_common.governor import get_governor
+from senseai_common.response_cache import get_response_cache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """Stand-in for an SDK response served from the cache (text responses only)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+_usage_lock = threading.Lock()
+_usage = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+
+def _record_usage(response):
+    metadata = getattr(response, "usage_metadata", None)
+    with _usage_lock:
+        _usage["calls"] += 1
+        if metadata is not None:
+            _usage["prompt_tokens"] += getattr(metadata, "prompt_token_count", 0) or 0
+            _usage["output_tokens"] += getattr(metadata, "candidates_token_count", 0) or 0
+
+
+def usage_totals() -> Dict[str, int]:
+    """API calls made by this process so far and their tokens (cache hits excluded)."""
+    with _usage_lock:
+        return dict(_usage)
+
+
+def _response_text(response) -> str:
+    """Return the text of a response, or an empty string if it has none (blocked, audio, ...)."""
+    try:
+        return response.text or ""
+    except (ValueError, AttributeError):
+        return ""
+
+
+def generate_content(model, contents: Any, **kwargs):
+    """Call ``GenerativeModel.generate_content`` through the governor and response cache.
+
+    ``model`` is a ``google.generativeai.GenerativeModel``; keyword arguments are
+    passed through unchanged.
+    """
+    configure_generativeai()
+    governor = get_governor()
+    cache = get_response_cache()
+    if cache is None or kwargs.get("stream"):
+        response = governor.call(model.model_name, model.generate_content, contents, **kwargs)
+        if not kwargs.get("stream"):
+            _record_usage(response)
+        return response
+
+    config = {
+        "generation_config": getattr(model, "_generation_config", None),
+        "system_instruction": getattr(model, "_system_instruction", None),
+        **kwargs,
+    }
+    key = make_cache_key(model.model_name, contents, config)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info(f"Gemini cache hit for {model.model_name}")
+        return CachedResponse(cached["text"])
+
+    response = governor.call(model.model_name, model.generate_content, contents, **kwargs)
+    _record_usage(response)
+    text = _response_text(response)
+    if text:
+        cache.set(key, {"text": text})
+    return response
+
+
+def client_generate_content(
+    client, *, model: str, contents: Any, config: Any = None, cache: bool = True
+):
+    """Call ``client.models.generate_content`` (``google.genai``) through the governor and response cache.
+
+    Pass ``cache=False`` for calls whose response is not text (e.g. TTS audio).
+    """
+    governor = get_governor()
+    response_cache = get_response_cache() if cache else None
+    if response_cache is None:
+        response = governor.call(
+            model, client.models.generate_content, model=model, contents=contents, config=config
+        )
+        _record_usage(response)
+        return response
+
+    key = make_cache_key(model, contents, config)
+    cached = response_cache.get(key)
+    if cached is not None:
+        logger.info(f"Gemini cache hit for {model}")
+        return CachedResponse(cached["text"])
+
+    response = governor.call(
+        model, client.models.generate_content, model=model, contents=contents, config=config
+    )
+    _record_usage(response)
+    text = _response_text(response)
+    if text:
+        response_cache.set(key, {"text": text})
+    return response
+
+
+async def client_generate_content_async(
+    client, *, model: str, contents: Any, config: Any = None, cache: bool = True
+):
+    """Async ``client_generate_content``: waits for slots and backs off without blocking the loop.
+
+    Use this from coroutines. The blocking variant would hold the loop thread while
+    it waits, so async slot holders on the same loop could never release their slots.
+    The request itself goes through the sync client in a worker thread: ``client.aio``
+    keeps one async HTTP client bound to the first event loop that used it, and ADK's
+    ``Runner.run`` starts a new loop per call.
+    """
+    governor = get_governor()
+    response_cache = get_response_cache() if cache else None
+    key = None
+    if response_cache is not None:
+        key = make_cache_key(model, contents, config)
+        cached = await asyncio.to_thread(response_cache.get, key)
+        if cached is not None:
+            logger.info(f"Gemini cache hit for {model}")
+            return CachedResponse(cached["text"])
+
+    response = await governor.call_async(
+        model,
+        asyncio.to_thread,
+        client.models.generate_content,
+        model=model,
+        contents=contents,
+        config=config,
+    )
+    _record_usage(response)
+    text = _response_text(response)
+    if response_cache is not None and text:
+        await asyncio.to_thread(response_cache.set, key, {"text": text})
+    return response
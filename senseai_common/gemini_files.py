@@ -0,0 +1,191 @@
+"""
+Upload-once file references for Gemini requests.
+
+Multimodal pipelines send the same page images in several calls (a deck's table of
+contents, then every topic). Instead of inlining the bytes each time, each image is
+uploaded once and later calls reference it by handle, so a deck's pixels cross the
+network roughly once per analysis.
+
+Uploads are content-addressed: a file's handle name is derived from the SHA-256 of
+its bytes, so every instance of every service resolves the same image to the same
+uploaded file and only uploads it if it is missing or about to expire.
+
+Backends (GEMINI_FILES_BACKEND):
+- "gemini" (default): the Gemini Files API (``google.generativeai``)
+- "inline": stand-in that keeps files in memory and resolves handles to inline
+  parts; needs no network, for offline runs and tests
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from senseai_common.gemini_model_config import configure_generativeai
+
+logger = logging.getLogger(__name__)
+
+# The Files API keeps uploads for 48 hours; re-upload well before that
+FILE_TTL_SECONDS = 48 * 3600
+EXPIRY_MARGIN_SECONDS = 3600
+UPLOAD_WORKERS = int(os.getenv("GEMINI_FILES_UPLOAD_WORKERS", "8"))
+
+
+@dataclass
+class FileHandle:
+    name: str
+    uri: str
+    mime_type: str
+    expires_at: float  # epoch seconds
+
+
+def file_name(data: bytes) -> str:
+    """Content-addressed handle name (Files API names allow at most 40 characters)."""
+    return hashlib.sha256(data).hexdigest()[:40]
+
+
+# ===============================
+# Backends
+# ===============================
+class GeminiFilesBackend:
+    """Files stored with the Gemini Files API."""
+
+    def _handle(self, file) -> FileHandle:
+        expiration = getattr(file, "expiration_time", None)
+        expires_at = (
+            expiration.timestamp() if expiration else time.time() + FILE_TTL_SECONDS
+        )
+        return FileHandle(file.name, file.uri, file.mime_type, expires_at)
+
+    def get(self, name: str) -> Optional[FileHandle]:
+        import google.generativeai as genai
+        from google.api_core.exceptions import NotFound, PermissionDenied
+
+        configure_generativeai()
+        try:
+            file = genai.get_file(f"files/{name}")
+        except (NotFound, PermissionDenied):
+            return None
+        if file.state.name != "ACTIVE":
+            return None
+        return self._handle(file)
+
+    def upload(self, name: str, data: bytes, mime_type: str) -> FileHandle:
+        import io
+
+        import google.generativeai as genai
+        from google.api_core.exceptions import AlreadyExists
+
+        configure_generativeai()
+        try:
+            file = genai.upload_file(
+                io.BytesIO(data), mime_type=mime_type, name=name, display_name=name
+            )
+        except AlreadyExists:
+            # Uploaded concurrently by another worker
+            file = genai.get_file(f"files/{name}")
+        return self._handle(file)
+
+    @staticmethod
+    def part(handle: FileHandle) -> Dict[str, Any]:
+        return {"file_data": {"file_uri": handle.uri, "mime_type": handle.mime_type}}
+
+
+class InlineFilesBackend:
+    """Offline stand-in: files live in memory and handles resolve to inline parts."""
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        self.uploads = 0
+
+    def get(self, name: str) -> Optional[FileHandle]:
+        return None  # nothing outlives the process
+
+    def upload(self, name: str, data: bytes, mime_type: str) -> FileHandle:
+        self.files[name] = data
+        self.uploads += 1
+        return FileHandle(name, f"inline://{name}", mime_type, time.time() + FILE_TTL_SECONDS)
+
+    def part(self, handle: FileHandle) -> Dict[str, Any]:
+        return {"mime_type": handle.mime_type, "data": self.files[handle.name]}
+
+
+# ===============================
+# Registry
+# ===============================
+class FileRegistry:
+    """Uploads each distinct payload once and hands out references to it."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._handles: Dict[str, FileHandle] = {}
+        self._lock = threading.Lock()
+
+    def _valid(self, handle: Optional[FileHandle]) -> bool:
+        return handle is not None and handle.expires_at - time.time() > EXPIRY_MARGIN_SECONDS
+
+    def handle(self, data: bytes, mime_type: str) -> FileHandle:
+        name = file_name(data)
+        with self._lock:
+            handle = self._handles.get(name)
+        if self._valid(handle):
+            return handle
+
+        handle = self.backend.get(name)
+        if not self._valid(handle):
+            handle = self.backend.upload(name, data, mime_type)
+            logger.info(f"Uploaded {mime_type} file {name[:12]} ({len(data)} bytes)")
+        with self._lock:
+            self._handles[name] = handle
+        return handle
+
+    def part(self, data: bytes, mime_type: str) -> Dict[str, Any]:
+        """Content part referencing ``data`` by handle, uploading it if needed."""
+        return self.backend.part(self.handle(data, mime_type))
+
+    def parts(self, blobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace inline ``{"mime_type", "data"}`` parts by references, uploading concurrently."""
+        if not blobs:
+            return []
+        workers = max(1, min(UPLOAD_WORKERS, len(blobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(lambda blob: self.part(blob["data"], blob["mime_type"]), blobs)
+            )
+
+    def reference_pages(self, pages: List[List[Any]]) -> List[List[Any]]:
+        """Per-page content (see ``DocumentStore.page_parts``) with inline images uploaded once."""
+        blobs = [
+            part for page in pages for part in page if isinstance(part, dict) and "data" in part
+        ]
+        references = iter(self.parts(blobs))
+        return [
+            [
+                next(references) if isinstance(part, dict) and "data" in part else part
+                for part in page
+            ]
+            for page in pages
+        ]
+
+
+_registry: Optional[FileRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_file_registry() -> FileRegistry:
+    """Return the process-wide registry configured from the environment."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                backend_name = os.getenv("GEMINI_FILES_BACKEND", "gemini").strip().lower()
+                if backend_name == "inline":
+                    backend = InlineFilesBackend()
+                else:
+                    backend = GeminiFilesBackend()
+                _registry = FileRegistry(backend)
+    return _registry
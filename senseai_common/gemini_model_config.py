@@ -0,0 +1,61 @@
+"""
+Gemini model names and process-wide clients shared by all services.
+
+Model names can be overridden per environment (``GEMINI_LARGE``, ``GEMINI_SMALL``,
+``GEMINI_TTS_MODEL``). Clients are created on first use and then reused, so calls
+share one HTTP connection pool instead of paying for a new client (and TLS
+handshake) each time.
+"""
+
+import os
+import threading
+
+import dotenv
+
+# Services import this module before loading their own .env, so load it here
+dotenv.load_dotenv(dotenv.find_dotenv(usecwd=True))
+
+# REASONING: Use for complex logic, planning, and coding tasks
+GEMINI_LARGE = os.getenv("GEMINI_LARGE", "gemini-2.5-pro")
+
+# SPEED: Use for chat loops, summarization, and quick tool usage
+GEMINI_SMALL = os.getenv("GEMINI_SMALL", "gemini-2.0-flash")
+
+# VOICE: Stable, low-latency text-to-speech
+TTS_MODEL = os.getenv("GEMINI_TTS_MODEL", "gemini-2.5-flash-preview-tts")
+
+
+_lock = threading.Lock()
+_genai_client = None
+_generativeai_configured = False
+
+
+def get_genai_client():
+    """Return the process-wide ``google.genai`` client."""
+    global _genai_client
+    if _genai_client is None:
+        with _lock:
+            if _genai_client is None:
+                from google import genai
+
+                _genai_client = genai.Client()
+    return _genai_client
+
+
+def configure_generativeai() -> None:
+    """Configure the ``google.generativeai`` SDK once, on first use."""
+    global _generativeai_configured
+    if _generativeai_configured:
+        return
+
+    with _lock:
+        if _generativeai_configured:
+            return
+
+        import google.generativeai as genai
+
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
+        genai.configure(api_key=api_key)
+        _generativeai_configured = True
@@ -0,0 +1,50 @@
+"""
+Gemini response schemas from Pydantic models.
+
+Gemini's structured output accepts an OpenAPI subset: no ``$ref``/``$defs``, no
+``default``/``title``, and nullability as ``nullable`` rather than ``anyOf`` with
+``null``. ``response_schema`` converts a model's JSON schema into that subset so the
+same model can both constrain the response and validate it (filling defaults)::
+
+    config = {"response_mime_type": "application/json", "response_schema": response_schema(Model)}
+    result = Model.model_validate_json(response.text)
+"""
+
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel
+
+# Keys Gemini's Schema understands; everything else (title, default, ...) is dropped
+SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+
+def _convert(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        resolved = dict(defs[node["$ref"].split("/")[-1]])
+        # A field's description beats the referenced model's docstring
+        if "description" in node:
+            resolved["description"] = node["description"]
+        node = resolved
+
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        nullable = len(options) < len(node["anyOf"])
+        converted = _convert({**options[0], **{k: v for k, v in node.items() if k != "anyOf"}}, defs)
+        if nullable:
+            converted["nullable"] = True
+        return converted
+
+    schema = {key: value for key, value in node.items() if key in SCHEMA_KEYS}
+    if "properties" in schema:
+        schema["properties"] = {
+            name: _convert(child, defs) for name, child in schema["properties"].items()
+        }
+    if "items" in schema:
+        schema["items"] = _convert(schema["items"], defs)
+    return schema
+
+
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Gemini ``response_schema`` (as a dict) for a Pydantic model."""
+    schema = model.model_json_schema()
+    return _convert(schema, schema.get("$defs", {}))
@@ -0,0 +1,274 @@
+"""
+Process-wide governor for outbound Gemini calls.
+
+Every model gets a budget: a maximum number of calls in flight and a token bucket
+that refills at ``requests_per_minute``. Callers wait for a slot in priority order,
+so interactive (dashboard) requests are served before batch work queued on the same
+model. Calls rejected with 429/503 are retried with jittered exponential backoff.
+
+The governor is shared by all threads and event loops of the process (ADK's
+``Runner.run`` executes each invocation on its own thread and loop), so it is built
+on ``threading`` primitives; async callers poll without blocking their loop.
+
+Budgets are configured per model tier from environment variables, e.g.
+``GEMINI_LARGE_MAX_CONCURRENCY=4`` and ``GEMINI_LARGE_RPM=60`` (tiers: LARGE, SMALL,
+TTS). Models outside the three tiers share the DEFAULT budget.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional
+
+from senseai_common.gemini_model_config import GEMINI_LARGE, GEMINI_SMALL, TTS_MODEL
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+INTERACTIVE = 0
+BATCH = 10
+
+RETRYABLE_STATUS_CODES = {429, 503}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "gemini_call_priority", default=BATCH
+)
+
+
+@contextmanager
+def call_priority(priority: int):
+    """Run the enclosed Gemini calls (including ADK agent runs) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def with_current_priority(fn: Callable) -> Callable:
+    """``fn`` bound to the caller's priority, for work handed to another thread.
+
+    Thread pools don't carry context variables over, so calls submitted to them
+    would otherwise run at the default (BATCH) priority.
+    """
+    priority = current_priority()
+
+    def call(*args, **kwargs):
+        with call_priority(priority):
+            return fn(*args, **kwargs)
+
+    return call
+
+
+class ModelBudget:
+    """Concurrency limit and token bucket for one model (``requests_per_minute <= 0`` disables the bucket)."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float):
+        self.max_concurrency = max_concurrency
+        self.refill_per_second = requests_per_minute / 60.0
+        # Allow short bursts of up to the concurrency limit
+        self.capacity = float(max(1, max_concurrency))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.waiters: list = []  # heap of (priority, sequence)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second
+        )
+        self.updated_at = now
+
+    def try_acquire(self, ticket) -> float:
+        """Take a slot for ``ticket`` and return 0, or return how long to wait before retrying."""
+        now = time.monotonic()
+        self._refill(now)
+        if self.waiters[0] != ticket or self.in_flight >= self.max_concurrency:
+            return 0.05
+        rate_limited = self.refill_per_second > 0
+        if rate_limited and self.tokens < 1:
+            return (1 - self.tokens) / self.refill_per_second
+
+        heapq.heappop(self.waiters)
+        if rate_limited:
+            self.tokens -= 1
+        self.in_flight += 1
+        return 0.0
+
+
+class GeminiGovernor:
+    """Grants call slots per model and retries throttled calls."""
+
+    def __init__(
+        self,
+        budgets: Dict[str, ModelBudget],
+        default_budget: ModelBudget,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+    ):
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    def budget_for(self, model: str) -> ModelBudget:
+        return self.budgets.get(model.removeprefix("models/"), self.default_budget)
+
+    # --- Slots ---
+    def _enqueue(self, budget: ModelBudget, priority: Optional[int]):
+        ticket = (current_priority() if priority is None else priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(budget.waiters, ticket)
+        return ticket
+
+    def _abandon(self, budget: ModelBudget, ticket) -> None:
+        with self._condition:
+            if ticket in budget.waiters:
+                budget.waiters.remove(ticket)
+                heapq.heapify(budget.waiters)
+            self._condition.notify_all()
+
+    def _release(self, budget: ModelBudget) -> None:
+        with self._condition:
+            budget.in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, model: str, priority: Optional[int] = None):
+        """Hold one call slot for ``model`` (blocking wait)."""
+        budget = self.budget_for(model)
+        ticket = self._enqueue(budget, priority)
+        try:
+            with self._condition:
+                while (wait := budget.try_acquire(ticket)) > 0:
+                    self._condition.wait(timeout=wait)
+        except BaseException:
+            self._abandon(budget, ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release(budget)
+
+    @asynccontextmanager
+    async def slot_async(self, model: str, priority: Optional[int] = None):
+        """Hold one call slot for ``model`` without blocking the event loop."""
+        budget = self.budget_for(model)
+        ticket = self._enqueue(budget, priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = budget.try_acquire(ticket)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 0.05))
+        except BaseException:
+            self._abandon(budget, ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release(budget)
+
+    # --- Retries ---
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        code = getattr(error, "code", None)
+        if not isinstance(code, int):
+            code = getattr(error, "status_code", None)
+        return code in RETRYABLE_STATUS_CODES
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(
+        self, model_name: str, fn: Callable, *args, priority: Optional[int] = None, **kwargs
+    ):
+        """Run ``fn(*args, **kwargs)`` inside a slot for ``model_name``, retrying 429/503 errors."""
+        for attempt in itertools.count():
+            try:
+                with self.slot(model_name, priority):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"Gemini {model_name} throttled ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def call_async(
+        self, model_name: str, fn: Callable, *args, priority: Optional[int] = None, **kwargs
+    ):
+        """Await ``fn(*args, **kwargs)`` inside a slot for ``model_name``, retrying 429/503 errors."""
+        for attempt in itertools.count():
+            try:
+                async with self.slot_async(model_name, priority):
+                    return await fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"Gemini {model_name} throttled ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+# ===============================
+# Process-wide instance
+# ===============================
+DEFAULT_BUDGETS = {
+    # tier: (max concurrency, requests per minute)
+    "LARGE": (4, 60),
+    "SMALL": (16, 600),
+    "TTS": (2, 10),
+    "DEFAULT": (16, 600),
+}
+
+
+def _budget_from_env(tier: str) -> ModelBudget:
+    concurrency, rpm = DEFAULT_BUDGETS[tier]
+    return ModelBudget(
+        int(os.getenv(f"GEMINI_{tier}_MAX_CONCURRENCY", concurrency)),
+        float(os.getenv(f"GEMINI_{tier}_RPM", rpm)),
+    )
+
+
+_governor: Optional[GeminiGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> GeminiGovernor:
+    """Return the process-wide governor, building it from the environment on first use."""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                budgets = {}
+                for tier, model in (
+                    ("SMALL", GEMINI_SMALL),
+                    ("LARGE", GEMINI_LARGE),
+                    ("TTS", TTS_MODEL),
+                ):
+                    budgets.setdefault(model, _budget_from_env(tier))
+                _governor = GeminiGovernor(
+                    budgets,
+                    _budget_from_env("DEFAULT"),
+                    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", 5)),
+                )
+    return _governor
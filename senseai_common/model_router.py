@@ -0,0 +1,157 @@
+"""
+Latency-SLO routing between Gemini model tiers.
+
+The router keeps a rolling window of (latency, success) samples per model. A model
+breaches its SLO when, over the window, its p95 latency exceeds
+``GEMINI_{TIER}_SLO_SECONDS`` or its error rate exceeds ``GEMINI_SLO_MAX_ERROR_RATE``.
+While a model is in breach, requests from agents marked *degradable* are sent to the
+model's fallback tier (GEMINI_LARGE -> GEMINI_SMALL); other agents keep using it.
+
+Recovery needs no probing: non-degradable traffic keeps sampling the slow model, and
+once the window holds fewer than ``GEMINI_SLO_MIN_SAMPLES`` samples the breach is
+considered cleared.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from senseai_common.gemini_model_config import GEMINI_LARGE, GEMINI_SMALL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 300.0
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_MAX_ERROR_RATE = 0.25
+DEFAULT_SLO_SECONDS = {
+    "LARGE": 45.0,
+    "SMALL": 15.0,
+}
+
+
+@dataclass
+class ModelStats:
+    samples: int
+    p95_latency: float
+    error_rate: float
+
+
+class ModelRouter:
+    """Tracks per-model latency/error rate and picks the model for each request."""
+
+    def __init__(
+        self,
+        tiers: Dict[str, str],
+        fallbacks: Dict[str, str],
+        slo_seconds: Dict[str, float],
+        max_error_rate: float = DEFAULT_MAX_ERROR_RATE,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+    ):
+        self.tiers = tiers  # model name -> tier name
+        self.fallbacks = fallbacks  # model name -> faster model name
+        self.slo_seconds = slo_seconds  # model name -> p95 latency objective
+        self.max_error_rate = max_error_rate
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._breached: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _name(model: str) -> str:
+        return model.removeprefix("models/")
+
+    def tier_of(self, model: str) -> str:
+        return self.tiers.get(self._name(model), "DEFAULT").lower()
+
+    # --- Samples ---
+    def observe(self, model: str, latency_seconds: float, ok: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            window = self._samples.setdefault(self._name(model), deque())
+            window.append((now, latency_seconds, ok))
+            self._trim(window, now)
+
+    def _trim(self, window: Deque, now: float) -> None:
+        while window and now - window[0][0] > self.window_seconds:
+            window.popleft()
+
+    def stats(self, model: str) -> ModelStats:
+        now = time.monotonic()
+        with self._lock:
+            window = self._samples.get(self._name(model), deque())
+            self._trim(window, now)
+            latencies = sorted(latency for _, latency, ok in window if ok)
+            errors = sum(1 for _, _, ok in window if not ok)
+            samples = len(window)
+
+        p95 = latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)] if latencies else 0.0
+        return ModelStats(samples, p95, errors / samples if samples else 0.0)
+
+    def is_breached(self, model: str) -> bool:
+        name = self._name(model)
+        slo = self.slo_seconds.get(name)
+        if slo is None:
+            return False
+
+        stats = self.stats(name)
+        breached = stats.samples >= self.min_samples and (
+            stats.p95_latency > slo or stats.error_rate > self.max_error_rate
+        )
+        if breached != self._breached.get(name, False):
+            self._breached[name] = breached
+            logger.warning(
+                f"Gemini {name} SLO {'breached' if breached else 'recovered'}: "
+                f"p95={stats.p95_latency:.1f}s (objective {slo:.0f}s), "
+                f"error rate={stats.error_rate:.0%} over {stats.samples} calls"
+            )
+        return breached
+
+    # --- Routing ---
+    def route(self, model: str, degradable: bool = False) -> str:
+        """Return the model to call for a request that asked for ``model``."""
+        fallback = self.fallbacks.get(self._name(model))
+        if degradable and fallback and self.is_breached(model):
+            return fallback
+        return model
+
+
+# ===============================
+# Process-wide instance
+# ===============================
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide router, building it from the environment on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                tiers = {GEMINI_SMALL: "SMALL", GEMINI_LARGE: "LARGE"}
+                slo_seconds = {
+                    model: float(
+                        os.getenv(f"GEMINI_{tier}_SLO_SECONDS", DEFAULT_SLO_SECONDS[tier])
+                    )
+                    for model, tier in tiers.items()
+                }
+                _router = ModelRouter(
+                    tiers,
+                    fallbacks={GEMINI_LARGE: GEMINI_SMALL},
+                    slo_seconds=slo_seconds,
+                    max_error_rate=float(
+                        os.getenv("GEMINI_SLO_MAX_ERROR_RATE", DEFAULT_MAX_ERROR_RATE)
+                    ),
+                    window_seconds=float(
+                        os.getenv("GEMINI_SLO_WINDOW_SECONDS", DEFAULT_WINDOW_SECONDS)
+                    ),
+                    min_samples=int(os.getenv("GEMINI_SLO_MIN_SAMPLES", DEFAULT_MIN_SAMPLES)),
+                )
+    return _router
@@ -0,0 +1,88 @@
+"""
+Classify PDF pages as text-dominant or visual.
+
+Text-dominant pages are fully recovered by PyMuPDF's text extraction and can be sent
+to Gemini as text, which is far smaller and faster than a page image. Pages whose
+meaning lives in pixels or vector graphics (charts, diagrams, photos, scans, text
+converted to outlines) still go as images.
+
+Signals per page:
+- text density: characters of extractable text
+- image coverage: share of the page area covered by raster images
+- vector drawing count: number of drawn paths (charts and diagrams have many)
+
+Thresholds (environment): PAGE_IMAGE_COVERAGE_THRESHOLD (0.25),
+PAGE_DRAWING_THRESHOLD (40), PAGE_MIN_TEXT_CHARS (80). Set PDF_TEXT_FIRST=false to
+send every page as an image.
+"""
+
+import os
+from dataclasses import asdict, dataclass
+from typing import List, Union
+
+TEXT = "text"
+IMAGE = "image"
+
+TEXT_FIRST = os.getenv("PDF_TEXT_FIRST", "true").lower() == "true"
+IMAGE_COVERAGE_THRESHOLD = float(os.getenv("PAGE_IMAGE_COVERAGE_THRESHOLD", "0.25"))
+DRAWING_THRESHOLD = int(os.getenv("PAGE_DRAWING_THRESHOLD", "40"))
+MIN_TEXT_CHARS = int(os.getenv("PAGE_MIN_TEXT_CHARS", "80"))
+
+
+@dataclass
+class PageProfile:
+    """Classification signals of one page; ``kind`` applies the current thresholds."""
+
+    page_number: int  # 1-based
+    text_chars: int
+    image_coverage: float
+    drawing_count: int
+
+    @property
+    def kind(self) -> str:
+        if not TEXT_FIRST:
+            return IMAGE
+        if (
+            self.image_coverage >= IMAGE_COVERAGE_THRESHOLD
+            or self.drawing_count >= DRAWING_THRESHOLD
+        ):
+            return IMAGE
+        if self.text_chars >= MIN_TEXT_CHARS:
+            return TEXT
+        # Almost no text layer: likely a scan, outlined text or a visual slide
+        return IMAGE
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _image_coverage(page) -> float:
+    page_area = abs(page.rect) or 1
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]  # clip to the visible page
+        if not bbox.is_empty:
+            covered += abs(bbox)
+    return min(1.0, covered / page_area)
+
+
+def classify_page(page) -> PageProfile:
+    """Profile a PyMuPDF page."""
+    return PageProfile(
+        page_number=page.number + 1,
+        text_chars=len(page.get_text("text").strip()),
+        image_coverage=round(_image_coverage(page), 3),
+        drawing_count=len(page.get_cdrawings()),
+    )
+
+
+def classify_pdf(source: Union[str, bytes]) -> List[PageProfile]:
+    """Profile every page of ``source`` (a path or the PDF bytes)."""
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray)):
+        doc = fitz.open(stream=bytes(source), filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    with doc:
+        return [classify_page(page) for page in doc]
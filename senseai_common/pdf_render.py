@@ -0,0 +1,154 @@
+"""
+Render PDF pages to compact images ready to send to Gemini.
+
+Pages are rasterized with PyMuPDF, capped to ``PDF_RENDER_MAX_DIMENSION`` pixels on
+their long side (Gemini downsamples larger images anyway), and encoded once to
+JPEG or WebP. The encoded bytes go straight into the request as inline parts, so
+no intermediate PNG or decoded PIL image is kept per page.
+
+MuPDF is not thread-safe and PyMuPDF holds the GIL while rendering, so threads
+would not render in parallel. Larger documents are instead split over a shared
+pool of worker processes (started on first use with "spawn", so the workers don't
+inherit the server's threads); each worker opens its own copy of the document.
+
+Settings (environment):
+- PDF_RENDER_FORMAT: "jpeg" (default) or "webp"
+- PDF_RENDER_QUALITY: encoder quality, default 80
+- PDF_RENDER_MAX_DIMENSION: long-side pixel cap, default 1536
+- PDF_RENDER_DPI: upper bound on resolution, default 150
+- PDF_RENDER_WORKERS: render processes, default min(4, CPU count); 1 renders
+  in the calling thread
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+RENDER_FORMAT = os.getenv("PDF_RENDER_FORMAT", "jpeg").lower()
+RENDER_QUALITY = int(os.getenv("PDF_RENDER_QUALITY", "80"))
+RENDER_MAX_DIMENSION = int(os.getenv("PDF_RENDER_MAX_DIMENSION", "1536"))
+RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "150"))
+RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+# Smaller documents render in the calling thread: starting work in another process
+# costs more than it saves
+PROCESS_MIN_PAGES = int(os.getenv("PDF_RENDER_PROCESS_MIN_PAGES", "4"))
+
+
+@dataclass
+class RenderedPage:
+    page_number: int  # 1-based
+    mime_type: str
+    data: bytes
+    width: int
+    height: int
+
+    def as_part(self) -> Dict[str, Union[str, bytes]]:
+        """Inline image part for ``google.generativeai`` ``contents``."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def _open(source: Union[str, bytes]):
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=bytes(source), filetype="pdf")
+    return fitz.open(source)
+
+
+def _render_pages(
+    source: Union[str, bytes],
+    page_indexes: Sequence[int],
+    image_format: str,
+    quality: int,
+    max_dimension: int,
+    dpi: int,
+) -> List[RenderedPage]:
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    pages = []
+    with _open(source) as doc:
+        for index in page_indexes:
+            page = doc.load_page(index)
+            long_side = max(page.rect.width, page.rect.height) or 1
+            zoom = min(dpi / 72, max_dimension / long_side)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            buffer = io.BytesIO()
+            if image_format == "webp":
+                image.save(buffer, "WEBP", quality=quality)
+            else:
+                image.save(buffer, "JPEG", quality=quality, optimize=True)
+
+            pages.append(
+                RenderedPage(
+                    page_number=index + 1,
+                    mime_type=MIME_TYPES[image_format],
+                    data=buffer.getvalue(),
+                    width=pix.width,
+                    height=pix.height,
+                )
+            )
+    return pages
+
+
+def render_pdf_pages(
+    source: Union[str, bytes],
+    image_format: Optional[str] = None,
+    quality: Optional[int] = None,
+    max_dimension: Optional[int] = None,
+    dpi: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[RenderedPage]:
+    """Render every page of ``source`` (a path or the PDF bytes), in page order."""
+    image_format = (image_format or RENDER_FORMAT).lower()
+    if image_format not in MIME_TYPES:
+        raise ValueError(f"Unsupported page image format: {image_format}")
+    options = (
+        image_format,
+        quality or RENDER_QUALITY,
+        max_dimension or RENDER_MAX_DIMENSION,
+        dpi or RENDER_DPI,
+    )
+
+    with _open(source) as doc:
+        page_count = doc.page_count
+
+    workers = max(1, min(workers or RENDER_WORKERS, RENDER_WORKERS, page_count))
+    if workers == 1 or page_count < PROCESS_MIN_PAGES:
+        return _render_pages(source, range(page_count), *options)
+
+    # Interleave pages so every worker gets a similar mix of light and heavy pages
+    chunks = [range(start, page_count, workers) for start in range(workers)]
+    futures = [
+        get_render_pool().submit(_render_pages, source, chunk, *options) for chunk in chunks
+    ]
+    pages = [page for future in futures for page in future.result()]
+    return sorted(pages, key=lambda page: page.page_number)
+
+
+# ===============================
+# Process pool
+# ===============================
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process-wide pool of RENDER_WORKERS render processes."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
@@ -0,0 +1,303 @@
+"""
+Content-addressed cache for Gemini responses.
+
+A cache key is the SHA-256 of (model, prompt, hash of every inline part, generation
+config), so identical calls made by any service resolve to the same entry. Binary
+parts (page images, audio, PDFs) only contribute their hash to the key.
+
+The cache is opt-in and configured from environment variables:
+
+- GEMINI_CACHE_BACKEND: "disk" or "firestore". Unset/empty disables caching.
+- GEMINI_CACHE_TTL_SECONDS: lifetime of an entry (default 7 days).
+- GEMINI_CACHE_DIR, GEMINI_CACHE_MAX_BYTES: disk backend location and size bound.
+- GEMINI_CACHE_COLLECTION, GEMINI_CACHE_MAX_ENTRIES: Firestore collection and size bound.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Firestore documents are limited to 1 MiB; leave room for the other fields.
+FIRESTORE_MAX_VALUE_BYTES = 900_000
+
+
+# ===============================
+# Cache keys
+# ===============================
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint(value: Any) -> Any:
+    """Reduce a prompt part or config to a JSON-serializable value.
+
+    Binary payloads are replaced by their SHA-256 so large inline parts never end up
+    in the key material itself.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"sha256": _sha256(bytes(value))}
+    if isinstance(value, dict):
+        # google.generativeai inline blob: {"mime_type": ..., "data": <bytes or base64>}
+        if "mime_type" in value and "data" in value:
+            data = value["data"]
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            return {"mime_type": value["mime_type"], "sha256": _sha256(bytes(data))}
+        return {str(k): fingerprint(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [fingerprint(v) for v in value]
+    if isinstance(value, type):
+        # Response schemas are passed as classes (e.g. Pydantic models)
+        schema = value.model_json_schema() if hasattr(value, "model_json_schema") else None
+        return {"type": f"{value.__module__}.{value.__qualname__}", "schema": schema}
+    # PIL images
+    if hasattr(value, "tobytes") and hasattr(value, "mode") and hasattr(value, "size"):
+        return {"image": [value.mode, list(value.size)], "sha256": _sha256(value.tobytes())}
+    # google.genai types are Pydantic models
+    if hasattr(value, "model_dump"):
+        return fingerprint(value.model_dump(exclude_none=True))
+    if dataclasses.is_dataclass(value):
+        return fingerprint(dataclasses.asdict(value))
+    # proto-plus messages used by google.generativeai
+    if hasattr(type(value), "to_dict"):
+        return fingerprint(type(value).to_dict(value))
+    return repr(value)
+
+
+def make_cache_key(model: str, contents: Any, config: Any = None) -> str:
+    """Build the content address for a model call."""
+    material = {
+        "model": model.removeprefix("models/"),
+        "contents": fingerprint(contents),
+        "config": fingerprint(config),
+    }
+    return _sha256(json.dumps(material, sort_keys=True, default=repr).encode("utf-8"))
+
+
+# ===============================
+# Backends
+# ===============================
+class DiskCacheBackend:
+    """Stores one JSON file per entry and evicts least recently used files above ``max_bytes``."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if entry.get("expires_at", 0) < time.time():
+            path.unlink(missing_ok=True)
+            return None
+
+        # Touch the file so eviction keeps recently read entries
+        os.utime(path, None)
+        return entry["value"]
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({"expires_at": time.time() + ttl_seconds, "value": value})
+
+        # Write atomically so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(payload)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*/*.json"))
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries until the cache is at 90% of its bound."""
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+        self._total_bytes = total
+        logger.info(f"Gemini cache evicted down to {total} bytes")
+
+
+class FirestoreCacheBackend:
+    """Stores entries in a Firestore collection keyed by the cache key.
+
+    Expired documents are ignored on read and pruned periodically; a Firestore TTL
+    policy on ``expires_at`` can be configured to delete them server-side as well.
+    """
+
+    EVICT_EVERY_N_WRITES = 50
+
+    def __init__(self, collection: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.collection_name = collection
+        self.max_entries = max_entries
+        self._collection = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from google.cloud import firestore
+
+            self._collection = firestore.Client().collection(self.collection_name)
+        return self._collection
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = self.collection.document(key).get()
+        if not doc.exists:
+            return None
+
+        data = doc.to_dict()
+        now = datetime.now(timezone.utc)
+        if data["expires_at"] < now:
+            doc.reference.delete()
+            return None
+
+        # Refresh the LRU timestamp at most once an hour to keep reads cheap
+        if data.get("accessed_at") and now - data["accessed_at"] > timedelta(hours=1):
+            doc.reference.update({"accessed_at": now})
+        return json.loads(data["value"])
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        payload = json.dumps(value)
+        if len(payload.encode("utf-8")) > FIRESTORE_MAX_VALUE_BYTES:
+            return
+
+        now = datetime.now(timezone.utc)
+        self.collection.document(key).set(
+            {
+                "value": payload,
+                "accessed_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds),
+            }
+        )
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self.EVICT_EVERY_N_WRITES == 0
+        if should_evict:
+            self._evict()
+
+    def _evict(self) -> None:
+        now = datetime.now(timezone.utc)
+        for doc in self.collection.where("expires_at", "<", now).limit(500).stream():
+            doc.reference.delete()
+
+        count = self.collection.count().get()[0][0].value
+        overflow = count - self.max_entries
+        if overflow > 0:
+            for doc in self.collection.order_by("accessed_at").limit(overflow).stream():
+                doc.reference.delete()
+
+
+# ===============================
+# Cache facade
+# ===============================
+class ResponseCache:
+    """Wraps a backend so that cache failures never fail the model call."""
+
+    def __init__(self, backend, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Gemini cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Gemini cache write failed: {e}")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache configured from the environment, or None when disabled."""
+    global _cache, _cache_configured
+    if _cache_configured:
+        return _cache
+
+    with _cache_lock:
+        if _cache_configured:
+            return _cache
+
+        backend_name = os.getenv("GEMINI_CACHE_BACKEND", "").strip().lower()
+        ttl = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+        if backend_name == "disk":
+            backend = DiskCacheBackend(
+                os.getenv(
+                    "GEMINI_CACHE_DIR",
+                    os.path.join(tempfile.gettempdir(), "senseai_gemini_cache"),
+                ),
+                max_bytes=int(os.getenv("GEMINI_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            )
+            _cache = ResponseCache(backend, ttl)
+        elif backend_name == "firestore":
+            backend = FirestoreCacheBackend(
+                os.getenv("GEMINI_CACHE_COLLECTION", "gemini_response_cache"),
+                max_entries=int(
+                    os.getenv("GEMINI_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+                ),
+            )
+            _cache = ResponseCache(backend, ttl)
+        elif backend_name:
+            logger.warning(f"Unknown GEMINI_CACHE_BACKEND '{backend_name}', caching disabled")
+
+        _cache_configured = True
+        return _cache
@@ -0,0 +1,327 @@
+"""
+Append-only, memory-mapped embedding index with exact cosine top-k search.
+
+Layout under the index directory:
+
+    meta.json       {"dimension": <int>}
+    vectors.f32     row-major float32 matrix, one L2-normalized row per entry
+    ids.jsonl       sidecar, line N describes row N: {"id", "kind", ...metadata}
+    segments.txt    replicated segments already applied here (see below)
+
+Entries are only ever appended. Re-adding an id appends a new row that supersedes
+the old one, so writers never rewrite the matrix and readers can memory-map it
+while it grows. A row only becomes visible once its sidecar line is complete.
+``replace_document`` first appends a tombstone (a zero row whose sidecar line names
+a document and entry kinds), which hides every earlier entry of that document and
+kind, so re-indexing a document never leaves stale rows searchable.
+
+Search is a single matrix-vector product over the mapped rows, which is exact and
+takes milliseconds for tens of thousands of entries.
+
+Location (``get_vector_index``): VECTOR_INDEX_DIR, by default ``vector_index`` next to
+the disk document store's documents. With the GCS document store the directory is
+only a local working copy: every write is also uploaded to the bucket as an
+immutable segment under ``vector_index/segments/``, and each instance applies the
+segments it hasn't seen (at most every VECTOR_INDEX_SYNC_SECONDS), so the index
+survives restarts and is shared across instances.
+"""
+
+import base64
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.float32
+SEGMENT_PREFIX = "vector_index/segments/"
+VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", "60"))
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=DTYPE).ravel()
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+class VectorIndex:
+    """Embeddings of documents/entities keyed by id, searchable by cosine similarity.
+
+    ``mirror`` is an optional blob backend (see ``document_store``) that every write is
+    replicated to, and that other writers' segments are read back from.
+    """
+
+    def __init__(self, directory: str, mirror=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.ids_path = self.directory / "ids.jsonl"
+        self.meta_path = self.directory / "meta.json"
+        self.segments_path = self.directory / "segments.txt"
+        self.mirror = mirror
+
+        self.dimension: Optional[int] = None
+        if self.meta_path.exists():
+            self.dimension = json.loads(self.meta_path.read_text())["dimension"]
+
+        self._entries: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}  # id -> latest row
+        self._documents: Dict[Tuple[str, str], Set[str]] = {}  # (document_id, kind) -> ids
+        self._ids_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # --- Writes ---
+    def add(self, entry_id: str, vector: Sequence[float], kind: str, **metadata) -> None:
+        """Append ``vector`` for ``entry_id``; a later add of the same id supersedes it."""
+        self._write([(entry_id, vector, kind, metadata)])
+
+    def replace_document(
+        self,
+        document_id: str,
+        kinds: Iterable[str],
+        entries: Sequence[Tuple[str, Sequence[float], str, Dict[str, Any]]],
+    ) -> None:
+        """Replace every entry of ``document_id`` of the given ``kinds`` with ``entries``.
+
+        ``entries`` are ``(entry_id, vector, kind, metadata)``; their metadata should
+        include ``document_id`` so that a later replace hides them in turn.
+        """
+        self.replace_documents([(document_id, kinds, entries)])
+
+    def replace_documents(self, replacements: Sequence[Tuple[str, Iterable[str], Sequence]]) -> None:
+        """``replace_document`` for many ``(document_id, kinds, entries)`` in one write."""
+        deletes = [(document_id, sorted(kinds)) for document_id, kinds, _ in replacements]
+        self._write([entry for _, _, entries in replacements for entry in entries], deletes)
+
+    def _write(self, entries, deletes: Sequence[Tuple[str, List[str]]] = ()) -> None:
+        rows = [_normalize(vector) for _, vector, _, _ in entries]
+        dimension = self.dimension or (len(rows[0]) if rows else None)
+        if dimension is None:
+            return  # Empty index and nothing to add: nothing to delete either
+        for row in rows:
+            if len(row) != dimension:
+                raise ValueError(f"Embedding has {len(row)} dimensions, index expects {dimension}")
+
+        # Tombstones go first: they only hide rows written before them
+        lines = [
+            {
+                "id": f"_deleted:{document_id}",
+                "kind": "_deleted",
+                "delete_document": document_id,
+                "delete_kinds": kinds,
+            }
+            for document_id, kinds in deletes
+        ]
+        lines += [
+            {"id": entry_id, "kind": kind, **metadata}
+            for entry_id, _, kind, metadata in entries
+        ]
+        rows = [np.zeros(dimension, dtype=DTYPE) for _ in deletes] + rows
+        matrix = np.stack(rows).astype(DTYPE, copy=False)
+
+        # Segment names sort in write order
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex}.json"
+        if self.mirror is not None:
+            segment = {"lines": lines, "vectors": base64.b64encode(matrix.tobytes()).decode("ascii")}
+            self.mirror.put(
+                SEGMENT_PREFIX + name, json.dumps(segment).encode("utf-8"), "application/json"
+            )
+        with self._lock:
+            self._append(name, lines, matrix)
+
+    @contextmanager
+    def _file_lock(self):
+        # The file lock keeps rows and sidecar lines aligned across worker processes
+        with open(self.vectors_path, "ab") as vectors:
+            fcntl.flock(vectors, fcntl.LOCK_EX)
+            try:
+                yield vectors
+            finally:
+                fcntl.flock(vectors, fcntl.LOCK_UN)
+
+    def _applied_segments(self) -> Set[str]:
+        if not self.segments_path.exists():
+            return set()
+        return set(self.segments_path.read_text().split())
+
+    def _append(self, segment: str, lines: List[Dict[str, Any]], matrix: np.ndarray) -> None:
+        """Append one segment's rows and sidecar lines, once; caller holds ``_lock``."""
+        with self._file_lock() as vectors:
+            if segment in self._applied_segments():
+                return
+            if self.dimension is None:
+                self.dimension = matrix.shape[1]
+                self.meta_path.write_text(json.dumps({"dimension": self.dimension}))
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding has {matrix.shape[1]} dimensions, index expects {self.dimension}"
+                )
+            # Vectors first: a row without its sidecar line is never read
+            vectors.write(matrix.tobytes())
+            vectors.flush()
+            with open(self.ids_path, "a", encoding="utf-8") as ids:
+                ids.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+            with open(self.segments_path, "a", encoding="utf-8") as segments:
+                segments.write(segment + "\n")
+
+    def _sync(self) -> None:
+        """Apply the mirror's segments written by other instances; caller holds ``_lock``."""
+        self._synced_at = time.monotonic()
+        try:
+            names = [name[len(SEGMENT_PREFIX):] for name in self.mirror.list(SEGMENT_PREFIX)]
+            applied = self._applied_segments()
+            missing = [name for name in names if name not in applied]
+            for name in missing:
+                data = self.mirror.get(SEGMENT_PREFIX + name)
+                if data is None:
+                    continue
+                segment = json.loads(data)
+                lines = segment["lines"]
+                matrix = np.frombuffer(base64.b64decode(segment["vectors"]), dtype=DTYPE)
+                self._append(name, lines, matrix.reshape(len(lines), -1))
+            if missing:
+                logger.info(f"Applied {len(missing)} vector index segments from the mirror")
+        except Exception as e:
+            logger.warning(f"Vector index sync failed, searching the local copy: {e}")
+
+    # --- Reads ---
+    def _refresh(self) -> None:
+        """Pick up rows appended since the last read (by this or another process)."""
+        if self.mirror is not None and (
+            self._synced_at is None
+            or time.monotonic() - self._synced_at > VECTOR_INDEX_SYNC_SECONDS
+        ):
+            self._sync()
+        if self.dimension is None:
+            if not self.meta_path.exists():
+                return
+            self.dimension = json.loads(self.meta_path.read_text())["dimension"]
+        if not self.ids_path.exists():
+            return
+
+        with open(self.ids_path, "rb") as f:
+            f.seek(self._ids_offset)
+            chunk = f.read()
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            row = len(self._entries)
+            self._entries.append(entry)
+            if "delete_document" in entry:
+                for kind in entry["delete_kinds"]:
+                    for entry_id in self._documents.pop((entry["delete_document"], kind), ()):
+                        self._rows.pop(entry_id, None)
+                continue
+            self._rows[entry["id"]] = row
+            if entry.get("document_id") is not None:
+                self._documents.setdefault((entry["document_id"], entry["kind"]), set()).add(
+                    entry["id"]
+                )
+        self._ids_offset += len(complete)
+
+        row_bytes = self.dimension * np.dtype(DTYPE).itemsize
+        rows = min(len(self._entries), os.path.getsize(self.vectors_path) // row_bytes)
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = (
+                np.memmap(self.vectors_path, dtype=DTYPE, mode="r", shape=(rows, self.dimension))
+                if rows
+                else np.empty((0, self.dimension), dtype=DTYPE)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def get(self, entry_id: str) -> Optional[np.ndarray]:
+        """Latest (normalized) vector stored for ``entry_id``."""
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(entry_id)
+            if row is None or self._matrix is None or row >= self._matrix.shape[0]:
+                return None
+            return np.array(self._matrix[row])
+
+    def entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Sidecar metadata of the latest row stored for ``entry_id``."""
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(entry_id)
+            return dict(self._entries[row]) if row is not None else None
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 10,
+        kind: Optional[str] = None,
+        exclude: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-``k`` entries by cosine similarity to ``vector``, best first.
+
+        ``kind`` restricts results to one entry kind; ``exclude`` drops entries whose
+        metadata matches every given field (e.g. the query document itself).
+        """
+        query = _normalize(vector)
+        with self._lock:
+            self._refresh()
+            matrix = self._matrix
+            if matrix is None or not matrix.shape[0]:
+                return []
+            if len(query) != matrix.shape[1]:
+                raise ValueError(
+                    f"Query has {len(query)} dimensions, index expects {matrix.shape[1]}"
+                )
+            live = [
+                row
+                for row in self._rows.values()
+                if row < matrix.shape[0]
+                and (kind is None or self._entries[row]["kind"] == kind)
+                and not (
+                    exclude
+                    and all(self._entries[row].get(key) == value for key, value in exclude.items())
+                )
+            ]
+            if not live:
+                return []
+            rows = np.fromiter(live, dtype=np.int64, count=len(live))
+            scores = (matrix @ query)[rows]
+            entries = [self._entries[row] for row in live]
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**entries[i], "score": round(float(scores[i]), 4)} for i in top]
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the process-wide index, located next to the document store (see above)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from senseai_common.document_store import DiskBlobBackend, get_document_store
+
+                backend = get_document_store().backend
+                if isinstance(backend, DiskBlobBackend):
+                    default_dir, mirror = backend.directory / "vector_index", None
+                else:
+                    default_dir = os.path.join(tempfile.gettempdir(), "senseai_vector_index")
+                    mirror = backend
+                _index = VectorIndex(os.getenv("VECTOR_INDEX_DIR") or default_dir, mirror=mirror)
+    return _index
@@ -43,6 +43,8 @@ export default function StartupPitchAnalyzer() {
   const [loadingFactCheck, setLoadingFactCheck] = useState(false);
   const [loadingVideo, setLoadingVideo] = useState(false);
   const [loadingAddCompany, setLoadingAddCompany] = useState(false);
+  // Sections of a streamed pitch deck analysis still being generated
+  const [pendingSections, setPendingSections] = useState([]);
   const [result, setResult] = useState(null);
   const [error, setError] = useState("");
   const [activeTab, setActiveTab] = useState("pdf");
@@ -130,20 +132,61 @@ export default function StartupPitchAnalyzer() {
     }
     setLoading(true);
     setResult(null);
+    setPendingSections([]);
     try {
       const form = new FormData();
       form.append("file", pdfFile);
-      const res = await fetch(`${API_BASE}/analyze-pitch-deck/`, {
+      // NDJSON stream: the table of contents first, then each section as it finishes
+      const res = await fetch(`${API_BASE}/analyze-pitch-deck/?stream=true`, {
         method: "POST",
         body: form,
       });
-      const data = await res.json();
-      if (!res.ok) throw new Error(data.detail || "Server error");
-      setResult(data);
+      if (!res.ok) {
+        const data = await res.json();
+        throw new Error(data.detail || "Server error");
+      }
+
+      let toc = {};
+      const sections = {};
+      const handleEvent = (event) => {
+        if (event.event === "toc") {
+          toc = event.toc;
+          setPendingSections(Object.keys(toc));
+          setLoading(false);
+        } else if (event.event === "topic") {
+          sections[event.topic] = event.analysis;
+          // Show finished sections in table-of-contents order
+          const analysis = {};
+          Object.keys(toc)
+            .filter((topic) => topic in sections)
+            .forEach((topic) => (analysis[topic] = sections[topic]));
+          setResult({ toc, analysis });
+          setPendingSections((pending) => pending.filter((t) => t !== event.topic));
+        } else if (event.event === "complete") {
+          setResult(event.result);
+          setPendingSections([]);
+        } else if (event.event === "error") {
+          throw new Error(event.detail || "Analysis failed");
+        }
+      };
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
     } catch (err) {
       setError(String(err));
     } finally {
       setLoading(false);
+      setPendingSections([]);
     }
   };
 
@@ -248,6 +291,7 @@ export default function StartupPitchAnalyzer() {
     setVideoFile(null);
     setYoutubeUrl("");
     setResult(null);
+    setPendingSections([]);
     setError("");
   };
 
@@ -681,8 +725,18 @@ export default function StartupPitchAnalyzer() {
                       This may take a few moments
                     </p>
                   </div>
-                ) : result ? (
-                  <PitchAnalysisResults result={result} />
+                ) : result || pendingSections.length > 0 ? (
+                  <>
+                    {pendingSections.length > 0 && (
+                      <div className="flex items-center gap-2 mb-3 text-xs sm:text-sm text-muted-foreground">
+                        <Loader2 className="h-4 w-4 animate-spin text-blue-600" />
+                        Analyzing {pendingSections.length} more section
+                        {pendingSections.length === 1 ? "" : "s"}:{" "}
+                        {pendingSections.map((t) => t.replace(/_/g, " ")).join(", ")}
+                      </div>
+                    )}
+                    {result && <PitchAnalysisResults result={result} />}
+                  </>
                 ) : (
                   <div className="text-center py-6 sm:py-8 px-4">
                     <Brain className="h-10 w-10 sm:h-12 sm:w-12 text-muted-foreground mx-auto mb-3 sm:mb-4" />